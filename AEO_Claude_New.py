@@ -6,14 +6,13 @@ Created on Thu Nov 27 05:56:29 2025
 """
 
 import streamlit as st
-import requests
-from bs4 import BeautifulSoup
-import re
-import json
-import textstat
-import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# pandas and plotly are imported by the views that draw tables and charts, keeping them off the cold-start path
+from aeo_engine import DOWNLOAD_DEADLINE, ENCODING_DETECTION_BYTES, MAX_DOWNLOAD_BYTES, StageTimer, audit_page, fetch_document, get_http_cache, warm_readability
+from aeo_records import AuditResult, ScoreBreakdown
 
 st.set_page_config(
     page_title="AEO On-Page Auditor",
@@ -78,866 +77,108 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def fetch_page(url):
-    """Fetch webpage content with timeout and retry logic"""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'en-US,en;q=0.5',
-        'Accept-Encoding': 'gzip, deflate',
-        'Connection': 'keep-alive',
-        'Upgrade-Insecure-Requests': '1'
-    }
-    
-    session = requests.Session()
-    
-    try:
-        # First try with standard timeout
-        response = session.get(url, headers=headers, timeout=20, allow_redirects=True)
-        response.raise_for_status()
-        
-        # Check if we got valid HTML
-        if len(response.text) < 100:
-            raise Exception("Response too short - website may be blocking the request")
-        
-        return response.text
-        
-    except requests.Timeout:
-        raise Exception(f"⏱️ Request timed out after 20 seconds. This website is responding slowly. Try:\n- Testing with a faster-loading page\n- Running locally instead of Streamlit Cloud\n- The website may have rate limiting")
-    except requests.HTTPError as e:
-        if e.response.status_code == 403:
-            raise Exception(f"🚫 Access Forbidden (403). The website is blocking automated requests. This is common with sites that have bot protection.")
-        elif e.response.status_code == 429:
-            raise Exception(f"⚠️ Too Many Requests (429). The website has rate limiting. Wait a few minutes and try again.")
-        else:
-            raise Exception(f"❌ HTTP Error {e.response.status_code}: {str(e)}")
-    except requests.RequestException as e:
-        raise Exception(f"🌐 Network Error: {str(e)}\n\nPossible causes:\n- Website is down\n- DNS resolution failed\n- SSL certificate issues")
-    finally:
-        session.close()
-
-def analyze_schema(soup):
-    """Analyze structured data/schema markup"""
-    schema_scripts = soup.find_all('script', type='application/ld+json')
-    
-    faq_present = False
-    howto_present = False
-    article_present = False
-    faq_count = 0
-    howto_count = 0
-    
-    for script in schema_scripts:
-        try:
-            if not script.string:
-                continue
-            data = json.loads(script.string)
-            if isinstance(data, list):
-                for item in data:
-                    schema_type = item.get('@type', '').lower()
-                    if 'faqpage' in schema_type:
-                        faq_present = True
-                        faq_count = len(item.get('mainEntity', []))
-                    elif 'howto' in schema_type:
-                        howto_present = True
-                        howto_count = len(item.get('step', []))
-                    elif 'article' in schema_type:
-                        article_present = True
-            else:
-                schema_type = data.get('@type', '').lower()
-                if 'faqpage' in schema_type:
-                    faq_present = True
-                    faq_count = len(data.get('mainEntity', []))
-                elif 'howto' in schema_type:
-                    howto_present = True
-                    howto_count = len(data.get('step', []))
-                elif 'article' in schema_type:
-                    article_present = True
-        except (json.JSONDecodeError, AttributeError, TypeError):
-            continue
-    
-    return {
-        'faq_present': faq_present,
-        'faq_count': faq_count,
-        'howto_present': howto_present,
-        'howto_count': howto_count,
-        'article_present': article_present
-    }
-
-def analyze_questions(soup):
-    """Analyze question-based content"""
-    headings = soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])
-    
-    question_words = ['what', 'why', 'how', 'when', 'where', 'who', 'which', 'can', 'is', 'are', 'do', 'does']
-    question_headings = []
-    
-    for heading in headings:
-        text = heading.get_text().strip().lower()
-        if any(text.startswith(qw) for qw in question_words) or text.endswith('?'):
-            question_headings.append(heading.get_text().strip())
-    
-    return {
-        'total_headings': len(headings),
-        'question_headings': len(question_headings),
-        'question_heading_examples': question_headings[:5]
-    }
-
-def analyze_snippet_optimization(soup):
-    """Analyze featured snippet readiness"""
-    paragraphs = soup.find_all('p')
-    first_para_words = 0
-    
-    if paragraphs:
-        first_para_text = paragraphs[0].get_text().strip()
-        first_para_words = len(first_para_text.split())
-    
-    lists = len(soup.find_all(['ul', 'ol']))
-    tables = len(soup.find_all('table'))
-    
-    short_paragraphs = 0
-    for p in paragraphs:
-        word_count = len(p.get_text().split())
-        if 40 <= word_count <= 60:
-            short_paragraphs += 1
-    
-    snippet_score = 0
-    if first_para_words >= 40 and first_para_words <= 60:
-        snippet_score += 30
-    if lists > 0:
-        snippet_score += 25
-    if tables > 0:
-        snippet_score += 20
-    if short_paragraphs >= 3:
-        snippet_score += 25
+# Pages fetched at once in the Competitive Comparison tab
+COMPARISON_MAX_WORKERS = 4
+
+# Single-page audits each browser session keeps for instant re-rendering
+SESSION_AUDIT_LIMIT = 10
+
+# Shown when a download hit the size cap or deadline and only part of the page was analyzed
+TRUNCATION_NOTES = {
+    'size': f"✂️ This page is larger than {MAX_DOWNLOAD_BYTES / 1024 / 1024:g} MB, so only the first {MAX_DOWNLOAD_BYTES / 1024 / 1024:g} MB were analyzed. Content further down the page is not reflected in the scores.",
+    'deadline': f"✂️ The page was still downloading after {DOWNLOAD_DEADLINE:g} seconds, so only the part received by then was analyzed. Content further down the page is not reflected in the scores."
+}
+
+# Which text the structure and entity results were read from
+CONTENT_SCOPE_NOTES = {
+    'main': "📄 Structure and entity results describe the page's main content block; navigation, sidebars and footers are left out.",
+    'full': "📄 Structure and entity results describe all of the page's text, including navigation, sidebars and footers."
+}
+
+# Where fetch_document() found a page's encoding
+ENCODING_SOURCE_LABELS = {
+    'bom': 'byte order mark',
+    'header': 'Content-Type header',
+    'meta': '<meta> charset tag',
+    'utf-8-valid': f"valid UTF-8 in the first {ENCODING_DETECTION_BYTES // 1024} KB",
+    'detected': f"guessed by chardet from the first {ENCODING_DETECTION_BYTES // 1024} KB",
+    'default': 'no charset declared, assumed',
+    'cache': 'as stored in the HTTP cache'
+}
+
+# Performance panel rows, in pipeline order; stages missing here are listed after them under their own name
+PERF_STAGE_LABELS = {
+    'cache_lookup': 'HTTP cache lookup',
+    'request': 'Request (DNS, connect, server wait)',
+    'download': 'Download',
+    'detect_encoding': 'Charset detection',
+    'cache_store': 'HTTP cache store',
+    'hash': 'Content hash',
+    'audit_cache_lookup': 'Audit cache lookup',
+    'history_lookup': 'History lookup',
+    'extract_jsonld': 'JSON-LD extraction',
+    'parse': 'HTML parsing',
+    'collect_elements': 'Element collection',
+    'main_content': 'Main-content extraction',
+    'stream_analyze': 'Streaming analysis',
+    'analyze_schema': 'Schema analysis',
+    'analyze_questions': 'Question analysis',
+    'analyze_snippet_optimization': 'Snippet analysis',
+    'analyze_structure': 'Structure & readability',
+    'analyze_entities': 'Entity analysis',
+    'analyze_eeat': 'E-E-A-T analysis',
+    'score_breakdown': 'Score breakdown',
+    'engine_scores': 'Engine scores',
+    'recommendations': 'Recommendations',
+    'history_store': 'History store'
+}
+
+def perf_frame(perfs):
+    """Stage timings in ms, one column per audit, with a Total row"""
+    import pandas as pd
+    
+    measured = {stage for perf in perfs.values() for stage in perf['stages_ms']}
+    stages = [stage for stage in PERF_STAGE_LABELS if stage in measured] + sorted(measured - set(PERF_STAGE_LABELS))
+    frame = pd.DataFrame(
+        {column: [perf['stages_ms'].get(stage) for stage in stages] for column, perf in perfs.items()},
+        index=[PERF_STAGE_LABELS.get(stage, stage) for stage in stages]
+    )
+    frame.loc['Total'] = [perf['total_ms'] for perf in perfs.values()]
+    return frame
+
+def render_performance(perf):
+    """Expandable per-stage timing table for one audit or fetch"""
+    if not perf:
+        return
+    with st.expander(f"⏱️ Performance ({perf['total_ms']:,.0f} ms)"):
+        st.dataframe(perf_frame({'Time (ms)': perf}), use_container_width=True)
+        if perf['counts']:
+            st.caption(" · ".join(f"{name.replace('_', ' ')}: {value:,}" for name, value in perf['counts'].items()))
+        if perf.get('notes'):
+            st.caption(" · ".join(f"{name.replace('_', ' ')}: {value}" for name, value in perf['notes'].items()))
+
+@st.cache_resource(show_spinner=False)
+def start_readability_warmup():
+    """Load the readability dictionaries once per server process, in the background while the first page renders"""
+    thread = threading.Thread(target=warm_readability, name='readability-warmup', daemon=True)
+    thread.start()
+    return thread
+
+def analyze_comparison_page(url, force_refresh=False):
+    """Audit one page for the comparison view (safe to run in a worker thread); breakdown and raw_data are records"""
+    audit, source = audit_page(url, force_refresh)
+    score_breakdown = ScoreBreakdown.from_dict(audit['score_breakdown'])
     
     return {
-        'first_para_words': first_para_words,
-        'lists': lists,
-        'tables': tables,
-        'short_paragraphs': short_paragraphs,
-        'snippet_score': min(snippet_score, 100)
+        'url': url,
+        'source': source,
+        'overall_score': score_breakdown.total,
+        'breakdown': score_breakdown,
+        'engine_scores': audit['engine_scores'],
+        'raw_data': AuditResult.from_dict(audit['result'])
     }
 
-def analyze_structure(soup):
-    """Analyze content structure"""
-    try:
-        text = soup.get_text()
-        
-        has_tldr = bool(re.search(r'(tl;?dr|summary|key takeaways)', text, re.IGNORECASE))
-        has_toc = bool(soup.find(['div', 'nav'], class_=re.compile('toc|table-of-contents', re.I)))
-        
-        paragraphs = soup.find_all('p')
-        if paragraphs:
-            total_words = sum(len(p.get_text().split()) for p in paragraphs)
-            avg_para_length = total_words / len(paragraphs)
-        else:
-            avg_para_length = 0
-        
-        word_count = len(text.split())
-        
-        try:
-            # Limit text length for readability calculation to avoid timeouts
-            text_sample = text[:5000] if len(text) > 5000 else text
-            flesch_score = textstat.flesch_reading_ease(text_sample)
-        except Exception:
-            flesch_score = 0
-        
-        return {
-            'has_tldr': has_tldr,
-            'has_toc': has_toc,
-            'avg_para_length': round(avg_para_length, 1),
-            'word_count': word_count,
-            'flesch_reading_ease': round(flesch_score, 1)
-        }
-    except Exception as e:
-        # Return default values if analysis fails
-        return {
-            'has_tldr': False,
-            'has_toc': False,
-            'avg_para_length': 0,
-            'word_count': 0,
-            'flesch_reading_ease': 0
-        }
-
-def analyze_entities(soup):
-    """Basic entity extraction with performance optimization"""
-    try:
-        text = soup.get_text()
-        # Limit text processing to avoid timeout on very large pages
-        text_sample = text[:10000] if len(text) > 10000 else text
-        words = re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\b', text_sample)
-        entities = list(set(words))
-        entities_found = len(entities)
-        
-        return {
-            'entities_found': entities_found,
-            'entity_examples': entities[:10]
-        }
-    except Exception:
-        return {
-            'entities_found': 0,
-            'entity_examples': []
-        }
-
-def analyze_eeat(soup, url):
-    """Analyze E-E-A-T signals"""
-    author_meta = soup.find('meta', attrs={'name': re.compile('author', re.I)})
-    has_author_meta = bool(author_meta)
-    
-    date_meta = soup.find('meta', attrs={'property': re.compile('published', re.I)})
-    has_date = bool(date_meta)
-    
-    has_author_bio = bool(soup.find(['div', 'section'], class_=re.compile('author|bio', re.I)))
-    
-    links = soup.find_all('a', href=True)
-    has_about_link = any('about' in link['href'].lower() for link in links)
-    has_contact_link = any('contact' in link['href'].lower() for link in links)
-    
-    has_sources = bool(soup.find(['div', 'section'], class_=re.compile('reference|source|citation', re.I)))
-    
-    return {
-        'has_author_meta': has_author_meta,
-        'has_date': has_date,
-        'has_author_bio': has_author_bio,
-        'has_about_link': has_about_link,
-        'has_contact_link': has_contact_link,
-        'has_sources': has_sources
-    }
-
-def calculate_score_breakdown(data):
-    """Calculate detailed score breakdown by component"""
-    breakdown = {}
-    
-    schema_score = 0
-    if data['schema']['faq_present']:
-        schema_score += 10
-    if data['schema']['howto_present']:
-        schema_score += 10
-    if data['schema']['article_present']:
-        schema_score += 5
-    breakdown['schema'] = {'score': schema_score, 'max': 25}
-    
-    question_score = min(data['questions']['question_headings'] * 4, 20)
-    breakdown['questions'] = {'score': question_score, 'max': 20}
-    
-    snippet_score = data['snippet']['snippet_score'] * 0.2
-    breakdown['snippet'] = {'score': round(snippet_score, 1), 'max': 20}
-    
-    structure_score = 0
-    if data['structure']['has_tldr']:
-        structure_score += 5
-    if data['structure']['has_toc']:
-        structure_score += 5
-    if data['structure']['flesch_reading_ease'] >= 60:
-        structure_score += 5
-    breakdown['structure'] = {'score': structure_score, 'max': 15}
-    
-    eeat_score = sum([
-        data['eeat']['has_author_meta'],
-        data['eeat']['has_date'],
-        data['eeat']['has_author_bio'],
-        data['eeat']['has_sources']
-    ]) * 2.5
-    breakdown['eeat'] = {'score': eeat_score, 'max': 10}
-    
-    entity_score = 0
-    if data['entities']['entities_found'] > 10:
-        entity_score = 10
-    elif data['entities']['entities_found'] > 5:
-        entity_score = 5
-    breakdown['entities'] = {'score': entity_score, 'max': 10}
-    
-    total_score = sum(item['score'] for item in breakdown.values())
-    
-    return {
-        'breakdown': breakdown,
-        'total': min(round(total_score), 100)
-    }
-
-def calculate_engine_scores(data):
-    """Calculate scores for different AI engines"""
-    base_breakdown = calculate_score_breakdown(data)
-    
-    engines = {
-        'ChatGPT': {
-            'weights': {
-                'schema': 1.2,
-                'questions': 1.1,
-                'snippet': 1.0,
-                'structure': 1.3,
-                'eeat': 0.9,
-                'entities': 1.0
-            },
-            'focus': 'Prioritizes conversational structure and clear formatting'
-        },
-        'Claude': {
-            'weights': {
-                'schema': 1.0,
-                'questions': 1.2,
-                'snippet': 1.0,
-                'structure': 1.4,
-                'eeat': 1.3,
-                'entities': 1.1
-            },
-            'focus': 'Emphasizes content quality, trustworthiness, and natural language'
-        },
-        'Gemini': {
-            'weights': {
-                'schema': 1.3,
-                'questions': 1.0,
-                'snippet': 1.2,
-                'structure': 1.0,
-                'eeat': 1.0,
-                'entities': 1.2
-            },
-            'focus': 'Strong preference for structured data and entities'
-        },
-        'Perplexity': {
-            'weights': {
-                'schema': 1.1,
-                'questions': 1.3,
-                'snippet': 1.2,
-                'structure': 1.0,
-                'eeat': 1.2,
-                'entities': 1.0
-            },
-            'focus': 'Optimized for direct answers and source attribution'
-        }
-    }
-    
-    engine_scores = {}
-    
-    for engine_name, config in engines.items():
-        weighted_score = 0
-        total_weight = 0
-        
-        for component, values in base_breakdown['breakdown'].items():
-            weight = config['weights'].get(component, 1.0)
-            weighted_score += (values['score'] / values['max']) * values['max'] * weight
-            total_weight += values['max'] * weight
-        
-        normalized_score = (weighted_score / total_weight) * 100
-        engine_scores[engine_name] = {
-            'score': min(round(normalized_score, 1), 100),
-            'focus': config['focus']
-        }
-    
-    return engine_scores
-
-def generate_prioritized_recommendations(data):
-    """Generate comprehensive recommendations with priority levels and detailed implementation steps"""
-    recommendations = []
-    
-    # HIGH PRIORITY - Critical for AEO Success
-    
-    # Schema Markup - FAQ
-    if not data['schema']['faq_present']:
-        recommendations.append({
-            'priority': 'HIGH',
-            'category': 'Schema Markup',
-            'action': "Implement FAQ Schema Markup",
-            'impact': 'Critical for appearing in "People Also Ask" boxes and AI answer engines. FAQ schema allows AI to extract Q&A directly.',
-            'effort': 'Medium',
-            'steps': [
-                '1. Identify 3-5 common questions your page answers',
-                '2. Format them as clear question-answer pairs',
-                '3. Add JSON-LD FAQ schema to your page <head> or body',
-                '4. Test with Google Rich Results Test tool',
-                '5. Example: Use schema.org/FAQPage format'
-            ],
-            'example': '''<script type="application/ld+json">
-{
-  "@context": "https://schema.org",
-  "@type": "FAQPage",
-  "mainEntity": [{
-    "@type": "Question",
-    "name": "Your question here?",
-    "acceptedAnswer": {
-      "@type": "Answer",
-      "text": "Your answer here"
-    }
-  }]
-}</script>'''
-        })
-    
-    # Question Headings
-    if data['questions']['question_headings'] < 3:
-        current_count = data['questions']['question_headings']
-        recommendations.append({
-            'priority': 'HIGH',
-            'category': 'Content Structure',
-            'action': f"Add More Question-Based Headings (Currently: {current_count}, Target: 5+)",
-            'impact': 'Question headings are how AI engines understand what your content answers. Conversational AI searches heavily rely on question-format queries.',
-            'effort': 'Low',
-            'steps': [
-                '1. List the top questions your target audience asks',
-                '2. Restructure existing sections into question format',
-                '3. Use H2 or H3 tags for questions (e.g., "What is X?", "How does Y work?")',
-                '4. Provide clear, concise answers immediately after each question',
-                '5. Front-load the answer in the first 1-2 sentences'
-            ],
-            'example': '''Good: <h2>What is Answer Engine Optimization?</h2>
-Bad: <h2>Introduction to AEO</h2>
-
-Good: <h2>How Do I Optimize for ChatGPT?</h2>
-Bad: <h2>ChatGPT Optimization Techniques</h2>'''
-        })
-    
-    # First Paragraph Optimization
-    if data['snippet']['first_para_words'] < 40:
-        recommendations.append({
-            'priority': 'HIGH',
-            'category': 'Snippet Optimization',
-            'action': f"Expand First Paragraph (Currently: {data['snippet']['first_para_words']} words, Target: 40-60)",
-            'impact': 'AI engines prioritize the opening paragraph. Too short = not enough context. The 40-60 word range is optimal for featured snippets.',
-            'effort': 'Low',
-            'steps': [
-                '1. Start with a direct answer to the main question',
-                '2. Add 1-2 sentences of essential context',
-                '3. Include the primary keyword naturally',
-                '4. Aim for exactly 40-60 words',
-                '5. Make it self-contained (understandable without reading further)'
-            ],
-            'example': '''Good (52 words): "Answer Engine Optimization (AEO) is the practice of optimizing content to be easily discovered and cited by AI-powered search engines like ChatGPT, Claude, and Perplexity. Unlike traditional SEO which focuses on ranking in search results, AEO ensures your content is selected as the authoritative answer that AI systems reference when responding to user queries."'''
-        })
-    elif data['snippet']['first_para_words'] > 60:
-        recommendations.append({
-            'priority': 'HIGH',
-            'category': 'Snippet Optimization',
-            'action': f"Shorten First Paragraph (Currently: {data['snippet']['first_para_words']} words, Target: 40-60)",
-            'impact': 'First paragraphs longer than 60 words are less likely to be used as featured snippets. AI engines prefer concise, direct answers.',
-            'effort': 'Low',
-            'steps': [
-                '1. Identify the core answer in your opening',
-                '2. Remove redundant phrases and fluff',
-                '3. Move supporting details to the second paragraph',
-                '4. Keep only essential context',
-                '5. Recount words to hit 40-60 target'
-            ],
-            'example': '''Before (78 words): "In this comprehensive guide, we will explore the fascinating world of Answer Engine Optimization, which is becoming increasingly important in today's digital landscape. AEO represents a paradigm shift from traditional SEO practices, and understanding it is crucial for content creators and marketers who want to succeed in an AI-driven future..."
-
-After (48 words): "Answer Engine Optimization (AEO) optimizes content for AI search engines like ChatGPT and Perplexity. Unlike traditional SEO that focuses on rankings, AEO ensures AI systems cite your content as authoritative answers to user queries."'''
-        })
-    
-    # Lists and Tables
-    if data['snippet']['lists'] == 0:
-        recommendations.append({
-            'priority': 'HIGH',
-            'category': 'Content Format',
-            'action': "Add Bulleted or Numbered Lists",
-            'impact': 'Lists are extremely easy for AI to parse and extract. They increase snippet visibility by 300% and are preferred for step-by-step answers.',
-            'effort': 'Low',
-            'steps': [
-                '1. Identify any sequences, steps, or related items in your content',
-                '2. Convert paragraph-format lists into bullet points or numbered lists',
-                '3. Use numbered lists for sequential steps or rankings',
-                '4. Use bullet points for non-sequential items or features',
-                '5. Keep each list item to 1-2 sentences maximum',
-                '6. Aim for 3-7 items per list (optimal for readability)'
-            ],
-            'example': '''Before: "The benefits include improved visibility, better user engagement, and increased authority."
-
-After: 
-• Improved visibility in AI search results
-• Better user engagement through clear answers
-• Increased authority and citation frequency'''
-        })
-    
-    # MEDIUM PRIORITY - Important for Better Performance
-    
-    # E-E-A-T - Author
-    if not data['eeat']['has_author_meta']:
-        recommendations.append({
-            'priority': 'MEDIUM',
-            'category': 'E-E-A-T',
-            'action': "Add Author Metadata and Credentials",
-            'impact': 'Claude and Perplexity heavily weight author credibility. Author info increases trust signals by 40% and is critical for YMYL (Your Money Your Life) content.',
-            'effort': 'Low',
-            'steps': [
-                '1. Add author meta tag: <meta name="author" content="Author Name">',
-                '2. Include author byline at top of article with credentials',
-                '3. Link to author bio page or LinkedIn profile',
-                '4. Add author schema markup with expertise details',
-                '5. Include author photo for additional trust'
-            ],
-            'example': '''<meta name="author" content="Dr. Jane Smith">
-
-<script type="application/ld+json">
-{
-  "@context": "https://schema.org",
-  "@type": "Article",
-  "author": {
-    "@type": "Person",
-    "name": "Dr. Jane Smith",
-    "jobTitle": "AI Research Scientist",
-    "url": "https://example.com/author/jane-smith"
-  }
-}</script>'''
-        })
-    
-    # Publication Date
-    if not data['eeat']['has_date']:
-        recommendations.append({
-            'priority': 'MEDIUM',
-            'category': 'E-E-A-T',
-            'action': "Add Publication and Update Dates",
-            'impact': 'AI engines prefer recent content. Dates signal freshness and help AI determine if information is current or outdated.',
-            'effort': 'Low',
-            'steps': [
-                '1. Add meta tag: <meta property="article:published_time" content="2024-01-15">',
-                '2. Display publication date visibly on page',
-                '3. Add "Last Updated" date if content is refreshed',
-                '4. Include datePublished and dateModified in Article schema',
-                '5. Keep content updated and reflect changes in dates'
-            ],
-            'example': '''<meta property="article:published_time" content="2024-01-15T10:00:00Z">
-<meta property="article:modified_time" content="2024-03-20T14:30:00Z">
-
-Published: January 15, 2024 | Last Updated: March 20, 2024'''
-        })
-    
-    # HowTo Schema
-    if not data['schema']['howto_present'] and data['questions']['question_headings'] > 0:
-        recommendations.append({
-            'priority': 'MEDIUM',
-            'category': 'Schema Markup',
-            'action': "Implement HowTo Schema for Process Content",
-            'impact': 'HowTo schema is perfect for instructional content. It enables step-by-step extraction and increases visibility for "how to" queries by 250%.',
-            'effort': 'Medium',
-            'steps': [
-                '1. Identify if your content includes a process or tutorial',
-                '2. Break the process into clear, sequential steps',
-                '3. Add HowTo schema with each step defined',
-                '4. Include tools/materials needed if applicable',
-                '5. Estimate total time for completion',
-                '6. Test with Google Rich Results Test'
-            ],
-            'example': '''<script type="application/ld+json">
-{
-  "@context": "https://schema.org",
-  "@type": "HowTo",
-  "name": "How to Optimize Content for AEO",
-  "step": [{
-    "@type": "HowToStep",
-    "name": "Add Question Headings",
-    "text": "Restructure your headings as questions..."
-  }, {
-    "@type": "HowToStep",
-    "name": "Implement Schema Markup",
-    "text": "Add FAQ or HowTo schema to your page..."
-  }]
-}</script>'''
-        })
-    
-    # TL;DR
-    if not data['structure']['has_tldr']:
-        recommendations.append({
-            'priority': 'MEDIUM',
-            'category': 'Content Structure',
-            'action': "Add TL;DR or Executive Summary",
-            'impact': 'A summary section provides AI engines with a quick extraction point. It increases the likelihood of being cited by 180%.',
-            'effort': 'Medium',
-            'steps': [
-                '1. Add a "TL;DR" or "Key Takeaways" section at the top',
-                '2. Summarize main points in 3-5 bullet points',
-                '3. Each point should be one sentence',
-                '4. Place it immediately after the introduction',
-                '5. Use bold formatting: <strong>TL;DR:</strong>',
-                '6. Make it scannable and self-contained'
-            ],
-            'example': '''<strong>TL;DR:</strong>
-• AEO optimizes content for AI search engines like ChatGPT and Claude
-• Focus on question-based headings, structured data, and concise answers
-• Schema markup (FAQ, HowTo) increases AI citation by 250%
-• First paragraph should be 40-60 words for optimal snippet performance'''
-        })
-    
-    # Tables
-    if data['snippet']['tables'] == 0 and data['structure']['word_count'] > 500:
-        recommendations.append({
-            'priority': 'MEDIUM',
-            'category': 'Content Format',
-            'action': "Add Comparison Tables or Data Tables",
-            'impact': 'Tables are excellent for structured data extraction. AI engines can easily parse and cite table data. Especially effective for comparisons and specifications.',
-            'effort': 'Medium',
-            'steps': [
-                '1. Identify data that can be presented in table format',
-                '2. Common table types: comparisons, features, pricing, specifications',
-                '3. Use proper HTML table structure with <thead> and <tbody>',
-                '4. Include clear column headers',
-                '5. Keep tables simple (3-5 columns max for readability)',
-                '6. Add table caption for context'
-            ],
-            'example': '''<table>
-  <caption>AEO vs Traditional SEO</caption>
-  <thead>
-    <tr>
-      <th>Aspect</th>
-      <th>Traditional SEO</th>
-      <th>AEO</th>
-    </tr>
-  </thead>
-  <tbody>
-    <tr>
-      <td>Goal</td>
-      <td>Rank in search results</td>
-      <td>Be cited by AI engines</td>
-    </tr>
-    <tr>
-      <td>Focus</td>
-      <td>Keywords & backlinks</td>
-      <td>Direct answers & structure</td>
-    </tr>
-  </tbody>
-</table>'''
-        })
-    
-    # Article Schema
-    if not data['schema']['article_present'] and data['structure']['word_count'] > 300:
-        recommendations.append({
-            'priority': 'MEDIUM',
-            'category': 'Schema Markup',
-            'action': "Add Article Schema Markup",
-            'impact': 'Article schema provides essential metadata that AI engines use to understand and categorize your content.',
-            'effort': 'Low',
-            'steps': [
-                '1. Determine article type (Article, BlogPosting, NewsArticle)',
-                '2. Add JSON-LD with headline, description, author, date',
-                '3. Include image URL if available',
-                '4. Add publisher information',
-                '5. Test with Google Rich Results Test'
-            ],
-            'example': '''<script type="application/ld+json">
-{
-  "@context": "https://schema.org",
-  "@type": "Article",
-  "headline": "Complete Guide to AEO",
-  "description": "Learn how to optimize content for AI engines",
-  "author": {
-    "@type": "Person",
-    "name": "Jane Smith"
-  },
-  "datePublished": "2024-01-15"
-}</script>'''
-        })
-    
-    # Author Bio
-    if not data['eeat']['has_author_bio'] and data['eeat']['has_author_meta']:
-        recommendations.append({
-            'priority': 'MEDIUM',
-            'category': 'E-E-A-T',
-            'action': "Create Author Bio Section",
-            'impact': 'An author bio establishes expertise and builds trust. Critical for Claude which emphasizes author credibility.',
-            'effort': 'Low',
-            'steps': [
-                '1. Add author bio section at end of article',
-                '2. Include 2-3 sentences about author expertise',
-                '3. Mention relevant credentials, experience, or achievements',
-                '4. Add link to full author profile or LinkedIn',
-                '5. Include professional headshot if possible'
-            ],
-            'example': '''<div class="author-bio">
-  <h3>About the Author</h3>
-  <p><strong>Dr. Jane Smith</strong> is an AI Research Scientist with 10 years of experience in natural language processing. She has published 15 peer-reviewed papers on semantic search and advises Fortune 500 companies on AI strategy.</p>
-  <a href="/author/jane-smith">View full profile</a>
-</div>'''
-        })
-    
-    # LOW PRIORITY - Nice to Have
-    
-    # Readability
-    if data['structure']['flesch_reading_ease'] < 60:
-        recommendations.append({
-            'priority': 'LOW',
-            'category': 'Readability',
-            'action': f"Improve Readability Score (Current: {data['structure']['flesch_reading_ease']}, Target: 60+)",
-            'impact': 'Higher readability scores mean AI engines can better understand and extract your content. Aim for 8th-9th grade reading level.',
-            'effort': 'High',
-            'steps': [
-                '1. Use shorter sentences (15-20 words average)',
-                '2. Replace complex words with simpler alternatives',
-                '3. Break up long paragraphs (3-4 sentences max)',
-                '4. Use active voice instead of passive voice',
-                '5. Add transition words for flow',
-                '6. Test with Hemingway Editor or similar tools'
-            ],
-            'example': '''Before: "The implementation of Answer Engine Optimization methodologies necessitates a comprehensive understanding of the algorithmic processes utilized by contemporary AI-powered search infrastructures."
-
-After: "To optimize for answer engines, you need to understand how modern AI search systems work."'''
-        })
-    
-    # Paragraph Length
-    if data['structure']['avg_para_length'] > 100:
-        recommendations.append({
-            'priority': 'LOW',
-            'category': 'Readability',
-            'action': f"Shorten Paragraphs (Current avg: {data['structure']['avg_para_length']} words, Target: 50-75)",
-            'impact': 'Shorter paragraphs improve scannability and make it easier for AI to identify discrete concepts and extract answers.',
-            'effort': 'Medium',
-            'steps': [
-                '1. Aim for 2-4 sentences per paragraph',
-                '2. One main idea per paragraph',
-                '3. Use paragraph breaks for better visual flow',
-                '4. Split long paragraphs at natural transition points',
-                '5. Keep most paragraphs under 75 words'
-            ],
-            'example': '''Before: One long 150-word paragraph covering multiple ideas.
-
-After: 
-Split into 3 shorter paragraphs:
-- Paragraph 1: Introduce main concept (50 words)
-- Paragraph 2: Explain benefits (60 words)  
-- Paragraph 3: Provide example (55 words)'''
-        })
-    
-    # Entities
-    if data['entities']['entities_found'] < 10:
-        recommendations.append({
-            'priority': 'LOW',
-            'category': 'Semantic SEO',
-            'action': f"Increase Entity Mentions (Current: {data['entities']['entities_found']}, Target: 15+)",
-            'impact': 'Entities (proper nouns, brands, people, places) help AI engines understand topic context. Gemini particularly relies on entity recognition.',
-            'effort': 'High',
-            'steps': [
-                '1. Mention relevant brands, products, or companies',
-                '2. Reference industry experts or thought leaders',
-                '3. Include specific tools, technologies, or methodologies by name',
-                '4. Add geographic locations if relevant',
-                '5. Use full names on first mention, then abbreviations',
-                '6. Link to authoritative sources about these entities'
-            ],
-            'example': '''Weak: "Many search engines use AI technology."
-
-Strong: "Google's Bard, OpenAI's ChatGPT, Anthropic's Claude, and Perplexity AI all use large language models (LLMs) based on transformer architecture developed by researchers at Google Brain."'''
-        })
-    
-    # Sources
-    if not data['eeat']['has_sources']:
-        recommendations.append({
-            'priority': 'LOW',
-            'category': 'E-E-A-T',
-            'action': "Add Citations and References Section",
-            'impact': 'External citations demonstrate research depth and build credibility. Perplexity specifically values source attribution.',
-            'effort': 'Medium',
-            'steps': [
-                '1. Add "References" or "Sources" section at article end',
-                '2. Cite authoritative sources (academic papers, industry reports)',
-                '3. Use inline citations or numbered references',
-                '4. Link to original sources',
-                '5. Prefer .edu, .gov, and reputable industry sites',
-                '6. Include publication dates for sources'
-            ],
-            'example': '''<section class="references">
-  <h2>References</h2>
-  <ol>
-    <li>Smith, J. (2023). "The Future of Search: AI and Semantic Understanding." Journal of Information Science. <a href="#">Link</a></li>
-    <li>OpenAI Research Team. (2024). "GPT-4 Technical Report." OpenAI. <a href="#">Link</a></li>
-  </ol>
-</section>'''
-        })
-    
-    # Table of Contents
-    if not data['structure']['has_toc'] and data['structure']['word_count'] > 1500:
-        recommendations.append({
-            'priority': 'LOW',
-            'category': 'Navigation',
-            'action': "Add Table of Contents",
-            'impact': 'A table of contents helps AI understand content structure and improves user navigation. Especially valuable for long-form content.',
-            'effort': 'Low',
-            'steps': [
-                '1. Create TOC for articles over 1500 words',
-                '2. List all H2 and major H3 headings',
-                '3. Use jump links (anchor tags) to sections',
-                '4. Place TOC after introduction',
-                '5. Consider sticky TOC for long articles',
-                '6. Use semantic HTML: <nav> tag with aria-label="Table of Contents"'
-            ],
-            'example': '''<nav aria-label="Table of Contents">
-  <h2>Table of Contents</h2>
-  <ul>
-    <li><a href="#what-is-aeo">What is AEO?</a></li>
-    <li><a href="#why-matters">Why AEO Matters</a></li>
-    <li><a href="#implementation">How to Implement</a></li>
-    <li><a href="#best-practices">Best Practices</a></li>
-  </ul>
-</nav>'''
-        })
-    
-    # Internal Linking
-    if data['structure']['word_count'] > 500:
-        recommendations.append({
-            'priority': 'LOW',
-            'category': 'Content Structure',
-            'action': "Add Strategic Internal Links",
-            'impact': 'Internal links help AI understand content relationships and site structure. They also guide users to related information.',
-            'effort': 'Low',
-            'steps': [
-                '1. Link to 3-5 related articles on your site',
-                '2. Use descriptive anchor text (not "click here")',
-                '3. Link to deeper explanation of concepts mentioned',
-                '4. Add links naturally within content flow',
-                '5. Link to authoritative external sources when appropriate',
-                '6. Ensure all links open in new tab for external sites'
-            ],
-            'example': '''Learn more about <a href="/semantic-seo-guide">semantic SEO strategies</a> to complement your AEO efforts.
-
-For a deeper dive into structured data, see our complete <a href="/schema-markup-tutorial">schema markup tutorial</a>.'''
-        })
-    
-    # Word Count
-    if data['structure']['word_count'] < 500:
-        recommendations.append({
-            'priority': 'LOW',
-            'category': 'Content Depth',
-            'action': f"Expand Content Depth (Current: {data['structure']['word_count']} words, Target: 800+)",
-            'impact': 'Longer, comprehensive content tends to perform better with AI engines. Aim for 800-2000 words for most topics.',
-            'effort': 'High',
-            'steps': [
-                '1. Add more detailed explanations of key concepts',
-                '2. Include examples and use cases',
-                '3. Address related questions and subtopics',
-                '4. Add a "Common Questions" or FAQ section',
-                '5. Provide step-by-step instructions where applicable',
-                '6. Include expert insights or quotes'
-            ],
-            'example': '''Expand from basic definition to include:
-• What it is (100 words)
-• Why it matters (150 words)
-• How it works (200 words)
-• Implementation steps (250 words)
-• Examples (150 words)
-• Common mistakes (100 words)
-• Resources (50 words)
-Total: ~1000 words'''
-        })
-    
-    # Contact Link
-    if not data['eeat']['has_contact_link']:
-        recommendations.append({
-            'priority': 'LOW',
-            'category': 'E-E-A-T',
-            'action': "Add Contact Page Link",
-            'impact': 'A visible contact link builds trust and credibility. Shows you stand behind your content.',
-            'effort': 'Low',
-            'steps': [
-                '1. Add contact link in header or footer navigation',
-                '2. Create dedicated contact page with form or email',
-                '3. Include social media profiles',
-                '4. Add physical address if you have a business location',
-                '5. Ensure contact page is linked from every article'
-            ],
-            'example': '''<footer>
-  <nav>
-    <a href="/about">About</a>
-    <a href="/contact">Contact</a>
-    <a href="/privacy">Privacy</a>
-  </nav>
-</footer>'''
-        })
-    
-    priority_order = {'HIGH': 0, 'MEDIUM': 1, 'LOW': 2}
-    recommendations.sort(key=lambda x: priority_order[x['priority']])
-    
-    return recommendations
+start_readability_warmup()
 
 # Main App
 st.markdown('<p class="main-header">🎯 AEO On-Page Auditor</p>', unsafe_allow_html=True)
@@ -970,7 +211,7 @@ with st.expander("⚠️ Having timeout issues? Click here"):
     **🖥️ To run locally (no timeouts):**
     ```bash
     # Install dependencies
-    pip install streamlit requests beautifulsoup4 textstat pandas plotly
+    pip install streamlit requests beautifulsoup4 pyphen pandas plotly
     
     # Run the app
     streamlit run app.py
@@ -981,6 +222,184 @@ with st.expander("⚠️ Having timeout issues? Click here"):
     **❌ May timeout on Cloud:** Heavy JavaScript sites, sites with bot protection, very slow servers
     """)
 
+def render_single_page_results(url, audit, source):
+    """Render a stored single-page audit; runs on every rerun, so it must not fetch or analyze"""
+    result = audit['result']
+    schema_data = result['schema']
+    question_data = result['questions']
+    snippet_data = result['snippet']
+    structure_data = result['structure']
+    eeat_data = result['eeat']
+    entity_data = result['entities']
+    
+    score_breakdown = audit['score_breakdown']
+    engine_scores = audit['engine_scores']
+    recommendations = audit['recommendations']
+    
+    # Display Results
+    st.success(f"✅ Analysis complete for: {url}")
+    if source in ('memory', 'history'):
+        st.caption("♻️ Page content is unchanged since it was last audited, so the stored results were reused. Tick **Force refresh** to re-run the audit.")
+    elif source == 'rescored':
+        st.caption("♻️ Page content is unchanged since it was last audited, so the stored analysis was reused and only the scores were recalculated with the current scoring rules.")
+    if result.get('truncated'):
+        st.warning(TRUNCATION_NOTES[result['truncated']])
+    if result.get('content_scope'):
+        st.caption(CONTENT_SCOPE_NOTES[result['content_scope']])
+    
+    # Overall Score
+    aeo_score = score_breakdown['total']
+    score_class = "score-high" if aeo_score >= 80 else "score-medium" if aeo_score >= 60 else "score-low"
+    
+    st.markdown(f"""
+    <div class="score-card {score_class}">
+        <h2>Overall AEO Score</h2>
+        <h1 style="font-size: 4rem; margin: 1rem 0;">{aeo_score}</h1>
+        <p>out of 100</p>
+    </div>
+    """, unsafe_allow_html=True)
+    
+    # Quick Checks
+    st.subheader("✓ Quick Checks")
+    col1, col2, col3 = st.columns(3)
+    
+    checks = {
+        'FAQ Schema': schema_data['faq_present'],
+        'HowTo Schema': schema_data['howto_present'],
+        'Question Headings': question_data['question_headings'] >= 3,
+        'Snippet Ready': snippet_data['snippet_score'] >= 50,
+        'Has TL;DR': structure_data['has_tldr'],
+        'Good Readability': structure_data['flesch_reading_ease'] >= 60,
+        'Author Info': eeat_data['has_author_meta']
+    }
+    
+    for i, (check, passed) in enumerate(checks.items()):
+        col = [col1, col2, col3][i % 3]
+        icon = "✅" if passed else "❌"
+        col.metric(check, icon)
+    
+    # Engine Scores
+    st.subheader("🤖 Score by Answer Engine")
+    st.markdown("Different AI engines prioritize different content factors.")
+    
+    cols = st.columns(2)
+    for i, (engine, data) in enumerate(engine_scores.items()):
+        with cols[i % 2]:
+            score = data['score']
+            st.metric(engine, f"{score}/100")
+            st.caption(data['focus'])
+            st.progress(score / 100)
+    
+    # Score Breakdown
+    st.subheader("📊 Score Breakdown by Component")
+    
+    component_names = {
+        'schema': 'Schema Markup',
+        'questions': 'Question Content',
+        'snippet': 'Snippet Optimization',
+        'structure': 'Content Structure',
+        'eeat': 'E-E-A-T Signals',
+        'entities': 'Entity Recognition'
+    }
+    
+    for component, values in score_breakdown['breakdown'].items():
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            st.write(f"**{component_names[component]}**")
+            st.progress(values['score'] / values['max'])
+        with col2:
+            st.write(f"{values['score']}/{values['max']}")
+    
+    # Prioritized Recommendations
+    st.subheader("⚠️ Prioritized Recommendations")
+    st.markdown(f"**{len(recommendations)} actionable improvements identified**")
+    
+    # Priority filter
+    priority_filter = st.radio(
+        "Filter by priority:",
+        ["All", "HIGH", "MEDIUM", "LOW"],
+        horizontal=True,
+        key="priority_filter"
+    )
+    
+    filtered_recs = recommendations if priority_filter == "All" else [r for r in recommendations if r['priority'] == priority_filter]
+    
+    for i, rec in enumerate(filtered_recs):
+        priority_class = f"priority-{rec['priority'].lower()}"
+    
+        with st.expander(f"{'🔴' if rec['priority'] == 'HIGH' else '🟡' if rec['priority'] == 'MEDIUM' else '🔵'} **{rec['action']}**", expanded=(i < 3)):
+            col1, col2 = st.columns([2, 1])
+    
+            with col1:
+                st.markdown(f"**Priority:** {rec['priority']}")
+                st.markdown(f"**Category:** {rec['category']}")
+                st.markdown(f"**Effort:** {rec['effort']}")
+    
+            with col2:
+                pass
+    
+            st.markdown("---")
+            st.markdown(f"**💡 Why This Matters:**")
+            st.info(rec['impact'])
+    
+            if 'steps' in rec:
+                st.markdown("**📋 Implementation Steps:**")
+                for step in rec['steps']:
+                    st.markdown(step)
+    
+            if 'example' in rec:
+                st.markdown("**📝 Code Example:**")
+                st.code(rec['example'], language='html')
+    
+    # Detailed Metrics
+    st.subheader("📋 Detailed Metrics")
+    
+    tab1, tab2, tab3, tab4 = st.tabs(["Schema", "Snippet", "Structure", "E-E-A-T"])
+    
+    with tab1:
+        st.write(f"**FAQ Schema:** {'Yes (' + str(schema_data['faq_count']) + ' items)' if schema_data['faq_present'] else 'No'}")
+        st.write(f"**HowTo Schema:** {'Yes (' + str(schema_data['howto_count']) + ' steps)' if schema_data['howto_present'] else 'No'}")
+        st.write(f"**Article Schema:** {'Yes' if schema_data['article_present'] else 'No'}")
+        if schema_data.get('schema_types'):
+            st.write("**Schema Types:** " + ", ".join(f"{t['type']} ({t['count']})" for t in schema_data['schema_types']))
+    
+    with tab2:
+        st.write(f"**First Paragraph:** {snippet_data['first_para_words']} words")
+        st.write(f"**Lists:** {snippet_data['lists']}")
+        st.write(f"**Tables:** {snippet_data['tables']}")
+        st.write(f"**Snippet Score:** {snippet_data['snippet_score']}/100")
+    
+    with tab3:
+        st.write(f"**Word Count:** {structure_data['word_count']}")
+        st.write(f"**Question Headings:** {question_data['question_headings']}/{question_data['total_headings']}")
+        st.write(f"**Readability Score:** {structure_data['flesch_reading_ease']}")
+        st.write(f"**Has TL;DR:** {'Yes' if structure_data['has_tldr'] else 'No'}")
+    
+        if len(structure_data['readability_sections']) > 1:
+            import pandas as pd
+            st.write("**Readability by Section:**")
+            st.dataframe(pd.DataFrame([
+                {'Section': section['heading'] or '(before first heading)', 'Words': section['word_count'], 'Readability': section['flesch_reading_ease']}
+                for section in structure_data['readability_sections']
+            ]), hide_index=True, use_container_width=True)
+    
+        if question_data['question_heading_examples']:
+            st.write("**Question Headings Found:**")
+            for q in question_data['question_heading_examples']:
+                st.write(f"- {q}")
+    
+        if entity_data['top_entities']:
+            st.write("**Top Entities:** " + ", ".join(f"{e['entity']} ({e['count']})" for e in entity_data['top_entities'][:10]))
+    
+    with tab4:
+        st.write(f"**Author Meta:** {'Yes' if eeat_data['has_author_meta'] else 'No'}")
+        st.write(f"**Publication Date:** {'Yes' if eeat_data['has_date'] else 'No'}")
+        st.write(f"**Author Bio:** {'Yes' if eeat_data['has_author_bio'] else 'No'}")
+        st.write(f"**Sources/References:** {'Yes' if eeat_data['has_sources'] else 'No'}")
+    
+    render_performance(result.get('perf'))
+
+
 # Tabs for single vs comparison analysis
 tab1, tab2 = st.tabs(["📄 Single Page Analysis", "⚔️ Competitive Comparison"])
 
@@ -996,17 +415,34 @@ with tab1:
     with col2:
         test_btn = st.button("🔗 Test Connection", use_container_width=True, key="test_connection")
     
+    force_refresh = st.checkbox("🔄 Force refresh (ignore cached pages and results)", key="force_refresh")
+    
     # Test connection feature
     if test_btn and url:
         with st.spinner("Testing connection..."):
             try:
-                import time
-                start_time = time.time()
-                html = fetch_page(url)
-                elapsed = time.time() - start_time
+                timer = StageTimer()
+                fetched = fetch_document(url, timer=timer)
+                perf = timer.to_dict()
+                elapsed = perf['total_ms'] / 1000
+                
+                cache_labels = {
+                    'hit': 'served from cache (still fresh, no request sent)',
+                    'revalidated': 'unchanged since last fetch (304), served from cache',
+                    'miss': 'downloaded in full'
+                }
+                cache_stats = get_http_cache().stats()
                 
                 st.success(f"✅ Connection successful! ({elapsed:.2f}s)")
-                st.info(f"📄 Page size: {len(html):,} characters\n\n🌐 Server responded in {elapsed:.2f} seconds")
+                st.info(f"📄 Page size: {len(fetched['body']):,} bytes, read as {fetched['encoding']} ({ENCODING_SOURCE_LABELS[fetched['encoding_source']]})\n\n🌐 Server responded in {elapsed:.2f} seconds\n\n🗄️ HTTP cache: {cache_labels[fetched['cache']]}")
+                st.caption(
+                    f"Cache since app start: {cache_stats['hits']} hits · {cache_stats['revalidated']} revalidated · "
+                    f"{cache_stats['misses']} misses · {cache_stats['entries']} pages stored ({cache_stats['bytes'] / 1024 / 1024:.1f} MB)"
+                )
+                
+                if fetched['truncated']:
+                    st.warning(TRUNCATION_NOTES[fetched['truncated']])
+                render_performance(perf)
                 
                 if elapsed > 10:
                     st.warning("⚠️ This website is slow to respond. Analysis may take longer or timeout on Streamlit Cloud.")
@@ -1015,182 +451,34 @@ with tab1:
                 st.error(f"❌ Connection failed: {str(e)}")
                 st.info("💡 This URL will likely fail during full analysis. Try a different URL or run locally.")
 
+    # Audits live in session state keyed by URL, so widget reruns re-render without re-fetching
+    single_audits = st.session_state.setdefault('single_audits', OrderedDict())
+    
     if analyze_btn:
         if not url:
             st.error("Please enter a URL")
-        else:
+        elif force_refresh or url not in single_audits:
             with st.spinner("Analyzing webpage... This may take 10-20 seconds."):
                 try:
                     # Fetch and analyze
-                    html = fetch_page(url)
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    schema_data = analyze_schema(soup)
-                    question_data = analyze_questions(soup)
-                    snippet_data = analyze_snippet_optimization(soup)
-                    structure_data = analyze_structure(soup)
-                    entity_data = analyze_entities(soup)
-                    eeat_data = analyze_eeat(soup, url)
-                    
-                    result = {
-                        'schema': schema_data,
-                        'questions': question_data,
-                        'snippet': snippet_data,
-                        'structure': structure_data,
-                        'entities': entity_data,
-                        'eeat': eeat_data
-                    }
-                    
-                    score_breakdown = calculate_score_breakdown(result)
-                    engine_scores = calculate_engine_scores(result)
-                    recommendations = generate_prioritized_recommendations(result)
-                    
-                    # Display Results
-                    st.success(f"✅ Analysis complete for: {url}")
-                    
-                    # Overall Score
-                    aeo_score = score_breakdown['total']
-                    score_class = "score-high" if aeo_score >= 80 else "score-medium" if aeo_score >= 60 else "score-low"
-                    
-                    st.markdown(f"""
-                    <div class="score-card {score_class}">
-                        <h2>Overall AEO Score</h2>
-                        <h1 style="font-size: 4rem; margin: 1rem 0;">{aeo_score}</h1>
-                        <p>out of 100</p>
-                    </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # Quick Checks
-                    st.subheader("✓ Quick Checks")
-                    col1, col2, col3 = st.columns(3)
-                    
-                    checks = {
-                        'FAQ Schema': schema_data['faq_present'],
-                        'HowTo Schema': schema_data['howto_present'],
-                        'Question Headings': question_data['question_headings'] >= 3,
-                        'Snippet Ready': snippet_data['snippet_score'] >= 50,
-                        'Has TL;DR': structure_data['has_tldr'],
-                        'Good Readability': structure_data['flesch_reading_ease'] >= 60,
-                        'Author Info': eeat_data['has_author_meta']
-                    }
-                    
-                    for i, (check, passed) in enumerate(checks.items()):
-                        col = [col1, col2, col3][i % 3]
-                        icon = "✅" if passed else "❌"
-                        col.metric(check, icon)
-                    
-                    # Engine Scores
-                    st.subheader("🤖 Score by Answer Engine")
-                    st.markdown("Different AI engines prioritize different content factors.")
-                    
-                    cols = st.columns(2)
-                    for i, (engine, data) in enumerate(engine_scores.items()):
-                        with cols[i % 2]:
-                            score = data['score']
-                            st.metric(engine, f"{score}/100")
-                            st.caption(data['focus'])
-                            st.progress(score / 100)
-                    
-                    # Score Breakdown
-                    st.subheader("📊 Score Breakdown by Component")
-                    
-                    component_names = {
-                        'schema': 'Schema Markup',
-                        'questions': 'Question Content',
-                        'snippet': 'Snippet Optimization',
-                        'structure': 'Content Structure',
-                        'eeat': 'E-E-A-T Signals',
-                        'entities': 'Entity Recognition'
-                    }
-                    
-                    for component, values in score_breakdown['breakdown'].items():
-                        col1, col2 = st.columns([3, 1])
-                        with col1:
-                            st.write(f"**{component_names[component]}**")
-                            st.progress(values['score'] / values['max'])
-                        with col2:
-                            st.write(f"{values['score']}/{values['max']}")
-                    
-                    # Prioritized Recommendations
-                    st.subheader("⚠️ Prioritized Recommendations")
-                    st.markdown(f"**{len(recommendations)} actionable improvements identified**")
-                    
-                    # Priority filter
-                    priority_filter = st.radio(
-                        "Filter by priority:",
-                        ["All", "HIGH", "MEDIUM", "LOW"],
-                        horizontal=True
-                    )
-                    
-                    filtered_recs = recommendations if priority_filter == "All" else [r for r in recommendations if r['priority'] == priority_filter]
-                    
-                    for i, rec in enumerate(filtered_recs):
-                        priority_class = f"priority-{rec['priority'].lower()}"
-                        
-                        with st.expander(f"{'🔴' if rec['priority'] == 'HIGH' else '🟡' if rec['priority'] == 'MEDIUM' else '🔵'} **{rec['action']}**", expanded=(i < 3)):
-                            col1, col2 = st.columns([2, 1])
-                            
-                            with col1:
-                                st.markdown(f"**Priority:** {rec['priority']}")
-                                st.markdown(f"**Category:** {rec['category']}")
-                                st.markdown(f"**Effort:** {rec['effort']}")
-                            
-                            with col2:
-                                pass
-                            
-                            st.markdown("---")
-                            st.markdown(f"**💡 Why This Matters:**")
-                            st.info(rec['impact'])
-                            
-                            if 'steps' in rec:
-                                st.markdown("**📋 Implementation Steps:**")
-                                for step in rec['steps']:
-                                    st.markdown(step)
-                            
-                            if 'example' in rec:
-                                st.markdown("**📝 Code Example:**")
-                                st.code(rec['example'], language='html')
-                    
-                    # Detailed Metrics
-                    st.subheader("📋 Detailed Metrics")
-                    
-                    tab1, tab2, tab3, tab4 = st.tabs(["Schema", "Snippet", "Structure", "E-E-A-T"])
-                    
-                    with tab1:
-                        st.write(f"**FAQ Schema:** {'Yes (' + str(schema_data['faq_count']) + ' items)' if schema_data['faq_present'] else 'No'}")
-                        st.write(f"**HowTo Schema:** {'Yes (' + str(schema_data['howto_count']) + ' steps)' if schema_data['howto_present'] else 'No'}")
-                        st.write(f"**Article Schema:** {'Yes' if schema_data['article_present'] else 'No'}")
-                    
-                    with tab2:
-                        st.write(f"**First Paragraph:** {snippet_data['first_para_words']} words")
-                        st.write(f"**Lists:** {snippet_data['lists']}")
-                        st.write(f"**Tables:** {snippet_data['tables']}")
-                        st.write(f"**Snippet Score:** {snippet_data['snippet_score']}/100")
-                    
-                    with tab3:
-                        st.write(f"**Word Count:** {structure_data['word_count']}")
-                        st.write(f"**Question Headings:** {question_data['question_headings']}/{question_data['total_headings']}")
-                        st.write(f"**Readability Score:** {structure_data['flesch_reading_ease']}")
-                        st.write(f"**Has TL;DR:** {'Yes' if structure_data['has_tldr'] else 'No'}")
-                        
-                        if question_data['question_heading_examples']:
-                            st.write("**Question Headings Found:**")
-                            for q in question_data['question_heading_examples']:
-                                st.write(f"- {q}")
-                    
-                    with tab4:
-                        st.write(f"**Author Meta:** {'Yes' if eeat_data['has_author_meta'] else 'No'}")
-                        st.write(f"**Publication Date:** {'Yes' if eeat_data['has_date'] else 'No'}")
-                        st.write(f"**Author Bio:** {'Yes' if eeat_data['has_author_bio'] else 'No'}")
-                        st.write(f"**Sources/References:** {'Yes' if eeat_data['has_sources'] else 'No'}")
+                    audit, source = audit_page(url, force_refresh)
+                    single_audits[url] = {'audit': audit, 'source': source}
+                    single_audits.move_to_end(url)
+                    while len(single_audits) > SESSION_AUDIT_LIMIT:
+                        single_audits.popitem(last=False)
                     
                 except Exception as e:
+                    single_audits.pop(url, None)
                     st.error(f"❌ Error analyzing URL: {str(e)}")
                     st.info("**Troubleshooting tips:**\n- Check if the URL is accessible in your browser\n- Some websites block automated requests\n- Try a different URL\n- The website might be temporarily down")
                     
                     # Show more details in expander
                     with st.expander("Technical Details"):
                         st.code(f"Error Type: {type(e).__name__}\nDetails: {str(e)}")
+    
+    if url in single_audits:
+        stored = single_audits[url]
+        render_single_page_results(url, stored['audit'], stored['source'])
 
 with tab2:
     st.markdown("### Compare Your Page Against Competitors")
@@ -1209,6 +497,8 @@ with tab2:
         competitor1_url = st.text_input("🔗 Competitor 1", placeholder="https://competitor1.com/article", key="comp1")
         competitor3_url = st.text_input("🔗 Competitor 3 (Optional)", placeholder="https://competitor3.com/article", key="comp3")
     
+    compare_force_refresh = st.checkbox("🔄 Force refresh (ignore cached pages and results)", key="compare_force_refresh")
+    
     if st.button("⚔️ Compare All", type="primary", use_container_width=True, key="compare_btn"):
         urls_to_compare = {
             "Your Site": your_url,
@@ -1223,57 +513,54 @@ with tab2:
         if len(urls_to_compare) < 2:
             st.error("Please enter at least 2 URLs to compare (Your URL + at least 1 competitor)")
         else:
-            st.info(f"⏱️ Analyzing {len(urls_to_compare)} pages... This may take 30-60 seconds depending on page size and server response time.")
-            results_dict = {}
+            st.info(f"⏱️ Analyzing {len(urls_to_compare)} pages in parallel... This takes about as long as the slowest page to load.")
             progress_bar = st.progress(0)
             status_text = st.empty()
+            status_text.text(f"Fetching {len(urls_to_compare)} pages...")
             
-            for idx, (name, url) in enumerate(urls_to_compare.items()):
-                status_text.text(f"Analyzing {name}... ({idx + 1}/{len(urls_to_compare)})")
-                progress_bar.progress((idx + 1) / len(urls_to_compare))
-                
-                try:
-                    html = fetch_page(url)
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    schema_data = analyze_schema(soup)
-                    question_data = analyze_questions(soup)
-                    snippet_data = analyze_snippet_optimization(soup)
-                    structure_data = analyze_structure(soup)
-                    entity_data = analyze_entities(soup)
-                    eeat_data = analyze_eeat(soup, url)
-                    
-                    result = {
-                        'url': url,
-                        'schema': schema_data,
-                        'questions': question_data,
-                        'snippet': snippet_data,
-                        'structure': structure_data,
-                        'entities': entity_data,
-                        'eeat': eeat_data
-                    }
-                    
-                    score_breakdown = calculate_score_breakdown(result)
-                    engine_scores = calculate_engine_scores(result)
-                    
-                    results_dict[name] = {
-                        'url': url,
-                        'overall_score': score_breakdown['total'],
-                        'breakdown': score_breakdown['breakdown'],
-                        'engine_scores': engine_scores,
-                        'raw_data': result
-                    }
-                    
-                except Exception as e:
-                    st.warning(f"⚠️ Could not analyze {name}: {str(e)}")
+            # Workers only fetch and analyze; all Streamlit calls stay on this thread
+            completed = {}
+            failed = {}
+            workers = min(COMPARISON_MAX_WORKERS, len(urls_to_compare))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(analyze_comparison_page, url, compare_force_refresh): name
+                    for name, url in urls_to_compare.items()
+                }
+                for done, future in enumerate(as_completed(futures), start=1):
+                    name = futures[future]
+                    try:
+                        completed[name] = future.result()
+                        status_text.text(f"Finished {name} ({done}/{len(urls_to_compare)})")
+                    except Exception as e:
+                        failed[name] = e
+                        status_text.text(f"Failed {name} ({done}/{len(urls_to_compare)})")
+                    progress_bar.progress(done / len(urls_to_compare))
+            
+            # Report and order results by input slot, not completion order
+            results_dict = {}
+            for name, url in urls_to_compare.items():
+                if name in completed:
+                    results_dict[name] = completed[name]
+                    if completed[name]['raw_data'].truncated:
+                        st.caption(f"✂️ {name}: {TRUNCATION_NOTES[completed[name]['raw_data'].truncated]}")
+                else:
+                    st.warning(f"⚠️ Could not analyze {name}: {str(failed[name])}")
                     st.caption(f"URL: {url}")
-                    continue
             
             progress_bar.empty()
             status_text.empty()
             
             if len(results_dict) >= 2:
+                import pandas as pd
+                import plotly.graph_objects as go
+                
                 st.success(f"✅ Successfully analyzed {len(results_dict)} pages!")
+                reanalyzed = sum(data['source'] == 'analyzed' for data in results_dict.values())
+                st.caption(f"♻️ {len(results_dict) - reanalyzed} unchanged pages reused from earlier audits · {reanalyzed} pages analyzed")
+                scopes = {name: data['raw_data'].content_scope for name, data in results_dict.items()}
+                if len(set(scopes.values())) > 1:
+                    st.caption("📄 Structure and entity results were read from different text on these pages, so compare them with care: " + " · ".join(f"{name}: {'main content' if scope == 'main' else 'whole page'}" for name, scope in scopes.items()))
                 
                 # Overall Score Comparison
                 st.subheader("🏆 Overall AEO Score Comparison")
@@ -1344,7 +631,8 @@ with tab2:
                 for name, data in results_dict.items():
                     scores = []
                     for comp in component_names.keys():
-                        percentage = (data['breakdown'][comp]['score'] / data['breakdown'][comp]['max']) * 100
+                        component = data['breakdown'].component(comp)
+                        percentage = (component.score / component.max) * 100
                         scores.append(percentage)
                     
                     fig.add_trace(go.Scatterpolar(
@@ -1376,8 +664,8 @@ with tab2:
                 for comp_key, comp_name in component_names.items():
                     row = {'Component': comp_name}
                     for name, data in results_dict.items():
-                        score = data['breakdown'][comp_key]['score']
-                        max_score = data['breakdown'][comp_key]['max']
+                        score = data['breakdown'].component(comp_key).score
+                        max_score = data['breakdown'].component(comp_key).max
                         row[name] = f"{score}/{max_score}"
                     comparison_data.append(row)
                 
@@ -1420,15 +708,15 @@ with tab2:
                     raw = data['raw_data']
                     metrics_data.append({
                         'Website': name,
-                        'FAQ Schema': '✅' if raw['schema']['faq_present'] else '❌',
-                        'HowTo Schema': '✅' if raw['schema']['howto_present'] else '❌',
-                        'Word Count': raw['structure']['word_count'],
-                        'Question Headings': f"{raw['questions']['question_headings']}/{raw['questions']['total_headings']}",
-                        'Lists': raw['snippet']['lists'],
-                        'Tables': raw['snippet']['tables'],
-                        'Readability': raw['structure']['flesch_reading_ease'],
-                        'Author Info': '✅' if raw['eeat']['has_author_meta'] else '❌',
-                        'Has TL;DR': '✅' if raw['structure']['has_tldr'] else '❌'
+                        'FAQ Schema': '✅' if raw.schema.faq_present else '❌',
+                        'HowTo Schema': '✅' if raw.schema.howto_present else '❌',
+                        'Word Count': raw.structure.word_count,
+                        'Question Headings': f"{raw.questions.question_headings}/{raw.questions.total_headings}",
+                        'Lists': raw.snippet.lists,
+                        'Tables': raw.snippet.tables,
+                        'Readability': raw.structure.flesch_reading_ease,
+                        'Author Info': '✅' if raw.eeat.has_author_meta else '❌',
+                        'Has TL;DR': '✅' if raw.structure.has_tldr else '❌'
                     })
                 
                 metrics_df = pd.DataFrame(metrics_data)
@@ -1450,29 +738,29 @@ with tab2:
                         comp_raw = comp_data['raw_data']
                         
                         # FAQ Schema gap
-                        if not your_data['schema']['faq_present'] and comp_raw['schema']['faq_present']:
+                        if not your_data.schema.faq_present and comp_raw.schema.faq_present:
                             gaps.append(f"❌ **FAQ Schema**: {name} has FAQ schema, you don't")
                         
                         # HowTo Schema gap
-                        if not your_data['schema']['howto_present'] and comp_raw['schema']['howto_present']:
+                        if not your_data.schema.howto_present and comp_raw.schema.howto_present:
                             gaps.append(f"❌ **HowTo Schema**: {name} has HowTo schema, you don't")
                         
                         # Question headings gap
-                        if your_data['questions']['question_headings'] < comp_raw['questions']['question_headings']:
-                            gap = comp_raw['questions']['question_headings'] - your_data['questions']['question_headings']
+                        if your_data.questions.question_headings < comp_raw.questions.question_headings:
+                            gap = comp_raw.questions.question_headings - your_data.questions.question_headings
                             gaps.append(f"⚠️ **Question Headings**: {name} has {gap} more question-based headings")
                         
                         # Lists gap
-                        if your_data['snippet']['lists'] < comp_raw['snippet']['lists']:
-                            gap = comp_raw['snippet']['lists'] - your_data['snippet']['lists']
+                        if your_data.snippet.lists < comp_raw.snippet.lists:
+                            gap = comp_raw.snippet.lists - your_data.snippet.lists
                             gaps.append(f"⚠️ **Lists**: {name} has {gap} more lists")
                         
                         # Word count gap (if significantly different)
-                        if your_data['structure']['word_count'] < comp_raw['structure']['word_count'] * 0.7:
-                            gaps.append(f"⚠️ **Content Depth**: {name} has {comp_raw['structure']['word_count']} words vs your {your_data['structure']['word_count']}")
+                        if your_data.structure.word_count < comp_raw.structure.word_count * 0.7:
+                            gaps.append(f"⚠️ **Content Depth**: {name} has {comp_raw.structure.word_count} words vs your {your_data.structure.word_count}")
                         
                         # Author info gap
-                        if not your_data['eeat']['has_author_meta'] and comp_raw['eeat']['has_author_meta']:
+                        if not your_data.eeat.has_author_meta and comp_raw.eeat.has_author_meta:
                             gaps.append(f"❌ **Author Info**: {name} has author metadata, you don't")
                     
                     if gaps:
@@ -1495,23 +783,29 @@ with tab2:
                 top_data = results_dict[top_performer[0]]['raw_data']
                 best_practices = []
                 
-                if top_data['schema']['faq_present']:
-                    best_practices.append(f"✅ Uses FAQ Schema with {top_data['schema']['faq_count']} questions")
-                if top_data['schema']['howto_present']:
-                    best_practices.append(f"✅ Implements HowTo Schema with {top_data['schema']['howto_count']} steps")
-                if top_data['structure']['has_tldr']:
+                if top_data.schema.faq_present:
+                    best_practices.append(f"✅ Uses FAQ Schema with {top_data.schema.faq_count} questions")
+                if top_data.schema.howto_present:
+                    best_practices.append(f"✅ Implements HowTo Schema with {top_data.schema.howto_count} steps")
+                if top_data.structure.has_tldr:
                     best_practices.append("✅ Includes TL;DR summary section")
-                if top_data['snippet']['lists'] > 2:
-                    best_practices.append(f"✅ Uses {top_data['snippet']['lists']} lists for better readability")
-                if top_data['questions']['question_headings'] >= 5:
-                    best_practices.append(f"✅ Has {top_data['questions']['question_headings']} question-based headings")
-                if top_data['eeat']['has_author_meta']:
+                if top_data.snippet.lists > 2:
+                    best_practices.append(f"✅ Uses {top_data.snippet.lists} lists for better readability")
+                if top_data.questions.question_headings >= 5:
+                    best_practices.append(f"✅ Has {top_data.questions.question_headings} question-based headings")
+                if top_data.eeat.has_author_meta:
                     best_practices.append("✅ Includes comprehensive author information")
-                if top_data['structure']['flesch_reading_ease'] >= 60:
-                    best_practices.append(f"✅ Maintains good readability (score: {top_data['structure']['flesch_reading_ease']})")
+                if top_data.structure.flesch_reading_ease >= 60:
+                    best_practices.append(f"✅ Maintains good readability (score: {top_data.structure.flesch_reading_ease})")
                 
                 for practice in best_practices:
                     st.markdown(practice)
+                
+                perfs = {name: data['raw_data'].perf for name, data in results_dict.items() if data['raw_data'].perf}
+                if perfs:
+                    with st.expander("⏱️ Performance"):
+                        st.dataframe(perf_frame(perfs), use_container_width=True)
+                        st.dataframe(pd.DataFrame({name: perf['counts'] for name, perf in perfs.items()}), use_container_width=True)
             
             else:
                 st.error("Could not analyze enough pages for comparison. Please check the URLs and try again.")
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Command-line batch auditor.
+
+Examples:
+    python aeo_cli.py audit urls.txt --workers 8 --output results.jsonl
+    cat urls.txt | python aeo_cli.py audit > results.jsonl
+    python aeo_cli.py sitemap https://example.com/sitemap.xml --summary site.json > pages.jsonl
+    python aeo_cli.py sitemap https://example.com/sitemap.xml --table pages.parquet > pages.jsonl
+
+Each audited URL is written as one JSON line as soon as it finishes, so
+output order follows completion order, not input order. --table also
+collects the audited pages column by column and writes them, with their
+scores, as one CSV/Parquet/Feather table at the end of the run.
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+
+from aeo_engine import audit_urls
+from aeo_records import TABLE_FORMATS, ResultBatch, check_table_format
+from aeo_sitemap import SiteSummary, audit_site
+
+def read_urls(source):
+    """Yield URLs from a file object, skipping blank lines and # comments"""
+    for line in source:
+        url = line.strip()
+        if url and not url.startswith('#'):
+            yield url
+
+def write_records(records, output, batch=None):
+    """Stream records as JSON lines and return counts of ok/failed records and of how each audit was produced; ok records also go into batch"""
+    counts = Counter()
+    for record in records:
+        output.write(json.dumps(record, ensure_ascii=False) + '\n')
+        output.flush()
+        if record['ok']:
+            counts['ok'] += 1
+            counts[record['source']] += 1
+            if batch is not None:
+                batch.append(record['result'], record['url'])
+        else:
+            counts['failed'] += 1
+    return counts
+
+def describe_counts(counts):
+    """One-line run summary: failures, and pages skipped as unchanged vs re-analyzed"""
+    skipped = counts['memory'] + counts['history'] + counts['rescored']
+    return (
+        f"{counts['ok']} ok, {counts['failed']} failed; "
+        f"{skipped} unchanged pages skipped ({counts['rescored']} rescored), {counts['analyzed']} analyzed"
+    )
+
+def write_table(batch, path):
+    """Write the collected batch to the --table file, if one was asked for"""
+    if path is None:
+        return
+    batch.write(path)
+    print(f"Wrote {len(batch)} pages to {path}", file=sys.stderr)
+
+def run_audit_command(args):
+    batch = ResultBatch() if args.table else None
+    source = sys.stdin if args.urls == '-' else open(args.urls, encoding='utf-8')
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    start_time = time.perf_counter()
+    try:
+        records = audit_urls(read_urls(source), workers=args.workers, max_pending=args.max_pending, force_refresh=args.force_refresh)
+        counts = write_records(records, output, batch)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    
+    write_table(batch, args.table)
+    elapsed = time.perf_counter() - start_time
+    print(f"Audited {counts['ok'] + counts['failed']} URLs ({describe_counts(counts)}) in {elapsed:.1f}s", file=sys.stderr)
+    return 0 if counts['ok'] or not counts['failed'] else 1
+
+def run_sitemap_command(args):
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    summary = SiteSummary(args.sitemap)
+    batch = ResultBatch() if args.table else None
+    start_time = time.perf_counter()
+    try:
+        records = audit_site(args.sitemap, workers=args.workers, max_pending=args.max_pending, max_pages=args.max_pages, force_refresh=args.force_refresh, summary=summary)
+        counts = write_records(records, output, batch)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    
+    write_table(batch, args.table)
+    site = summary.to_dict()
+    site['elapsed'] = round(time.perf_counter() - start_time, 1)
+    if args.summary == '-':
+        print(json.dumps(site, indent=2, ensure_ascii=False), file=sys.stderr)
+    else:
+        with open(args.summary, 'w', encoding='utf-8') as f:
+            json.dump(site, f, indent=2, ensure_ascii=False)
+    print(f"Audited {counts['ok'] + counts['failed']} pages from {args.sitemap} ({describe_counts(counts)}), average score {site['average_score']}", file=sys.stderr)
+    if site['sitemap_errors']:
+        print(f"Skipped {len(site['sitemap_errors'])} nested sitemaps that failed to load (see sitemap_errors in the summary)", file=sys.stderr)
+    return 0 if counts['ok'] or not counts['failed'] else 1
+
+def table_path(value):
+    """argparse type for --table: fail on an unwritable format before any page is audited"""
+    try:
+        check_table_format(value)
+    except (ValueError, ImportError) as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return value
+
+def add_pool_arguments(parser):
+    parser.add_argument('-w', '--workers', type=int, default=None, help="Worker processes (default: CPU count; 1 runs inline)")
+    parser.add_argument('--max-pending', type=int, default=None, help="Audits queued at once (default: 4 x workers)")
+    parser.add_argument('--force-refresh', action='store_true', help="Ignore cached pages, stored audits and audit history")
+    parser.add_argument('--table', type=table_path, default=None, help=f"Also write audited pages and their scores as one table ({', '.join(TABLE_FORMATS)}, chosen by extension)")
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Headless AEO auditor")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    audit = subparsers.add_parser('audit', help="Audit a list of URLs and stream JSONL results")
+    audit.add_argument('urls', nargs='?', default='-', help="File with one URL per line, or - for stdin (default)")
+    audit.add_argument('-o', '--output', default='-', help="JSONL output file, or - for stdout (default)")
+    add_pool_arguments(audit)
+    audit.set_defaults(handler=run_audit_command)
+    
+    sitemap = subparsers.add_parser('sitemap', help="Audit every page in a sitemap or sitemap index and summarize the site")
+    sitemap.add_argument('sitemap', help="URL of sitemap.xml, a sitemap index, or a .xml.gz sitemap")
+    sitemap.add_argument('-o', '--output', default='-', help="Per-page JSONL output file, or - for stdout (default)")
+    sitemap.add_argument('-s', '--summary', default='-', help="Site summary JSON file, or - for stderr (default)")
+    sitemap.add_argument('--max-pages', type=int, default=None, help="Stop after this many pages")
+    add_pool_arguments(sitemap)
+    sitemap.set_defaults(handler=run_sitemap_command)
+    
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,2842 @@
+# -*- coding: utf-8 -*-
+"""
+AEO audit engine: fetching, parsing, analysis, scoring and batch runs.
+
+Nothing here imports Streamlit, so the pipeline can be reused from the
+command line (see aeo_cli.py) or from worker processes.
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.compat import chardet
+from urllib3.exceptions import ProtocolError, ReadTimeoutError
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, NavigableString, Tag
+from bs4.builder import HTMLTreeBuilder
+import re
+import os
+import bisect
+import codecs
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+import operator
+import functools
+import contextlib
+from html import unescape as unescape_html
+from html.entities import html5 as HTML5_ENTITIES
+from html.parser import HTMLParser
+from urllib.parse import urlsplit, urlunsplit
+from collections import Counter, OrderedDict
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+import pyphen
+
+# HTTP client settings: one pooled session per process, reused across audits
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 20
+HTTP_MAX_RETRIES = 3
+HTTP_BACKOFF_FACTOR = 0.5
+HTTP_BACKOFF_JITTER = 0.5
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)
+HTTP_POOL_HOSTS = 16
+HTTP_POOL_SIZE_PER_HOST = 8
+
+# Download limits: bodies are streamed and cut off at the byte cap, and reading
+# stops once the deadline passes (READ_TIMEOUT only bounds the wait between reads)
+MAX_DOWNLOAD_BYTES = int(os.environ.get('AEO_MAX_DOWNLOAD_BYTES', 5 * 1024 * 1024))
+DOWNLOAD_DEADLINE = float(os.environ.get('AEO_DOWNLOAD_DEADLINE', 30))
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# How fetched bytes get their charset: a BOM, then the Content-Type charset, then a <meta> tag in the
+# first ENCODING_PRESCAN_BYTES (the HTML spec's prescan window). Undeclared pages are checked for
+# valid UTF-8 and then statistically, reading only the first ENCODING_DETECTION_BYTES; pages that
+# are neither fall back to windows-1252, the spec's default for undeclared legacy pages.
+ENCODING_PRESCAN_BYTES = 1024
+ENCODING_DETECTION_BYTES = int(os.environ.get('AEO_ENCODING_DETECTION_BYTES', 64 * 1024))
+DEFAULT_LEGACY_ENCODING = 'cp1252'
+CONTENT_TYPE_CHARSET_PATTERN = re.compile(r'''charset\s*=\s*["']?\s*([\w.:-]+)''', re.I)
+META_CHARSET_PATTERN = re.compile(rb'''<meta[^>]+?charset\s*=\s*["']?\s*([\w.:-]+)''', re.I)
+BYTE_ORDER_MARKS = ((codecs.BOM_UTF8, 'utf-8-sig'), (codecs.BOM_UTF16_LE, 'utf-16'), (codecs.BOM_UTF16_BE, 'utf-16'))
+# Bytes decoded at a time when a page is hashed or analyzed as a stream
+DECODE_CHUNK_SIZE = 64 * 1024
+UNICODE_BYTE_ORDER_MARKS = {
+    'utf-16': (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE),
+    'utf-32': (codecs.BOM_UTF32_LE, codecs.BOM_UTF32_BE)
+}
+
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1'
+}
+
+@functools.lru_cache(maxsize=None)
+def get_http_session():
+    """Shared keep-alive session that retries idempotent requests with exponential backoff and jitter"""
+    retry = Retry(
+        total=HTTP_MAX_RETRIES,
+        backoff_factor=HTTP_BACKOFF_FACTOR,
+        backoff_jitter=HTTP_BACKOFF_JITTER,
+        status_forcelist=HTTP_RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_HOSTS,
+        pool_maxsize=HTTP_POOL_SIZE_PER_HOST,
+        max_retries=retry
+    )
+    session = requests.Session()
+    session.headers.update(REQUEST_HEADERS)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def _is_read_timeout(error):
+    """Retries wrap exhausted read timeouts in a ConnectionError; unwrap them"""
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, ReadTimeoutError)
+
+# Per-stage timing attached to every audit as result['perf']; AEO_PERF_TIMING=0 turns it into no-ops
+PERF_TIMING = os.environ.get('AEO_PERF_TIMING', '1') != '0'
+
+class StageTimer:
+    """Records monotonic per-stage durations and size counts for one audit"""
+    
+    def __init__(self):
+        self.stages = {}
+        self.counts = {}
+        self.notes = {}
+        self._start = time.perf_counter()
+    
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+    
+    def count(self, name, value):
+        self.counts[name] = value
+    
+    def note(self, name, value):
+        """Record which way a stage went, e.g. where the page's encoding came from"""
+        self.notes[name] = value
+    
+    def to_dict(self):
+        return {
+            'stages_ms': {name: round(seconds * 1000, 3) for name, seconds in self.stages.items()},
+            'total_ms': round((time.perf_counter() - self._start) * 1000, 3),
+            'counts': dict(self.counts),
+            'notes': dict(self.notes)
+        }
+
+class _NullTimer:
+    """Timer used when timing is disabled; every call is a no-op"""
+    
+    _stage = contextlib.nullcontext()
+    
+    def stage(self, name):
+        return self._stage
+    
+    def count(self, name, value):
+        pass
+    
+    def note(self, name, value):
+        pass
+    
+    def to_dict(self):
+        return None
+
+NULL_TIMER = _NullTimer()
+
+def new_stage_timer():
+    """A fresh StageTimer, or the shared no-op timer when PERF_TIMING is off"""
+    return StageTimer() if PERF_TIMING else NULL_TIMER
+
+# On-disk HTTP cache for fetched pages
+HTTP_CACHE_DIR = os.environ.get('AEO_HTTP_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'aeo_auditor', 'http'))
+HTTP_CACHE_MAX_BYTES = int(os.environ.get('AEO_HTTP_CACHE_MAX_BYTES', 200 * 1024 * 1024))
+# Eviction frees the cache down to this share of its cap, so the writes after it don't each scan again
+HTTP_CACHE_EVICT_TO = 0.9
+# Seconds a cached page is served without revalidation; unset means follow the server's Cache-Control max-age
+HTTP_CACHE_TTL = int(os.environ['AEO_HTTP_CACHE_TTL']) if os.environ.get('AEO_HTTP_CACHE_TTL') else None
+
+def normalize_url(url):
+    """Canonical form of a URL for cache keys: lowercase scheme/host, no default port, no fragment"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or '').lower()
+    if parts.port and (scheme, parts.port) not in (('http', 80), ('https', 443)):
+        netloc = f"{netloc}:{parts.port}"
+    if parts.username:
+        netloc = f"{parts.username}@{netloc}"
+    return urlunsplit((scheme, netloc, parts.path or '/', parts.query, ''))
+
+def _cache_max_age(headers):
+    """Return (storable, max_age) from a response's Cache-Control header"""
+    directives = [d.strip().lower() for d in headers.get('Cache-Control', '').split(',')]
+    if 'no-store' in directives:
+        return False, 0
+    if 'no-cache' in directives:
+        return True, 0
+    for directive in directives:
+        if directive.startswith('max-age='):
+            try:
+                return True, max(int(directive[8:]), 0)
+            except ValueError:
+                break
+    return True, 0
+
+class HttpCache:
+    """Size-bounded LRU store of page bodies and their validators, one file pair per URL.
+    
+    Writes keep a running total of the bytes stored, counted from one scan of the directory, and
+    only scan again to evict once it passes max_bytes. Other processes writing to the same directory
+    aren't counted until then, so the cache can run over max_bytes by what they wrote meanwhile.
+    """
+    
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Body bytes on disk as of the last scan plus this process's writes since; None before the first scan
+        self._size = None
+        os.makedirs(directory, exist_ok=True)
+    
+    def _paths(self, url):
+        key = hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+        base = os.path.join(self.directory, key)
+        return base + '.json', base + '.body'
+    
+    def get(self, url):
+        """Return the stored entry for a URL (including its body), or None"""
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                entry = json.load(f)
+            with open(body_path, 'rb') as f:
+                entry['body'] = f.read()
+            # The body file's mtime is the LRU clock
+            os.utime(body_path)
+        except (OSError, ValueError):
+            return None
+        return entry
+    
+    def is_fresh(self, entry, ttl=None):
+        max_age = entry['max_age'] if ttl is None else ttl
+        return time.time() - entry['stored_at'] < max_age
+    
+    def put(self, url, body, encoding, headers, truncated=None, encoding_source=None):
+        storable, max_age = _cache_max_age(headers)
+        if not storable:
+            return
+        meta = {
+            'url': normalize_url(url),
+            'encoding': encoding,
+            'encoding_source': encoding_source,
+            'etag': headers.get('ETag'),
+            'last_modified': headers.get('Last-Modified'),
+            'max_age': max_age,
+            'stored_at': time.time(),
+            'size': len(body),
+            'truncated': truncated
+        }
+        meta_path, body_path = self._paths(url)
+        try:
+            replaced = os.path.getsize(body_path)
+        except OSError:
+            replaced = 0
+        self._write_atomic(body_path, body)
+        self._write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+        with self._lock:
+            if self._size is not None:
+                self._size += len(body) - replaced
+            full = self._size is None or self._size > self.max_bytes
+        if full:
+            self._evict()
+    
+    def refresh(self, url, entry, headers):
+        """Record a 304: keep the body, take any new validators and restart the freshness clock"""
+        storable, max_age = _cache_max_age(headers)
+        meta = {k: v for k, v in entry.items() if k != 'body'}
+        meta['etag'] = headers.get('ETag', meta['etag'])
+        meta['last_modified'] = headers.get('Last-Modified', meta['last_modified'])
+        meta['max_age'] = max_age
+        meta['stored_at'] = time.time()
+        self._write_atomic(self._paths(url)[0], json.dumps(meta).encode('utf-8'))
+    
+    def record(self, outcome):
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+    
+    def stats(self):
+        """Hit/miss counters for this process plus what is currently on disk"""
+        entries = 0
+        size = 0
+        for item in os.scandir(self.directory):
+            if item.name.endswith('.body'):
+                entries += 1
+                size += item.stat().st_size
+        return {
+            'hits': self.hits,
+            'revalidated': self.revalidated,
+            'misses': self.misses,
+            'entries': entries,
+            'bytes': size
+        }
+    
+    def _write_atomic(self, path, data):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    
+    def _evict(self):
+        """Scan the directory; if it is over max_bytes, drop least recently used entries down to HTTP_CACHE_EVICT_TO of it"""
+        bodies = []
+        total = 0
+        for item in os.scandir(self.directory):
+            if item.name.endswith('.body'):
+                stat = item.stat()
+                bodies.append((stat.st_mtime, stat.st_size, item.path))
+                total += stat.st_size
+        if total > self.max_bytes:
+            target = self.max_bytes * HTTP_CACHE_EVICT_TO
+            bodies.sort()
+            for _, size, body_path in bodies:
+                if total <= target:
+                    break
+                for path in (body_path, body_path[:-len('.body')] + '.json'):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                total -= size
+        with self._lock:
+            self._size = total
+
+@functools.lru_cache(maxsize=None)
+def get_http_cache():
+    """Process-wide HTTP cache instance"""
+    return HttpCache(HTTP_CACHE_DIR, HTTP_CACHE_MAX_BYTES)
+
+def _read_body(response, max_bytes=MAX_DOWNLOAD_BYTES, deadline=DOWNLOAD_DEADLINE):
+    """Read a streamed response body; returns (body, truncated) where truncated is None, 'size' or 'deadline'"""
+    stop_at = time.monotonic() + deadline
+    chunks = []
+    size = 0
+    # Each read waits at most until the deadline, so a server that stalls mid-body can't hold it up
+    # for a whole READ_TIMEOUT; the connection's own timeout is put back afterwards
+    sock = getattr(response.raw.connection, 'sock', None)
+    read_timeout = sock.gettimeout() if sock is not None else None
+    cut_by_deadline = False
+    try:
+        while True:
+            remaining = stop_at - time.monotonic()
+            if remaining <= 0:
+                return b''.join(chunks), 'deadline'
+            if sock is not None:
+                cut_by_deadline = read_timeout is None or remaining < read_timeout
+                sock.settimeout(remaining if cut_by_deadline else read_timeout)
+            # read1 returns whatever has arrived, so a slow trickle still hits the deadline check
+            chunk = response.raw.read1(DOWNLOAD_CHUNK_SIZE, decode_content=True)
+            if not chunk:
+                return b''.join(chunks), None
+            if size + len(chunk) > max_bytes:
+                chunks.append(chunk[:max_bytes - size])
+                return b''.join(chunks), 'size'
+            chunks.append(chunk)
+            size += len(chunk)
+    except ReadTimeoutError as e:
+        if cut_by_deadline:
+            return b''.join(chunks), 'deadline'
+        raise requests.ReadTimeout(e, response=response)
+    except ProtocolError as e:
+        raise requests.ConnectionError(e, response=response)
+    finally:
+        if sock is not None:
+            try:
+                sock.settimeout(read_timeout)
+            except OSError:
+                # urllib3 already closed the connection after a timeout
+                pass
+
+def _lookup_encoding(label):
+    """Python's name for a charset label, or None if Python can't decode it"""
+    try:
+        return codecs.lookup(label).name
+    except LookupError:
+        return None
+
+@functools.lru_cache(maxsize=None)
+def _is_single_byte(encoding):
+    """True for codecs that map every byte to its own character (latin-1 style code pages)"""
+    return len(bytes(range(128, 256)).decode(encoding, errors='replace')) == 128
+
+def resolve_encoding(body, content_type=None):
+    """Decide how to decode a page body; returns (encoding, source), source being 'bom', 'header', 'meta', 'utf-8-valid', 'detected' or 'default'"""
+    for mark, encoding in BYTE_ORDER_MARKS:
+        if body.startswith(mark):
+            return encoding, 'bom'
+    
+    match = CONTENT_TYPE_CHARSET_PATTERN.search(content_type or '')
+    encoding = _lookup_encoding(match.group(1)) if match else None
+    if encoding:
+        return encoding, 'header'
+    
+    match = META_CHARSET_PATTERN.search(body, 0, ENCODING_PRESCAN_BYTES)
+    encoding = _lookup_encoding(match.group(1).decode('ascii')) if match else None
+    if encoding:
+        # A page whose <meta> tag is readable as ASCII isn't UTF-16, whatever the tag claims
+        return ('utf-8' if encoding.startswith('utf-16') else encoding), 'meta'
+    
+    prefix = body[:ENCODING_DETECTION_BYTES]
+    try:
+        # Valid UTF-8 is almost never an accident; final=False forgives a character cut at the prefix's end
+        codecs.getincrementaldecoder('utf-8')().decode(prefix, final=False)
+        return 'utf-8', 'utf-8-valid'
+    except UnicodeDecodeError:
+        pass
+    if chardet:
+        detected = chardet.detect(prefix)['encoding']
+        encoding = _lookup_encoding(detected) if detected else None
+        # Multibyte guesses (Shift_JIS, GBK, EUC-KR...) are reliable; guesses between single-byte
+        # code pages are not (short French text comes back as cp1250), so those take the default
+        if encoding and not _is_single_byte(encoding):
+            return encoding, 'detected'
+    return DEFAULT_LEGACY_ENCODING, 'default'
+
+def decode_body(body, encoding):
+    """Decode page bytes, replacing undecodable sequences; an unknown encoding falls back to UTF-8"""
+    try:
+        return str(body, encoding, errors='replace')
+    except LookupError:
+        return str(body, 'utf-8', errors='replace')
+
+def decode_chunks(body, encoding, chunk_size=DECODE_CHUNK_SIZE):
+    """decode_body() a piece at a time; the pieces join to exactly decode_body()'s text"""
+    encoding = _lookup_encoding(encoding) or 'utf-8'
+    # str() reads UTF-16/32 without a byte order mark in native order; the incremental decoders refuse it
+    marks = UNICODE_BYTE_ORDER_MARKS.get(encoding)
+    if marks and not body.startswith(marks):
+        encoding += '-le' if codecs.BOM == codecs.BOM_UTF16_LE else '-be'
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    view = memoryview(body)
+    for start in range(0, len(body), chunk_size):
+        yield decoder.decode(view[start:start + chunk_size])
+    yield decoder.decode(b'', final=True)
+
+def text_chunks(text, chunk_size=DECODE_CHUNK_SIZE):
+    """Already decoded text in the same size pieces decode_chunks() yields"""
+    for start in range(0, len(text), chunk_size):
+        yield text[start:start + chunk_size]
+
+def _fetched(body, encoding, encoding_source, cache, truncated, timer):
+    timer.count('bytes', len(body))
+    timer.note('encoding', encoding)
+    timer.note('encoding_source', encoding_source)
+    return {'body': body, 'encoding': encoding, 'encoding_source': encoding_source, 'cache': cache, 'truncated': truncated}
+
+def fetch_document(url, ttl=HTTP_CACHE_TTL, timer=NULL_TIMER):
+    """Fetch a page through the HTTP cache without decoding it.
+    
+    Returns the raw body, its encoding and how that was resolved (for a stored page, as when it was
+    first fetched; 'cache' for entries stored before that was recorded), how the cache served the
+    page and whether it was truncated.
+    """
+    session = get_http_session()
+    cache = get_http_cache()
+    
+    with timer.stage('cache_lookup'):
+        entry = cache.get(url)
+    if entry is not None and cache.is_fresh(entry, ttl):
+        cache.record('hits')
+        return _fetched(entry['body'], entry['encoding'], entry.get('encoding_source') or 'cache', 'hit', entry.get('truncated'), timer)
+    
+    conditional_headers = {}
+    if entry is not None:
+        if entry['etag']:
+            conditional_headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            conditional_headers['If-Modified-Since'] = entry['last_modified']
+    
+    try:
+        # DNS, connect, TLS and the server's time to first byte all land in 'request'
+        with timer.stage('request'):
+            response = session.get(url, headers=conditional_headers, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT), allow_redirects=True, stream=True)
+        with response:
+            if response.status_code == 304 and entry is not None:
+                cache.refresh(url, entry, response.headers)
+                cache.record('revalidated')
+                return _fetched(entry['body'], entry['encoding'], entry.get('encoding_source') or 'cache', 'revalidated', entry.get('truncated'), timer)
+            
+            response.raise_for_status()
+            with timer.stage('download'):
+                body, truncated = _read_body(response)
+        
+        # Unlike response.text, never runs charset detection over the whole body; the encoding is
+        # stored with the cached bytes so they decode the same way later
+        with timer.stage('detect_encoding'):
+            encoding, encoding_source = resolve_encoding(body, response.headers.get('Content-Type'))
+        
+        # Check if we got valid HTML
+        if len(body) < 100:
+            if truncated == 'deadline':
+                raise Exception(f"⏱️ Download did not finish within {DOWNLOAD_DEADLINE:g} seconds. The website is sending the page too slowly.")
+            raise Exception("Response too short - website may be blocking the request")
+        
+        cache.record('misses')
+        # A deadline cut depends on network conditions, so only whole or size-capped bodies are stored
+        if truncated != 'deadline':
+            with timer.stage('cache_store'):
+                cache.put(url, body, encoding, response.headers, truncated, encoding_source)
+        return _fetched(body, encoding, encoding_source, 'miss', truncated, timer)
+        
+    except requests.Timeout:
+        raise Exception(f"⏱️ Request timed out after {READ_TIMEOUT} seconds. This website is responding slowly. Try:\n- Testing with a faster-loading page\n- Running locally instead of Streamlit Cloud\n- The website may have rate limiting")
+    except requests.HTTPError as e:
+        if e.response.status_code == 403:
+            raise Exception(f"🚫 Access Forbidden (403). The website is blocking automated requests. This is common with sites that have bot protection.")
+        elif e.response.status_code == 429:
+            raise Exception(f"⚠️ Too Many Requests (429). The website has rate limiting. Wait a few minutes and try again.")
+        else:
+            raise Exception(f"❌ HTTP Error {e.response.status_code}: {str(e)}")
+    except requests.RequestException as e:
+        if isinstance(e, requests.ConnectionError) and _is_read_timeout(e):
+            raise Exception(f"⏱️ Request timed out after {READ_TIMEOUT} seconds ({HTTP_MAX_RETRIES} retries). This website is responding slowly. Try:\n- Testing with a faster-loading page\n- Running locally instead of Streamlit Cloud\n- The website may have rate limiting")
+        raise Exception(f"🌐 Network Error: {str(e)}\n\nPossible causes:\n- Website is down\n- DNS resolution failed\n- SSL certificate issues")
+
+def fetch_page(url):
+    """Fetch webpage content with timeout and retry logic"""
+    fetched = fetch_document(url)
+    return decode_body(fetched['body'], fetched['encoding'])
+
+HEADING_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+TOC_CLASS_PATTERN = re.compile('toc|table-of-contents', re.I)
+AUTHOR_BIO_CLASS_PATTERN = re.compile('author|bio', re.I)
+SOURCES_CLASS_PATTERN = re.compile('reference|source|citation', re.I)
+AUTHOR_META_PATTERN = re.compile('author', re.I)
+DATE_META_PATTERN = re.compile('published', re.I)
+
+# Main-content extraction (after Readability): paragraphs score the blocks around them by their length and
+# commas, discounted by each block's link density. Candidate blocks start from these base scores
+CONTENT_BLOCK_WEIGHTS = {'div': 5, 'article': 5, 'main': 5, 'section': 0, 'td': 3, 'blockquote': 3, 'body': 0}
+# Paragraphs inside these never score; by class or id only when the name doesn't also sound like content
+BOILERPLATE_TAGS = frozenset(('nav', 'header', 'footer', 'aside'))
+BOILERPLATE_ROLES = frozenset(('navigation', 'banner', 'contentinfo', 'complementary', 'dialog', 'alertdialog'))
+BOILERPLATE_CLASS_PATTERN = re.compile('nav|menu|foot|sidebar|comment|cookie|consent|gdpr|banner|popup|modal|share|social|related|promo|sponsor|newsletter|subscribe|widget', re.I)
+CONTENT_CLASS_PATTERN = re.compile('article|content|entry|main|post|story|text|body|blog', re.I)
+# Class and id names move a candidate's base score by this much either way; semantic tags can't be boilerplate by name
+CLASS_WEIGHT = 25
+SEMANTIC_CONTENT_TAGS = frozenset(('body', 'main', 'article'))
+MIN_SCORED_PARAGRAPH = 25
+# The chosen block widens to its enclosing block while that one scores at least this share of it
+ANCESTOR_SCORE_SHARE = 0.75
+MAIN_CONTENT_TAGS = frozenset(CONTENT_BLOCK_WEIGHTS) | BOILERPLATE_TAGS | {'a'}
+
+# Tags whose text never reaches BeautifulSoup's get_text()
+NON_TEXT_CONTAINERS = ('script', 'style', 'template')
+WHITESPACE_PRESERVING_TAGS = ('pre', 'textarea')
+ASCII_SPACES = str.maketrans('', '', '\x20\x0a\x09\x0c\x0d')
+
+# Parser backends in order of preference; each maps to the module it needs
+PARSER_BACKENDS = {
+    'selectolax': 'selectolax',
+    'lxml': 'lxml',
+    'html.parser': None
+}
+PARSER_BACKEND = os.environ.get('AEO_PARSER_BACKEND', 'lxml')
+
+# Pruned parsing (BeautifulSoup backends): run_audit never builds subtrees no analyzer reads. Opt-in
+# (AEO_PRUNED_PARSE=1): the tokenizer hooks cost about what they save unless a page is mostly inline assets
+PRUNED_PARSE = os.environ.get('AEO_PRUNED_PARSE', '0') == '1'
+PRUNED_ELEMENTS = ('script', 'style')
+_PRUNE_START_TAGS = frozenset(PRUNED_ELEMENTS + ('svg',))
+# Tags _ElementCollector.start_tag reacts to; inside <svg> every other tag is left out of the tree
+COLLECTED_TAGS = frozenset(('p', 'ul', 'ol', 'table', 'script', 'meta') + HEADING_TAGS) | MAIN_CONTENT_TAGS
+
+# Text the text analyzers (structure, entities) read: 'main' is only the main content block, 'full' the whole page
+CONTENT_SCOPES = ('main', 'full')
+CONTENT_SCOPE = os.environ.get('AEO_CONTENT_SCOPE', 'main')
+
+def resolve_content_scope(scope=None):
+    """Return the given or configured content scope, checked against CONTENT_SCOPES"""
+    scope = scope or CONTENT_SCOPE
+    if scope not in CONTENT_SCOPES:
+        raise ValueError(f"Unknown content scope '{scope}'. Choose one of: {', '.join(CONTENT_SCOPES)}")
+    return scope
+
+def resolve_parser_backend(backend=None):
+    """Return the configured parser backend, or html.parser if it isn't installed"""
+    backend = backend or PARSER_BACKEND
+    if backend not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown parser backend '{backend}'. Choose one of: {', '.join(PARSER_BACKENDS)}")
+    module = PARSER_BACKENDS[backend]
+    if module is not None and importlib.util.find_spec(module) is None:
+        return 'html.parser'
+    return backend
+
+class PrunedSoup(BeautifulSoup):
+    """BeautifulSoup that skips what the analyzers never read, as the tokenizer reports it.
+    
+    Script and style elements other than JSON-LD are dropped along with their contents. Inside <svg>
+    (icon sprites, charts), tags the element collector ignores are dropped but their text is kept and
+    split at the same places, so get_text() and every analyzer see exactly what the full tree gives.
+    """
+    
+    def reset(self):
+        super().reset()
+        self._skipping = None
+        self._svg_depth = 0
+        # Tags that decide how their strings are typed or whitespace-collapsed must stay, even in SVG
+        self._kept_in_svg = COLLECTED_TAGS | set(self.builder.string_containers) | set(self.builder.preserve_whitespace_tags)
+    
+    def handle_starttag(self, name, namespace, nsprefix, attrs, *args, **kwargs):
+        if name in _PRUNE_START_TAGS:
+            if name == 'svg':
+                self._svg_depth += 1
+            elif name == 'style' or attrs.get('type') != 'application/ld+json':
+                self.endData()
+                self._skipping = name
+                return None
+        elif self._svg_depth and name not in self._kept_in_svg:
+            self.endData()
+            return None
+        return BeautifulSoup.handle_starttag(self, name, namespace, nsprefix, attrs, *args, **kwargs)
+    
+    def handle_endtag(self, name, nsprefix=None):
+        if self._skipping is not None:
+            if name == self._skipping:
+                self._skipping = None
+            return
+        if name == 'svg' and self._svg_depth:
+            self._svg_depth -= 1
+        elif self._svg_depth and name not in self._kept_in_svg:
+            self.endData()
+            return
+        BeautifulSoup.handle_endtag(self, name, nsprefix)
+    
+    def handle_data(self, data):
+        if self._skipping is None:
+            BeautifulSoup.handle_data(self, data)
+
+def parse_html(html, backend=None, encoding=None, pruned=False):
+    """Parse a page with the configured backend; html is text, or bytes in encoding (sniffed from the bytes when None).
+    
+    pruned builds a PrunedSoup on the BeautifulSoup backends; lexbor builds its whole tree natively.
+    """
+    backend = resolve_parser_backend(backend)
+    if isinstance(html, bytes):
+        encoding = encoding or resolve_encoding(html)[0]
+        # lexbor decodes UTF-8 itself, replacing bad sequences just as Python does. BeautifulSoup gets
+        # text: handed bytes, it would run its own charset detection over the whole page.
+        if not (backend == 'selectolax' and encoding == 'utf-8'):
+            html = decode_body(html, encoding)
+    if backend == 'selectolax':
+        from selectolax.lexbor import LexborHTMLParser
+        return LexborHTMLParser(html)
+    return (PrunedSoup if pruned else BeautifulSoup)(html, backend)
+
+def _class_matches(classes, pattern):
+    """Match a class regex the same way BeautifulSoup's class_ filter does"""
+    if not classes:
+        return False
+    return any(pattern.search(c) for c in classes) or bool(pattern.search(' '.join(classes)))
+
+class TextSegment:
+    """A heading or paragraph: its kind and [start, end) span in the document text, with a cached word count"""
+    
+    __slots__ = ('kind', 'start', 'end', '_document', '_word_count')
+    
+    def __init__(self, kind, start, end, document):
+        self.kind = kind
+        self.start = start
+        self.end = end
+        self._document = document
+        self._word_count = None
+    
+    @property
+    def text(self):
+        return self._document[self.start:self.end]
+    
+    @property
+    def word_count(self):
+        if self._word_count is None:
+            self._word_count = len(self.text.split())
+        return self._word_count
+
+def _block_weight(name, attrs):
+    """(base score, whether it is boilerplate) for a main-content element other than a link"""
+    weight = CONTENT_BLOCK_WEIGHTS.get(name, 0)
+    boilerplate = name in BOILERPLATE_TAGS
+    role = attrs.get('role')
+    if role in BOILERPLATE_ROLES:
+        boilerplate = True
+    elif role == 'main':
+        weight += CLASS_WEIGHT
+    classes = attrs.get('class')
+    if not isinstance(classes, str):
+        classes = ' '.join(classes) if classes else ''
+    names = f"{classes} {attrs.get('id') or ''}"
+    if CONTENT_CLASS_PATTERN.search(names):
+        weight += CLASS_WEIGHT
+    elif BOILERPLATE_CLASS_PATTERN.search(names):
+        weight -= CLASS_WEIGHT
+        boilerplate = boilerplate or name not in SEMANTIC_CONTENT_TAGS
+    return weight, boilerplate
+
+def _paragraph_score(length, commas):
+    """What a paragraph of length stripped characters adds to its block"""
+    return 1 + commas + min(length // 100, 3)
+
+def _block_score(score, weight, link_characters, length):
+    """A block's final score: its paragraph score and base score, discounted by its link density"""
+    link_density = link_characters / length if length else 0
+    return (score + weight) * (1 - link_density)
+
+class ContentBlock:
+    """A main-content candidate: its tag, [start, end) span in the document text, enclosing candidate and base score"""
+    
+    __slots__ = ('name', 'start', 'end', 'parent', 'weight')
+    
+    def __init__(self, name, start, parent, weight):
+        self.name = name
+        self.start = start
+        self.end = None
+        self.parent = parent
+        self.weight = weight
+
+class ContentLayout:
+    """What main-content extraction reads: candidate blocks, link spans and the scoring paragraphs with their blocks"""
+    
+    __slots__ = ('blocks', 'links', 'paragraphs')
+    
+    def __init__(self, blocks, links, paragraphs):
+        self.blocks = blocks
+        # [start, end) spans of link text, in document order
+        self.links = links
+        # ([kind, start, end] span, index of the innermost candidate around it)
+        self.paragraphs = paragraphs
+    
+    def link_coverage(self):
+        """Function giving how many characters of link text lie before a text position"""
+        starts = []
+        ends = []
+        covered = [0]
+        for start, end in self.links:
+            # Links only overlap when one is nested in another; merge them so no text counts twice
+            if ends and start <= ends[-1]:
+                if end > ends[-1]:
+                    covered[-1] += end - ends[-1]
+                    ends[-1] = end
+                continue
+            starts.append(start)
+            ends.append(end)
+            covered.append(covered[-1] + end - start)
+        
+        def before(position):
+            index = bisect.bisect_right(starts, position) - 1
+            if index < 0:
+                return 0
+            return covered[index] + min(position, ends[index]) - starts[index]
+        return before
+    
+    def main_span(self, text):
+        """[start, end) of the block holding the page's main content, or None when no paragraph scores"""
+        blocks = self.blocks
+        scores = [0.0] * len(blocks)
+        for span, index in self.paragraphs:
+            paragraph = text[span[1]:span[2]].strip()
+            if len(paragraph) < MIN_SCORED_PARAGRAPH:
+                continue
+            score = _paragraph_score(len(paragraph), paragraph.count(','))
+            scores[index] += score
+            parent = blocks[index].parent
+            if parent is not None:
+                scores[parent] += score / 2
+        
+        links_before = self.link_coverage()
+        final_scores = {}
+        for index, score in enumerate(scores):
+            if score:
+                block = blocks[index]
+                link_characters = links_before(block.end) - links_before(block.start)
+                final_scores[index] = _block_score(score, block.weight, link_characters, block.end - block.start)
+        if not final_scores:
+            return None
+        
+        best = max(final_scores, key=final_scores.get)
+        # Content split over sibling blocks leaves their parent scoring close to the best of them
+        threshold = final_scores[best] * ANCESTOR_SCORE_SHARE
+        parent = blocks[best].parent
+        while parent is not None and final_scores.get(parent, 0) >= threshold:
+            best = parent
+            parent = blocks[best].parent
+        return blocks[best].start, blocks[best].end
+
+class TextModel:
+    """A page's visible text (what get_text() returns) and its block-level segments in document order.
+    
+    offset is where the text starts in the page's text: 0, or the start of the main content block for
+    the model main_content() returns.
+    """
+    
+    __slots__ = ('text', 'segments', 'headings', 'paragraphs', 'layout', 'offset', '_word_count', '_main')
+    
+    def __init__(self, text, segments, layout=None, offset=0):
+        self.text = text
+        self.segments = segments
+        self.headings = [segment for segment in segments if segment.kind == 'heading']
+        self.paragraphs = [segment for segment in segments if segment.kind == 'paragraph']
+        self.layout = layout
+        self.offset = offset
+        self._word_count = None
+        self._main = None
+    
+    @property
+    def word_count(self):
+        if self._word_count is None:
+            self._word_count = len(self.text.split())
+        return self._word_count
+    
+    def main_content(self):
+        """The main content block as a TextModel of its own, or this model when no block stands out; found once and cached"""
+        if self._main is None:
+            span = self.layout.main_span(self.text) if self.layout is not None else None
+            self._main = self if span is None else self.slice(*span)
+        return self._main
+    
+    def slice(self, start, end):
+        """The text in [start, end) with the segments that lie within it"""
+        text = self.text[start:end]
+        segments = [
+            TextSegment(segment.kind, segment.start - start, segment.end - start, text)
+            for segment in self.segments if start <= segment.start and segment.end <= end
+        ]
+        return TextModel(text, segments, offset=self.offset + start)
+
+class _ElementCollector:
+    """Accumulates analyzer inputs from start-tag and text events in document order"""
+    
+    def __init__(self):
+        self.text_parts = []
+        self.text_length = 0
+        # [kind, start, end] spans; a segment's text is exactly the strings added while it is open
+        self.spans = []
+        self.jsonld_blocks = []
+        self.link_hrefs = []
+        self.lists = 0
+        self.tables = 0
+        self.has_toc = False
+        self.has_author_meta = False
+        self.has_date_meta = False
+        self.has_author_bio = False
+        self.has_sources = False
+        self.element_count = 0
+        # Headings and paragraphs can nest, so several spans may be open at once
+        self.open_spans = []
+        self.blocks = []
+        self.link_spans = []
+        self.content_paragraphs = []
+        # Open main-content elements: a ContentBlock, a link's [start, end] span, or None for boilerplate
+        self.open_blocks = []
+        self.current_block = None
+        self.boilerplate_depth = 0
+    
+    def start_tag(self, name, attrs):
+        """Record a start tag; returns 'capture', 'block' or 'jsonld' when the walker must follow up"""
+        self.element_count += 1
+        if name == 'p':
+            self.open_span('paragraph')
+            return 'capture'
+        if name in HEADING_TAGS:
+            self.open_span('heading')
+            return 'capture'
+        if name == 'ul' or name == 'ol':
+            self.lists += 1
+        elif name == 'table':
+            self.tables += 1
+        elif name == 'a':
+            if 'href' in attrs:
+                self.add_link(attrs['href'] or '')
+        elif name == 'script':
+            if attrs.get('type') == 'application/ld+json':
+                return 'jsonld'
+        elif name == 'meta':
+            meta_name = attrs.get('name')
+            if meta_name and AUTHOR_META_PATTERN.search(meta_name):
+                self.has_author_meta = True
+            meta_property = attrs.get('property')
+            if meta_property and DATE_META_PATTERN.search(meta_property):
+                self.has_date_meta = True
+        elif name == 'div' or name == 'section' or name == 'nav':
+            classes = attrs.get('class')
+            if isinstance(classes, str):
+                classes = classes.split()
+            if name != 'section' and not self.has_toc:
+                self.has_toc = _class_matches(classes, TOC_CLASS_PATTERN)
+            if name != 'nav':
+                if not self.has_author_bio:
+                    self.has_author_bio = _class_matches(classes, AUTHOR_BIO_CLASS_PATTERN)
+                if not self.has_sources:
+                    self.has_sources = _class_matches(classes, SOURCES_CLASS_PATTERN)
+        if name in MAIN_CONTENT_TAGS:
+            return self.open_block(name, attrs)
+        return None
+    
+    def open_span(self, kind):
+        span = [kind, self.text_length, None]
+        self.spans.append(span)
+        self.open_spans.append(span)
+        if kind == 'paragraph' and self.current_block is not None and not self.boilerplate_depth:
+            self.content_paragraphs.append((span, self.current_block))
+    
+    def end_capture(self):
+        self.open_spans.pop()[2] = self.text_length
+    
+    def open_block(self, name, attrs):
+        """Start a link, a main-content candidate or a boilerplate element; returns 'block' so the walker ends it"""
+        if name == 'a':
+            entry = [self.text_length, None]
+            self.link_spans.append(entry)
+            self.open_blocks.append(entry)
+            return 'block'
+        
+        weight, boilerplate = _block_weight(name, attrs)
+        if boilerplate:
+            self.boilerplate_depth += 1
+            self.open_blocks.append(None)
+        else:
+            block = ContentBlock(name, self.text_length, self.current_block, weight)
+            self.current_block = len(self.blocks)
+            self.blocks.append(block)
+            self.open_blocks.append(block)
+        return 'block'
+    
+    def end_block(self):
+        entry = self.open_blocks.pop()
+        if entry is None:
+            self.boilerplate_depth -= 1
+        elif type(entry) is list:
+            entry[1] = self.text_length
+        else:
+            entry.end = self.text_length
+            self.current_block = entry.parent
+    
+    def add_link(self, href):
+        self.link_hrefs.append(href)
+    
+    def add_text(self, text):
+        self.text_parts.append(text)
+        self.text_length += len(text)
+    
+    def add_jsonld(self, text):
+        self.jsonld_blocks.append(text)
+    
+    def elements(self):
+        text = ''.join(self.text_parts)
+        layout = ContentLayout(self.blocks, self.link_spans, self.content_paragraphs)
+        return {
+            'text_model': TextModel(text, [TextSegment(kind, start, end, text) for kind, start, end in self.spans], layout),
+            'jsonld_blocks': self.jsonld_blocks,
+            'link_hrefs': self.link_hrefs,
+            'lists': self.lists,
+            'tables': self.tables,
+            'has_toc': self.has_toc,
+            'has_author_meta': self.has_author_meta,
+            'has_date_meta': self.has_date_meta,
+            'has_author_bio': self.has_author_bio,
+            'has_sources': self.has_sources,
+            'element_count': self.element_count
+        }
+
+def _walk_soup(soup, collector):
+    """Feed a BeautifulSoup tree to the collector without recursion"""
+    text_types = soup.interesting_string_types
+    stack = [iter(soup.contents)]
+    # The start_tag() kind of each element descended into, so its end can be reported
+    kinds = [None]
+    
+    while stack:
+        for node in stack[-1]:
+            if isinstance(node, NavigableString):
+                if type(node) in text_types:
+                    collector.add_text(node)
+                continue
+            if not isinstance(node, Tag):
+                continue
+            
+            kind = collector.start_tag(node.name, node.attrs)
+            if kind == 'jsonld':
+                collector.add_jsonld(node.string)
+            if node.contents:
+                stack.append(iter(node.contents))
+                kinds.append(kind)
+                break
+            if kind == 'capture':
+                collector.end_capture()
+            elif kind == 'block':
+                collector.end_block()
+        else:
+            stack.pop()
+            kind = kinds.pop()
+            if kind == 'capture':
+                collector.end_capture()
+            elif kind == 'block':
+                collector.end_block()
+
+def _walk_lexbor(tree, collector):
+    """Feed a selectolax/lexbor tree to the collector without recursion"""
+    node = tree.root
+    # Each entry is (node, start_tag() kind, skip_text, preserve_space) for an element we descended into
+    stack = []
+    skip_text = False
+    preserve_space = False
+    
+    while node is not None:
+        tag = node.tag
+        if tag == '-text':
+            if not skip_text:
+                text = node.text_content
+                # BeautifulSoup collapses whitespace-only strings outside <pre>/<textarea>
+                if not preserve_space and not text.translate(ASCII_SPACES):
+                    text = '\n' if '\n' in text else ' '
+                collector.add_text(text)
+        elif tag[0] != '-' and tag != '!doctype':
+            kind = collector.start_tag(tag, node.attributes)
+            if kind == 'jsonld':
+                collector.add_jsonld(node.text(deep=True))
+            if node.child is not None:
+                stack.append((node, kind, skip_text, preserve_space))
+                skip_text = skip_text or tag in NON_TEXT_CONTAINERS
+                preserve_space = preserve_space or tag in WHITESPACE_PRESERVING_TAGS
+                node = node.child
+                continue
+            if kind == 'capture':
+                collector.end_capture()
+            elif kind == 'block':
+                collector.end_block()
+        
+        while node.next is None and stack:
+            node, kind, skip_text, preserve_space = stack.pop()
+            if kind == 'capture':
+                collector.end_capture()
+            elif kind == 'block':
+                collector.end_block()
+        node = node.next
+
+def collect_page_elements(soup, scope=None):
+    """Walk the parsed page once and gather everything the analyzers read; scope picks the text the text analyzers read"""
+    collector = _ElementCollector()
+    if isinstance(soup, BeautifulSoup):
+        _walk_soup(soup, collector)
+    else:
+        _walk_lexbor(soup, collector)
+    elements = collector.elements()
+    elements['content_scope'] = resolve_content_scope(scope)
+    return elements
+
+def content_text_model(elements):
+    """The TextModel the text analyzers read: the main content block, or the whole page in the 'full' scope"""
+    text_model = elements['text_model']
+    return text_model.main_content() if elements['content_scope'] == 'main' else text_model
+
+def _text_and_byte_patterns(pattern, flags=0):
+    return {str: re.compile(pattern, flags), bytes: re.compile(pattern.encode('ascii'), flags)}
+
+# JSON-LD is found in the raw page the way html.parser tokenizes it: tags, comments and declarations are
+# stepped over whole and script and style contents are raw text, so markup quoted inside any of them never counts
+JSONLD_TYPE = 'application/ld+json'
+# Group 1: a comment; group 2: a start tag's name; otherwise an end tag, declaration or processing instruction
+MARKUP_START_PATTERNS = _text_and_byte_patterns(r'<(?:(!--)|([a-zA-Z][^\t\n\r\f />\x00]*)|[/!?])')
+COMMENT_END_PATTERNS = _text_and_byte_patterns(r'--\s*>')
+TAG_END_PATTERNS = _text_and_byte_patterns(r'>')
+# A start tag's attributes always match; what follows them decides whether the tag is complete
+START_TAG_ATTRIBUTES = r"""(?:\s|/(?!>))*(?:[\s/]*(?:(?<=['"\s/])[^\s/>][^\s/=>]*(?:\s*=+\s*(?:'[^']*'|"[^"]*"|(?!['"])[^>\s]*)\s*)?(?:\s|/(?!>))*)*)?\s*"""
+START_TAG_ATTRIBUTES_PATTERNS = _text_and_byte_patterns(START_TAG_ATTRIBUTES)
+# Text and well-formed markup with nothing to look into, skipped in one match: end tags, declarations and
+# start tags other than script and style. A tag without quotes always ends at its first '>'; for the rest, a
+# lookahead plus backreference keeps a tag that turns out not to be closed from being backtracked into.
+MARKUP_SKIP_PATTERNS = _text_and_byte_patterns(
+    r'(?:[^<]+|<(?![a-zA-Z!/?])|</[^>]*>|<\?[^>]*>|<!(?!--)[^>]*>|<(?!(?:script|style)[\t\n\r\f />\x00])'
+    rf'''(?:[a-zA-Z][^<>"'\x00]*>|(?=([a-zA-Z][^\t\n\r\f />\x00]*{START_TAG_ATTRIBUTES}))\1/?>))*''',
+    re.I
+)
+START_TAG_CLOSE_PATTERNS = _text_and_byte_patterns(r'/?>')
+START_TAG_INCOMPLETE_PATTERNS = _text_and_byte_patterns(r'[/=a-zA-Z]|\Z')
+RAW_TEXT_END_PATTERNS = {
+    name: _text_and_byte_patterns(rf'</\s*{name}\s*>', re.I) for name in ('script', 'style')
+}
+# html.parser's attribute syntax, for reading a script tag's type
+TAG_ATTRIBUTE_PATTERN = re.compile(r"""((?<=['"\s/])[^\s/>][^\s/=>]*)(\s*=+\s*('[^']*'|"[^"]*"|(?!['"])[^>\s]*))?(?:\s|/(?!>))*""")
+TAG_NAME_END_PATTERN = re.compile(r'(?:\s|/(?!>))*')
+# A prefixed or full IRI type (schema:FAQPage, https://schema.org/FAQPage) is counted under its local name
+SCHEMA_TYPE_PREFIX_PATTERN = re.compile(r'^.*[/#:]')
+
+def _script_type(tag):
+    """The type attribute of a '<script ...' start tag's text, as BeautifulSoup reads it; later duplicates win"""
+    script_type = None
+    position = TAG_NAME_END_PATTERN.match(tag, len('<script')).end()
+    while position < len(tag):
+        match = TAG_ATTRIBUTE_PATTERN.match(tag, position)
+        if match is None:
+            break
+        name, value = match.group(1), match.group(3)
+        if name.lower() == 'type':
+            if value and value[0] in '\'"' and value[-1] == value[0]:
+                value = value[1:-1]
+            script_type = unescape_html(value) if value else ''
+        position = match.end()
+    return script_type
+
+def _start_tag_end(html, kind, position):
+    """Where a start tag whose name ends at position ends and whether it closes itself; None if the page ends inside it"""
+    attributes_end = START_TAG_ATTRIBUTES_PATTERNS[kind].match(html, position).end()
+    close = START_TAG_CLOSE_PATTERNS[kind].match(html, attributes_end)
+    if close is not None:
+        return close.end(), close.end() - attributes_end == 2
+    if START_TAG_INCOMPLETE_PATTERNS[kind].match(html, attributes_end):
+        return None, False
+    # Any other character ends the tag where the attributes stop
+    return attributes_end, False
+
+def scan_jsonld_blocks(html):
+    """Yield the contents of each JSON-LD script in a page's text or ASCII-compatible bytes, as slices of it"""
+    kind = type(html)
+    position = 0
+    while True:
+        position = MARKUP_SKIP_PATTERNS[kind].match(html, position).end()
+        markup = MARKUP_START_PATTERNS[kind].search(html, position)
+        if markup is None:
+            return
+        start = markup.start()
+        name = markup.group(2)
+        self_closing = False
+        if name is None:
+            end = (COMMENT_END_PATTERNS if markup.group(1) else TAG_END_PATTERNS)[kind].search(html, markup.end())
+            end = end.end() if end is not None else None
+        else:
+            end, self_closing = _start_tag_end(html, kind, markup.end())
+        if end is None:
+            # html.parser reads markup the page ends inside of as text up to the next '>'. With no '>' left,
+            # nothing after it can be a complete tag, comment or script either.
+            end = TAG_END_PATTERNS[kind].search(html, start + 1)
+            if end is None:
+                return
+            position = end.end()
+            continue
+        if name is None:
+            position = end
+            continue
+        
+        name = (name.decode('latin-1') if kind is bytes else name).lower()
+        jsonld = False
+        if name == 'script':
+            tag = html[start:end]
+            jsonld = _script_type(tag.decode('latin-1') if kind is bytes else tag) == JSONLD_TYPE
+        if self_closing or name not in RAW_TEXT_END_PATTERNS:
+            # <script/> is an empty element; what follows it is ordinary markup
+            if jsonld:
+                yield html[end:end]
+            position = end
+            continue
+        contents_end = RAW_TEXT_END_PATTERNS[name][kind].search(html, end)
+        if jsonld:
+            # html.parser drops the text of a script the page ends inside of
+            yield html[end:contents_end.start() if contents_end is not None else end]
+        if contents_end is None:
+            return
+        position = contents_end.end()
+
+@functools.lru_cache(maxsize=None)
+def _fast_json_loads():
+    """orjson.loads when orjson is installed, else None"""
+    if importlib.util.find_spec('orjson') is None:
+        return None
+    import orjson
+    return orjson.loads
+
+def load_jsonld(block, encoding='utf-8'):
+    """Parse a JSON-LD block (text, or bytes in encoding) with orjson when it is installed, else json.
+    
+    orjson reads UTF-8 bytes without decoding them first. Blocks it rejects (NaN, lone surrogate
+    escapes) are retried with json on the decoded text, so whether a block parses never depends
+    on which library is installed. Raises ValueError when the block isn't JSON.
+    """
+    fast_loads = _fast_json_loads()
+    if isinstance(block, bytes):
+        if fast_loads is not None and encoding == 'utf-8':
+            try:
+                return fast_loads(block)
+            except ValueError:
+                fast_loads = None
+        block = decode_body(block, encoding)
+    if fast_loads is not None:
+        try:
+            return fast_loads(block)
+        except ValueError:
+            pass
+    try:
+        return json.loads(block)
+    except RecursionError:
+        raise ValueError("JSON-LD nested too deeply") from None
+
+@functools.lru_cache(maxsize=4096)
+def _schema_type(value):
+    """An @type's local name, and what analyze_schema() reports it as: 'faq', 'howto', 'article' or None"""
+    name = SCHEMA_TYPE_PREFIX_PATTERN.sub('', value)
+    lowered = name.lower()
+    if 'faqpage' in lowered:
+        return name, 'faq'
+    if lowered == 'howto':
+        return name, 'howto'
+    if 'article' in lowered:
+        return name, 'article'
+    return name, None
+
+def _entry_count(value):
+    """Entries in a JSON-LD property: an array's length, or one for a single value"""
+    if isinstance(value, list):
+        return len(value)
+    return 1 if value else 0
+
+class JsonLdIndex:
+    """Every schema type a page's JSON-LD declares, with counts, plus what analyze_schema() reports.
+    
+    Blocks are walked without recursion through arrays, @graph containers and nested entities. A node
+    typed with an array counts once under each of its types; FAQ questions and HowTo steps are summed
+    over every FAQPage and HowTo node on the page.
+    """
+    
+    __slots__ = ('types', 'blocks', 'invalid_blocks', 'faq_present', 'faq_count', 'howto_present', 'howto_count', 'article_present')
+    
+    def __init__(self):
+        self.types = Counter()
+        self.blocks = 0
+        self.invalid_blocks = 0
+        self.faq_present = False
+        self.faq_count = 0
+        self.howto_present = False
+        self.howto_count = 0
+        self.article_present = False
+    
+    def add_block(self, block, encoding='utf-8'):
+        """Index one script's contents (text, or bytes in encoding); blocks that aren't JSON are counted and skipped"""
+        self.blocks += 1
+        if not block:
+            return
+        try:
+            data = load_jsonld(block, encoding)
+        except ValueError:
+            self.invalid_blocks += 1
+            return
+        
+        # Only objects and arrays go on the stack; @context holds term definitions, not entities
+        stack = [data] if isinstance(data, (dict, list)) else []
+        while stack:
+            node = stack.pop()
+            if type(node) is dict:
+                if '@type' in node:
+                    self.add_node(node)
+                values = node.values() if '@context' not in node else [v for k, v in node.items() if k != '@context']
+            else:
+                values = node
+            for value in values:
+                if type(value) is dict or type(value) is list:
+                    stack.append(value)
+    
+    def add_node(self, node):
+        types = node['@type']
+        faq = howto = False
+        for value in types if isinstance(types, list) else (types,):
+            if isinstance(value, str):
+                name, kind = _schema_type(value)
+                self.types[name] += 1
+                if kind == 'faq':
+                    faq = True
+                elif kind == 'howto':
+                    howto = True
+                elif kind == 'article':
+                    self.article_present = True
+        if faq:
+            self.faq_present = True
+            self.faq_count += _entry_count(node.get('mainEntity'))
+        if howto:
+            self.howto_present = True
+            self.howto_count += _entry_count(node.get('step'))
+    
+    def schema_result(self):
+        """analyze_schema()'s result, with the type index most frequent first"""
+        return {
+            'faq_present': self.faq_present,
+            'faq_count': self.faq_count,
+            'howto_present': self.howto_present,
+            'howto_count': self.howto_count,
+            'article_present': self.article_present,
+            'schema_types': [
+                {'type': name, 'count': count}
+                for name, count in sorted(self.types.items(), key=lambda item: (-item[1], item[0]))
+            ]
+        }
+
+@functools.lru_cache(maxsize=None)
+def _scans_as_bytes(encoding):
+    """True for UTF-8 and single-byte ASCII supersets (windows-1252, latin-1...), whose markup can be found in the raw bytes"""
+    return encoding == 'utf-8' or (_is_single_byte(encoding) and bytes(range(128)).decode(encoding, errors='replace') == ''.join(map(chr, range(128))))
+
+def extract_jsonld(html, encoding=None):
+    """Index the JSON-LD in a page's text, or its bytes in encoding (sniffed when None), without parsing the HTML"""
+    index = JsonLdIndex()
+    if isinstance(html, bytes):
+        encoding = _lookup_encoding(encoding or resolve_encoding(html)[0]) or 'utf-8'
+        if encoding == 'utf-8-sig':
+            encoding = 'utf-8'
+        if not _scans_as_bytes(encoding):
+            html = decode_body(html, encoding)
+    for block in scan_jsonld_blocks(html):
+        index.add_block(block, encoding)
+    return index
+
+def analyze_schema(soup, elements=None):
+    """Analyze structured data/schema markup"""
+    if elements is None:
+        elements = collect_page_elements(soup)
+    
+    index = JsonLdIndex()
+    for block in elements['jsonld_blocks']:
+        index.add_block(block)
+    return index.schema_result()
+
+# A heading is a question when it opens with one of these (lowercased) or ends with '?'
+QUESTION_WORDS = ('what', 'why', 'how', 'when', 'where', 'who', 'which', 'can', 'is', 'are', 'do', 'does')
+
+def analyze_questions(soup, elements=None):
+    """Analyze question-based content"""
+    if elements is None:
+        elements = collect_page_elements(soup)
+    headings = elements['text_model'].headings
+    
+    question_headings = []
+    
+    for heading in headings:
+        heading_text = heading.text.strip()
+        text = heading_text.lower()
+        if text.startswith(QUESTION_WORDS) or text.endswith('?'):
+            question_headings.append(heading_text)
+    
+    return {
+        'total_headings': len(headings),
+        'question_headings': len(question_headings),
+        'question_heading_examples': question_headings[:5]
+    }
+
+def analyze_snippet_optimization(soup, elements=None):
+    """Analyze featured snippet readiness"""
+    if elements is None:
+        elements = collect_page_elements(soup)
+    paragraphs = elements['text_model'].paragraphs
+    first_para_words = 0
+    
+    if paragraphs:
+        first_para_words = paragraphs[0].word_count
+    
+    lists = elements['lists']
+    tables = elements['tables']
+    
+    short_paragraphs = 0
+    for p in paragraphs:
+        word_count = p.word_count
+        if 40 <= word_count <= 60:
+            short_paragraphs += 1
+    
+    return snippet_summary(first_para_words, lists, tables, short_paragraphs)
+
+def snippet_summary(first_para_words, lists, tables, short_paragraphs):
+    """analyze_snippet_optimization()'s result from its counts"""
+    snippet_score = 0
+    if first_para_words >= 40 and first_para_words <= 60:
+        snippet_score += 30
+    if lists > 0:
+        snippet_score += 25
+    if tables > 0:
+        snippet_score += 20
+    if short_paragraphs >= 3:
+        snippet_score += 25
+    
+    return {
+        'first_para_words': first_para_words,
+        'lists': lists,
+        'tables': tables,
+        'short_paragraphs': short_paragraphs,
+        'snippet_score': min(snippet_score, 100)
+    }
+
+# Readability: textstat's Flesch Reading Ease over the whole text model, counted in one
+# linear pass. Words, sentences and syllables are counted exactly as textstat counts them,
+# so with the same syllable source the page score equals textstat.flesch_reading_ease()
+# on the full text to within float rounding. The only exception is a word glued to the
+# heading after it with no whitespace between them ("end.Next heading"), which
+# section-splitting counts as two words. check_readability.py holds the page score to
+# within 0.1 points of textstat's on the fixtures (the score is rounded to one decimal).
+# Each distinct token is looked up once per text and memoized across pages, so a
+# 100k-word page of ordinary prose scores in about 40 ms warm; a token never seen
+# before costs about 40 us in pyphen, so 100k distinct unseen words take about 4 s.
+FLESCH_BASE = 206.835
+FLESCH_SENTENCE_LENGTH_WEIGHT = 1.015
+FLESCH_SYLLABLES_PER_WORD_WEIGHT = 84.6
+SENTENCE_PATTERN = re.compile(r"\b[^.!?]+[.!?]*")
+# textstat ignores "sentences" of two words or fewer; a word is any token with a word character left after punctuation removal
+COUNTED_SENTENCE_PATTERN = re.compile(r"(?:\W*\w\S*(?!\S)){3}")
+# textstat's remove_punctuation(): non-contraction apostrophes and everything that isn't a word character or space
+PUNCTUATION_PATTERN = re.compile(r"'(?![tsd]|ve|ll|re)|[^\w\s']")
+SYLLABLE_CACHE_SIZE = int(os.environ.get('AEO_SYLLABLE_CACHE_SIZE', 100000))
+SECTION_TITLE_LENGTH = 120
+# Sections reported per page; later sections still count toward the page-wide score
+READABILITY_SECTION_LIMIT = 50
+
+@functools.lru_cache(maxsize=None)
+def get_pronouncing_dictionary():
+    """nltk's CMU pronouncing dictionary if it is installed locally (textstat's first syllable source), else None"""
+    try:
+        import nltk
+        nltk.data.find('corpora/cmudict')
+        return nltk.corpus.cmudict.dict()
+    except (ImportError, LookupError, OSError):
+        return None
+
+@functools.lru_cache(maxsize=None)
+def get_hyphenator():
+    return pyphen.Pyphen(lang='en_US')
+
+@functools.lru_cache(maxsize=SYLLABLE_CACHE_SIZE)
+def token_syllables(token):
+    """(words, syllables) for one whitespace-separated token; memoized across every page in the process"""
+    word = PUNCTUATION_PATTERN.sub('', token).lower()
+    if not word:
+        return 0, 0
+    pronunciations = get_pronouncing_dictionary()
+    if pronunciations is not None and pronunciations.get(word):
+        return 1, sum(1 for phone in pronunciations[word][0] if phone[-1].isdigit())
+    return 1, len(get_hyphenator().positions(word)) + 1
+
+def warm_readability():
+    """Load the syllable sources now so the first audit in a fresh process doesn't pay for them"""
+    get_pronouncing_dictionary()
+    get_hyphenator().positions('readability')
+
+def count_words_and_syllables(text):
+    """Word and syllable totals for a piece of text, looking each distinct token up once"""
+    words = syllables = 0
+    for token, count in Counter(text.split()).items():
+        token_words, token_syllable_count = token_syllables(token)
+        words += token_words * count
+        syllables += token_syllable_count * count
+    return words, syllables
+
+def flesch_reading_ease(words, sentences, syllables):
+    """Flesch Reading Ease from counts, with textstat's zero-guards"""
+    if not words or not sentences or not syllables:
+        return 0.0
+    return (
+        FLESCH_BASE
+        - FLESCH_SENTENCE_LENGTH_WEIGHT * (words / sentences)
+        - FLESCH_SYLLABLES_PER_WORD_WEIGHT * (syllables / words)
+    )
+
+def readability_section(title, words, sentences, syllables):
+    """One entry of the per-section readability list; title is the heading's text, or None before the first heading"""
+    return {
+        'heading': ' '.join(title.split())[:SECTION_TITLE_LENGTH] if title is not None else None,
+        'word_count': words,
+        'flesch_reading_ease': round(flesch_reading_ease(words, max(1, sentences), syllables), 1)
+    }
+
+def analyze_readability(text_model):
+    """Page-wide Flesch score plus one score per heading section (and the text before the first heading), up to READABILITY_SECTION_LIMIT of them.
+    
+    The page score matches textstat.flesch_reading_ease() on the same text to within 0.1 points.
+    """
+    text = text_model.text
+    bounds = [0] + sorted({heading.start for heading in text_model.headings if heading.start > 0})
+    titles = {heading.start: heading.text for heading in reversed(text_model.headings)}
+    
+    # Sentences are found over the whole text, as textstat does, and credited to the section they start in
+    sentence_counts = [0] * len(bounds)
+    for match in SENTENCE_PATTERN.finditer(text):
+        if COUNTED_SENTENCE_PATTERN.match(text, match.start(), match.end()):
+            sentence_counts[bisect.bisect_right(bounds, match.start()) - 1] += 1
+    
+    sections = []
+    total_words = total_syllables = 0
+    for start, end, sentences in zip(bounds, bounds[1:] + [len(text)], sentence_counts):
+        words, syllables = count_words_and_syllables(text[start:end])
+        if not words:
+            continue
+        total_words += words
+        total_syllables += syllables
+        if len(sections) < READABILITY_SECTION_LIMIT:
+            sections.append(readability_section(titles.get(start), words, sentences, syllables))
+    
+    return {
+        'flesch_reading_ease': round(flesch_reading_ease(total_words, max(1, sum(sentence_counts)), total_syllables), 1),
+        'sections': sections
+    }
+
+TLDR_PATTERN = re.compile(r'(tl;?dr|summary|key takeaways)', re.IGNORECASE)
+
+def analyze_structure(soup, elements=None):
+    """Analyze content structure"""
+    try:
+        if elements is None:
+            elements = collect_page_elements(soup)
+        text_model = content_text_model(elements)
+        text = text_model.text
+        
+        has_tldr = bool(TLDR_PATTERN.search(text))
+        has_toc = elements['has_toc']
+        
+        paragraphs = text_model.paragraphs
+        if paragraphs:
+            total_words = sum(p.word_count for p in paragraphs)
+            avg_para_length = total_words / len(paragraphs)
+        else:
+            avg_para_length = 0
+        
+        word_count = text_model.word_count
+        readability = analyze_readability(text_model)
+        
+        return {
+            'has_tldr': has_tldr,
+            'has_toc': has_toc,
+            'avg_para_length': round(avg_para_length, 1),
+            'word_count': word_count,
+            'flesch_reading_ease': readability['flesch_reading_ease'],
+            'readability_sections': readability['sections']
+        }
+    except Exception as e:
+        # Return default values if analysis fails
+        return {
+            'has_tldr': False,
+            'has_toc': False,
+            'avg_para_length': 0,
+            'word_count': 0,
+            'flesch_reading_ease': 0,
+            'readability_sections': []
+        }
+
+# Entities: runs of capitalized words on one line. The pattern starts with the capital so the
+# regex engine can skip ahead to candidates, checks the word boundary with a lookbehind, and
+# captures the preceding character when the phrase sits mid-sentence ("..., Claude" or "ask Google";
+# title-case headings don't count).
+ENTITY_PATTERN = re.compile(r'([A-Z](?<!\w[A-Z])(?:(?<=([a-z\d,;:])[^\S\r\n][A-Z]))?[a-z]+(?:[^\S\r\n]+[A-Z][a-z]+)*)\b')
+# Capitalized only because they open a sentence or heading; stripped from the front of a phrase
+ENTITY_STOPWORDS = frozenset((
+    'a', 'about', 'after', 'all', 'also', 'an', 'and', 'any', 'are', 'as', 'at', 'be', 'because', 'before',
+    'both', 'but', 'by', 'can', 'could', 'did', 'do', 'does', 'each', 'even', 'every', 'for', 'from', 'has',
+    'have', 'he', 'her', 'here', 'his', 'how', 'i', 'if', 'in', 'into', 'is', 'it', 'its', 'just', 'let',
+    'many', 'may', 'me', 'more', 'most', 'much', 'my', 'no', 'not', 'now', 'of', 'on', 'once', 'one', 'only', 'or',
+    'our', 'so', 'some', 'she', 'should', 'since', 'such', 'than', 'that', 'the', 'their', 'them', 'then', 'there',
+    'these', 'they', 'this', 'those', 'to', 'too', 'under', 'unless', 'until', 'us', 'use', 'using', 'very', 'was',
+    'we', 'were', 'what', 'when', 'where', 'whether', 'which', 'while', 'who', 'why', 'will', 'with',
+    'would', 'yes', 'you', 'your'
+))
+ENTITY_REPORT_LIMIT = 25
+
+def extract_entities(text):
+    """(entity, count) pairs over the whole text, most frequent first and ties in order of first appearance"""
+    # Counting raw matches in C first leaves only the distinct phrases for the Python loop
+    return rank_entities(Counter(ENTITY_PATTERN.findall(text)))
+
+def rank_entities(phrase_counts):
+    """extract_entities() from a Counter of ENTITY_PATTERN matches, in order of first appearance"""
+    counts = {}
+    confirmed = set()
+    for (phrase, preceding), occurrences in phrase_counts.items():
+        words = phrase.split()
+        skipped = 0
+        while skipped < len(words) and words[skipped].lower() in ENTITY_STOPWORDS:
+            skipped += 1
+        if skipped == len(words):
+            continue
+        entity = ' '.join(words[skipped:])
+        counts[entity] = counts.get(entity, 0) + occurrences
+        # A lone capitalized word counts once it is seen mid-sentence, so "Start with..." or nav labels don't
+        if preceding or len(words) - skipped > 1:
+            confirmed.add(entity)
+    return sorted(((entity, count) for entity, count in counts.items() if entity in confirmed), key=lambda item: -item[1])
+
+def entity_summary(entities):
+    """analyze_entities()'s result from ranked (entity, count) pairs"""
+    return {
+        'entities_found': len(entities),
+        'entity_examples': [entity for entity, _ in entities[:10]],
+        'top_entities': [{'entity': entity, 'count': count} for entity, count in entities[:ENTITY_REPORT_LIMIT]]
+    }
+
+def analyze_entities(soup, elements=None):
+    """Capitalized-phrase entities across the page's content text, ranked by frequency"""
+    try:
+        if elements is None:
+            elements = collect_page_elements(soup)
+        return entity_summary(extract_entities(content_text_model(elements).text))
+    except Exception:
+        return {
+            'entities_found': 0,
+            'entity_examples': [],
+            'top_entities': []
+        }
+
+def analyze_eeat(soup, url, elements=None):
+    """Analyze E-E-A-T signals"""
+    if elements is None:
+        elements = collect_page_elements(soup)
+    
+    has_author_meta = elements['has_author_meta']
+    has_date = elements['has_date_meta']
+    has_author_bio = elements['has_author_bio']
+    
+    links = elements['link_hrefs']
+    has_about_link = any('about' in href.lower() for href in links)
+    has_contact_link = any('contact' in href.lower() for href in links)
+    
+    has_sources = elements['has_sources']
+    
+    return {
+        'has_author_meta': has_author_meta,
+        'has_date': has_date,
+        'has_author_bio': has_author_bio,
+        'has_about_link': has_about_link,
+        'has_contact_link': has_contact_link,
+        'has_sources': has_sources
+    }
+
+def analyze_page(soup, url, timer=NULL_TIMER, jsonld=None, scope=None):
+    """Run every analyzer off a single walk of the parsed page; jsonld is the page's JsonLdIndex when already extracted.
+    
+    scope ('main' or 'full', default CONTENT_SCOPE) is the text the structure and entity analyzers read.
+    """
+    with timer.stage('collect_elements'):
+        elements = collect_page_elements(soup, scope)
+    timer.count('elements', elements['element_count'])
+    timer.count('headings', len(elements['text_model'].headings))
+    timer.count('paragraphs', len(elements['text_model'].paragraphs))
+    timer.count('links', len(elements['link_hrefs']))
+    timer.count('jsonld_blocks', jsonld.blocks if jsonld is not None else len(elements['jsonld_blocks']))
+    timer.count('text_characters', len(elements['text_model'].text))
+    
+    # Found once here; the text analyzers reuse the cached block
+    with timer.stage('main_content'):
+        content = content_text_model(elements)
+    timer.count('content_characters', len(content.text))
+    
+    with timer.stage('analyze_schema'):
+        schema = jsonld.schema_result() if jsonld is not None else analyze_schema(soup, elements)
+    with timer.stage('analyze_questions'):
+        questions = analyze_questions(soup, elements)
+    with timer.stage('analyze_snippet_optimization'):
+        snippet = analyze_snippet_optimization(soup, elements)
+    with timer.stage('analyze_structure'):
+        structure = analyze_structure(soup, elements)
+    with timer.stage('analyze_entities'):
+        entities = analyze_entities(soup, elements)
+    with timer.stage('analyze_eeat'):
+        eeat = analyze_eeat(soup, url, elements)
+    return {
+        'schema': schema,
+        'questions': questions,
+        'snippet': snippet,
+        'structure': structure,
+        'entities': entities,
+        'eeat': eeat,
+        # Which text structure and entities describe, so stored audits are only compared like for like
+        'content_scope': elements['content_scope']
+    }
+
+# Streaming analysis: pages this large (in bytes, or characters for text) are analyzed as html.parser
+# tokenizes them, without a tree; a BeautifulSoup tree costs many times the page's size in memory
+STREAM_ANALYSIS_BYTES = int(os.environ.get('AEO_STREAM_ANALYSIS_BYTES', 4 * 1024 * 1024))
+# Heading text kept while streaming; question checks and section titles only read its start and last character
+STREAM_HEADING_TEXT_LIMIT = 2048
+# Distinct entity phrases counted while streaming; past it the rarest are dropped (see _StreamingCollector)
+STREAM_PHRASE_LIMIT = 20000
+# The sentences SENTENCE_PATTERN finds: each starts at a word character and ends after its run of terminators
+SENTENCE_START_PATTERN = re.compile(r'\w')
+SENTENCE_END_PATTERN = re.compile(r'[.!?]')
+SENTENCE_CONTINUES_PATTERN = re.compile(r'[^.!?]')
+# The tokens COUNTED_SENTENCE_PATTERN counts: whitespace-delimited, with a word character in them
+WORD_TOKEN_PATTERN = re.compile(r'[^\w\s]*\w\S*')
+TOKEN_REST_PATTERN = re.compile(r'\S*')
+# ENTITY_PATTERN only matches letters and horizontal spaces, so no phrase runs past any other character
+ENTITY_BREAK_PATTERN = re.compile(r'[\r\n]|[^\sA-Za-z]')
+# Longest TLDR_PATTERN match, less one: how much text a match can carry over from the previous string
+TLDR_CARRY = len('key takeaways') - 1
+# How BeautifulSoup's html.parser builder treats tags: void tags close at once, strings in these containers aren't text
+EMPTY_ELEMENT_TAGS = frozenset(HTMLTreeBuilder.DEFAULT_EMPTY_ELEMENT_TAGS)
+STRING_CONTAINER_TAGS = frozenset(HTMLTreeBuilder.DEFAULT_STRING_CONTAINERS)
+
+class _StreamSpan:
+    """An open paragraph or heading while streaming: its running word count and, for headings, the start of its text"""
+    
+    __slots__ = ('kind', 'index', 'start', 'words', 'in_token', 'parts', 'length', 'last_char', 'section')
+    
+    def __init__(self, kind, index, start):
+        self.kind = kind
+        self.index = index
+        self.start = start
+        self.words = 0
+        self.in_token = False
+        self.parts = [] if kind == 'heading' else None
+        self.length = 0
+        self.last_char = ''
+        # The readability section this heading titles, if any
+        self.section = None
+    
+    @property
+    def text(self):
+        return ''.join(self.parts)
+
+class _StreamingContentLocator(_ElementCollector):
+    """Finds the span ContentLayout.main_span() would pick while the page streams past, without keeping its layout.
+    
+    A paragraph's score reaches its blocks when it closes and a block's final score is known when it
+    closes, which is before any of its ancestors close. So only the open elements and the best block so
+    far, with how far it has widened to its ancestors, are held.
+    """
+    
+    def __init__(self):
+        super().__init__()
+        self.block_count = 0
+        self.link_depth = 0
+        # Characters of link text so far; a block's link text is the difference between its end and start
+        self.link_characters = 0
+        # (final score, index) of the best block so far, the span it has widened to and the ancestor it waits for
+        self.best = None
+        self.threshold = None
+        self.span = None
+        self.next_ancestor = None
+    
+    def start_tag(self, name, attrs):
+        if name == 'p':
+            self.open_span('paragraph')
+            return 'capture'
+        if name in MAIN_CONTENT_TAGS:
+            return self.open_block(name, attrs)
+        return None
+    
+    def open_span(self, kind):
+        # A scoring paragraph is [block, start of its stripped text, end of it, commas]; others are None
+        scoring = self.current_block is not None and not self.boilerplate_depth
+        self.open_spans.append([self.current_block, None, None, 0] if scoring else None)
+    
+    def end_capture(self):
+        paragraph = self.open_spans.pop()
+        if paragraph is None or paragraph[1] is None or paragraph[2] - paragraph[1] < MIN_SCORED_PARAGRAPH:
+            return
+        score = _paragraph_score(paragraph[2] - paragraph[1], paragraph[3])
+        block = paragraph[0]
+        block[4] += score
+        if block[2] is not None:
+            block[2][4] += score / 2
+    
+    def open_block(self, name, attrs):
+        if name == 'a':
+            self.link_depth += 1
+            self.open_blocks.append(name)
+            return 'block'
+        weight, boilerplate = _block_weight(name, attrs)
+        if boilerplate:
+            self.boilerplate_depth += 1
+            self.open_blocks.append(None)
+        else:
+            # [index, start, enclosing block, base score, paragraph score, link characters before it]
+            block = [self.block_count, self.text_length, self.current_block, weight, 0, self.link_characters]
+            self.block_count += 1
+            self.current_block = block
+            self.open_blocks.append(block)
+        return 'block'
+    
+    def end_block(self):
+        entry = self.open_blocks.pop()
+        if entry is None:
+            self.boilerplate_depth -= 1
+        elif entry == 'a':
+            self.link_depth -= 1
+        else:
+            self.current_block = entry[2]
+            self._close_block(entry)
+    
+    def _close_block(self, block):
+        index, start, parent, weight, score, links_before = block
+        end = self.text_length
+        final_score = _block_score(score, weight, self.link_characters - links_before, end - start) if score else 0
+        if block is self.next_ancestor:
+            if final_score >= self.threshold:
+                self.span = (start, end)
+                self.next_ancestor = parent
+            else:
+                self.next_ancestor = None
+        # Ties go to the block that opened first, as max() over the blocks in order would
+        if score and (self.best is None or final_score > self.best[0] or (final_score == self.best[0] and index < self.best[1])):
+            self.best = (final_score, index)
+            self.threshold = final_score * ANCESTOR_SCORE_SHARE
+            self.span = (start, end)
+            self.next_ancestor = parent
+    
+    def add_text(self, text):
+        position = self.text_length
+        self.text_length += len(text)
+        if self.link_depth:
+            self.link_characters += len(text)
+        if not any(self.open_spans):
+            return
+        leading = len(text) - len(text.lstrip())
+        if leading == len(text):
+            return
+        end = position + len(text.rstrip())
+        commas = text.count(',')
+        for paragraph in self.open_spans:
+            if paragraph is not None:
+                if paragraph[1] is None:
+                    paragraph[1] = position + leading
+                paragraph[2] = end
+                paragraph[3] += commas
+
+class _StreamingCollector(_ElementCollector):
+    """An _ElementCollector that folds text into running counts as it arrives instead of keeping it.
+    
+    Words, sentences, syllables and entity phrases are counted just as the analyzers count them over
+    the joined text: whatever a string ends in the middle of (a token, a sentence, a phrase) carries
+    over to the next string. With a window, the [start, end) span of the main content block in the
+    page's text, the structure and entity counts only take in the text, paragraphs and headings
+    within it, as the analyzers do over TextModel.main_content().
+    
+    What is kept is bounded: READABILITY_SECTION_LIMIT sections plus one that absorbs the rest, and
+    at most STREAM_PHRASE_LIMIT distinct entity phrases. When the phrases overflow, the half seen
+    least often are dropped, so on such pages entities_found is a lower bound and rare entities may
+    be missing or undercounted; the most frequent ones, which top_entities reports, are kept.
+    """
+    
+    def __init__(self, window=None):
+        super().__init__()
+        self.window_start, self.window_end = window or (0, float('inf'))
+        # Characters of text inside the window so far
+        self.content_length = 0
+        self.jsonld = JsonLdIndex()
+        self.link_count = 0
+        self.has_about_link = False
+        self.has_contact_link = False
+        self.word_count = 0
+        self.in_token = False
+        self.has_tldr = False
+        self.tldr_tail = ''
+        self.phrase_counts = Counter()
+        self.phrases_pruned = 0
+        self.entity_carry = ''
+        self.paragraph_count = 0
+        self.content_paragraph_count = 0
+        self.content_paragraph_words = 0
+        self.first_para_words = 0
+        self.short_paragraphs = 0
+        self.heading_count = 0
+        self.question_headings = 0
+        # (index, text) of the first question headings in document order
+        self.question_examples = []
+        # Readability sections as [title, words, syllables, sentences], split where headings start;
+        # past READABILITY_SECTION_LIMIT the last one takes in the rest, which only the totals report
+        self.sections = [[None, 0, 0, 0]]
+        self.section_start = 0
+        self.section_token = ''
+        self.total_words = self.total_syllables = self.total_sentences = 0
+        # None between sentences, 'body' up to its first terminator, 'end' in its run of terminators
+        self.sentence_state = None
+        self.sentence_section = self.sections[0]
+        self.sentence_words = 0
+        # None outside a token, else whether the token the sentence is in has been counted
+        self.sentence_token = None
+    
+    def open_span(self, kind):
+        if kind == 'paragraph':
+            span = _StreamSpan(kind, self.paragraph_count, self.text_length)
+            self.paragraph_count += 1
+        else:
+            span = _StreamSpan(kind, self.heading_count, self.text_length)
+            self.heading_count += 1
+        # Sections split where headings in the window start; section_start counts window text only
+        if kind == 'heading' and self.window_start <= self.text_length <= self.window_end:
+            if self.content_length > self.section_start:
+                self._count_section_words(self.section_token)
+                self.section_token = ''
+                # A section without words isn't reported, so it makes way for the next one
+                if not self.sections[-1][1]:
+                    self.sections.pop()
+                if len(self.sections) <= READABILITY_SECTION_LIMIT:
+                    self.sections.append([None, 0, 0, 0])
+                self.section_start = self.content_length
+            # A section takes its title from the first heading that starts it
+            if self.sections[-1][0] is None:
+                self.sections[-1][0] = ''
+                span.section = self.sections[-1]
+        self.open_spans.append(span)
+    
+    def end_capture(self):
+        span = self.open_spans.pop()
+        if span.kind == 'paragraph':
+            if self.window_start <= span.start and self.text_length <= self.window_end:
+                self.content_paragraph_count += 1
+                self.content_paragraph_words += span.words
+            if span.index == 0:
+                self.first_para_words = span.words
+            if 40 <= span.words <= 60:
+                self.short_paragraphs += 1
+            return
+        heading_text = span.text.strip()
+        if span.section is not None:
+            # One character past the title length, so readability_section() trims it exactly as it would the whole text
+            span.section[0] = ' '.join(heading_text.split())[:SECTION_TITLE_LENGTH + 1]
+        if heading_text.lower().startswith(QUESTION_WORDS) or span.last_char == '?':
+            self.question_headings += 1
+            # Nested headings close inner first, so examples are kept in start order
+            bisect.insort(self.question_examples, (span.index, heading_text))
+            del self.question_examples[5:]
+    
+    def open_block(self, name, attrs):
+        """The window comes from a _StreamingContentLocator pass, so blocks aren't tracked here"""
+        return None
+    
+    def add_link(self, href):
+        href = href.lower()
+        self.link_count += 1
+        self.has_about_link = self.has_about_link or 'about' in href
+        self.has_contact_link = self.has_contact_link or 'contact' in href
+    
+    def add_jsonld(self, text):
+        self.jsonld.add_block(text)
+    
+    def add_text(self, text):
+        if not text:
+            return
+        position = self.text_length
+        self.text_length += len(text)
+        words = len(text.split())
+        starts_in_token = not text[0].isspace()
+        ends_in_token = not text[-1].isspace()
+        for span in self.open_spans:
+            span.words += words - (span.in_token and starts_in_token)
+            span.in_token = ends_in_token
+            if span.parts is not None:
+                if span.length < STREAM_HEADING_TEXT_LIMIT:
+                    span.parts.append(text[:STREAM_HEADING_TEXT_LIMIT - span.length])
+                    span.length += len(span.parts[-1])
+                stripped = text.rstrip()
+                if stripped:
+                    span.last_char = stripped[-1]
+        
+        # Strings start and end at tags, so none straddles the window's edges
+        if not self.window_start <= position < self.window_end:
+            return
+        self.content_length += len(text)
+        self.word_count += words - (self.in_token and starts_in_token)
+        self.in_token = ends_in_token
+        
+        # Section words and syllables; a token cut at the end of this string waits for the rest of it
+        text_with_token = self.section_token + text
+        self.section_token = '' if not ends_in_token else text_with_token.rsplit(None, 1)[-1]
+        self._count_section_words(text_with_token[:len(text_with_token) - len(self.section_token)])
+        
+        self._add_sentence_text(text)
+        
+        text_with_phrase = self.entity_carry + text
+        match = ENTITY_BREAK_PATTERN.search(text_with_phrase[::-1])
+        if match is None:
+            self.entity_carry = text_with_phrase
+        else:
+            # Phrases before the last break character are complete; keep that character as the next phrase's context
+            cut = len(text_with_phrase) - match.start()
+            self.phrase_counts.update(ENTITY_PATTERN.findall(text_with_phrase, 0, cut))
+            self.entity_carry = text_with_phrase[cut - 1:]
+            if len(self.phrase_counts) > STREAM_PHRASE_LIMIT:
+                self._prune_phrases()
+        
+        if not self.has_tldr:
+            text_with_tail = self.tldr_tail + text
+            self.has_tldr = TLDR_PATTERN.search(text_with_tail) is not None
+            self.tldr_tail = text_with_tail[-TLDR_CARRY:]
+    
+    def _count_section_words(self, text):
+        words, syllables = count_words_and_syllables(text)
+        section = self.sections[-1]
+        section[1] += words
+        section[2] += syllables
+        self.total_words += words
+        self.total_syllables += syllables
+    
+    def _prune_phrases(self):
+        """Drop every phrase seen no more often than the (STREAM_PHRASE_LIMIT // 2 + 1)th most frequent one, keeping first-seen order"""
+        floor = sorted(self.phrase_counts.values(), reverse=True)[STREAM_PHRASE_LIMIT // 2]
+        kept = Counter({phrase: count for phrase, count in self.phrase_counts.items() if count > floor})
+        self.phrases_pruned += len(self.phrase_counts) - len(kept)
+        self.phrase_counts = kept
+    
+    def _add_sentence_text(self, text):
+        position = 0
+        while True:
+            if self.sentence_state is None:
+                match = SENTENCE_START_PATTERN.search(text, position)
+                if match is None:
+                    return
+                position = match.start()
+                self.sentence_state = 'body'
+                self.sentence_section = self.sections[-1]
+                self.sentence_words = 0
+                self.sentence_token = None
+            if self.sentence_state == 'body':
+                match = SENTENCE_END_PATTERN.search(text, position)
+                end = match.start() if match is not None else len(text)
+                self._count_sentence_words(text, position, end)
+                if match is None:
+                    return
+                position = end
+                self.sentence_state = 'end'
+            match = SENTENCE_CONTINUES_PATTERN.search(text, position)
+            if match is None:
+                return
+            position = match.start()
+            self._end_sentence()
+    
+    def _count_sentence_words(self, text, start, end):
+        """Count COUNTED_SENTENCE_PATTERN's tokens in text[start:end], up to the three it needs"""
+        if self.sentence_words >= 3 or start == end:
+            return
+        if self.sentence_token is not None:
+            rest = TOKEN_REST_PATTERN.match(text, start, end).end()
+            if not self.sentence_token and SENTENCE_START_PATTERN.search(text, start, rest):
+                self.sentence_words += 1
+                self.sentence_token = True
+            if rest == end:
+                return
+            start = rest
+        last_end = None
+        for match in WORD_TOKEN_PATTERN.finditer(text, start, end):
+            self.sentence_words += 1
+            if self.sentence_words >= 3:
+                return
+            last_end = match.end()
+        self.sentence_token = None if text[end - 1].isspace() else last_end == end
+    
+    def _end_sentence(self):
+        if self.sentence_words >= 3:
+            self.sentence_section[3] += 1
+            self.total_sentences += 1
+        self.sentence_state = None
+    
+    def finish(self):
+        """Count what the last string left open"""
+        self._count_section_words(self.section_token)
+        self.section_token = ''
+        if self.sentence_state is not None:
+            self._end_sentence()
+        self.phrase_counts.update(ENTITY_PATTERN.findall(self.entity_carry))
+        self.entity_carry = ''
+    
+    def result(self):
+        sections = [
+            readability_section(title, words, sentences, syllables)
+            for title, words, syllables, sentences in self.sections[:READABILITY_SECTION_LIMIT] if words
+        ]
+        return {
+            'schema': self.jsonld.schema_result(),
+            'questions': {
+                'total_headings': self.heading_count,
+                'question_headings': self.question_headings,
+                'question_heading_examples': [text for _, text in self.question_examples]
+            },
+            'snippet': snippet_summary(self.first_para_words, self.lists, self.tables, self.short_paragraphs),
+            'structure': {
+                'has_tldr': self.has_tldr,
+                'has_toc': self.has_toc,
+                'avg_para_length': round(self.content_paragraph_words / self.content_paragraph_count, 1) if self.content_paragraph_count else 0,
+                'word_count': self.word_count,
+                'flesch_reading_ease': round(flesch_reading_ease(self.total_words, max(1, self.total_sentences), self.total_syllables), 1),
+                'readability_sections': sections
+            },
+            'entities': entity_summary(rank_entities(self.phrase_counts)),
+            'eeat': {
+                'has_author_meta': self.has_author_meta,
+                'has_date': self.has_date_meta,
+                'has_author_bio': self.has_author_bio,
+                'has_about_link': self.has_about_link,
+                'has_contact_link': self.has_contact_link,
+                'has_sources': self.has_sources
+            }
+        }
+
+class _StreamParser(HTMLParser):
+    """Replays html.parser's events the way BeautifulSoup's builder turns them into a tree, minus the tree"""
+    
+    def __init__(self, collector):
+        # BeautifulSoup resolves character references itself
+        super().__init__(convert_charrefs=False)
+        self.collector = collector
+        # (name, kind) per open element; an end tag closes up to the last open element of its name
+        self.open_elements = []
+        self.open_counts = Counter()
+        self.already_closed = Counter()
+        self.hidden = 0
+        self.preserving = 0
+        self.jsonld_parts = None
+        # A string that is all whitespace collapses to one space or newline, so it waits until the string ends
+        self.blank_parts = []
+        self.blank = True
+    
+    def handle_starttag(self, tag, attrs):
+        self._open(tag, attrs)
+        if tag in EMPTY_ELEMENT_TAGS:
+            self._close(tag)
+            # An explicit end tag may still follow
+            self.already_closed[tag] += 1
+    
+    def handle_startendtag(self, tag, attrs):
+        self._open(tag, attrs)
+        self._close(tag)
+    
+    def handle_endtag(self, tag):
+        if self.already_closed[tag]:
+            self.already_closed[tag] -= 1
+        else:
+            self._close(tag)
+    
+    def handle_data(self, data):
+        if self.jsonld_parts is not None:
+            self.jsonld_parts.append(data)
+        elif self.hidden:
+            return
+        elif self.preserving or not self.blank:
+            self.collector.add_text(data)
+        elif data.translate(ASCII_SPACES):
+            self.blank = False
+            for part in self.blank_parts:
+                self.collector.add_text(part)
+            self.blank_parts = []
+            self.collector.add_text(data)
+        else:
+            self.blank_parts.append(data)
+    
+    def handle_charref(self, name):
+        self.handle_data(unescape_html(f"&#{name};"))
+    
+    def handle_entityref(self, name):
+        self.handle_data(HTML5_ENTITIES.get(name + ';', '&' + name))
+    
+    def handle_comment(self, data):
+        self._end_string()
+    
+    def handle_decl(self, decl):
+        self._end_string()
+    
+    def handle_pi(self, data):
+        self._end_string()
+    
+    def unknown_decl(self, data):
+        self._end_string()
+        # CDATA sections are text wherever they are, even inside a container
+        if data.upper().startswith('CDATA['):
+            text = data[len('CDATA['):]
+            if not self.preserving and not text.translate(ASCII_SPACES):
+                text = '\n' if '\n' in text else ' '
+            self.collector.add_text(text)
+    
+    def close(self):
+        super().close()
+        self._end_string()
+        while self.open_elements:
+            self._pop()
+    
+    def _open(self, tag, attrs):
+        self._end_string()
+        kind = self.collector.start_tag(tag, {name: '' if value is None else value for name, value in attrs})
+        self.open_elements.append((tag, kind))
+        self.open_counts[tag] += 1
+        if tag in STRING_CONTAINER_TAGS:
+            self.hidden += 1
+        if tag in WHITESPACE_PRESERVING_TAGS:
+            self.preserving += 1
+        if kind == 'jsonld':
+            self.jsonld_parts = []
+    
+    def _close(self, tag):
+        self._end_string()
+        if self.open_counts[tag]:
+            while self._pop() != tag:
+                pass
+    
+    def _pop(self):
+        tag, kind = self.open_elements.pop()
+        self.open_counts[tag] -= 1
+        if tag in STRING_CONTAINER_TAGS:
+            self.hidden -= 1
+        if tag in WHITESPACE_PRESERVING_TAGS:
+            self.preserving -= 1
+        if kind == 'capture':
+            self.collector.end_capture()
+        elif kind == 'block':
+            self.collector.end_block()
+        elif kind == 'jsonld':
+            self.collector.add_jsonld(''.join(self.jsonld_parts))
+            self.jsonld_parts = None
+        return tag
+    
+    def _end_string(self):
+        if self.blank_parts:
+            self.collector.add_text('\n' if any('\n' in part for part in self.blank_parts) else ' ')
+            self.blank_parts = []
+        self.blank = True
+
+def analyze_stream(open_chunks, url, timer=NULL_TIMER, scope=None):
+    """analyze_page() for a page arriving as text chunks, without building a tree.
+    
+    open_chunks() returns an iterator over the page's text in pieces. In the 'main' content scope the
+    page is read twice: once to find the main content block, then to analyze it. The result equals
+    analyze_page() on the page's html.parser tree in the same scope, unless entity phrases had to be
+    pruned (counted as entity_phrases_pruned). Memory stays flat however long the page is: besides
+    the chunk being read, only the open elements, heading text, the JSON-LD block being read and the
+    bounded section and phrase tallies (see _StreamingCollector) are held.
+    """
+    scope = resolve_content_scope(scope)
+    window = None
+    if scope == 'main':
+        with timer.stage('main_content'):
+            locator = _StreamingContentLocator()
+            parser = _StreamParser(locator)
+            for chunk in open_chunks():
+                parser.feed(chunk)
+            parser.close()
+            window = locator.span
+    collector = _StreamingCollector(window)
+    parser = _StreamParser(collector)
+    chunks = open_chunks()
+    with timer.stage('stream_analyze'):
+        for chunk in chunks:
+            parser.feed(chunk)
+        parser.close()
+        collector.finish()
+        result = collector.result()
+    result['content_scope'] = scope
+    timer.count('elements', collector.element_count)
+    timer.count('headings', collector.heading_count)
+    timer.count('paragraphs', collector.paragraph_count)
+    timer.count('links', collector.link_count)
+    timer.count('jsonld_blocks', collector.jsonld.blocks)
+    timer.count('text_characters', collector.text_length)
+    timer.count('content_characters', collector.content_length)
+    timer.count('entity_phrases_pruned', collector.phrases_pruned)
+    return result
+
+# Score components in breakdown order, with each one's maximum
+COMPONENT_MAX = {
+    'schema': 25,
+    'questions': 20,
+    'snippet': 20,
+    'structure': 15,
+    'eeat': 10,
+    'entities': 10
+}
+SCORE_COMPONENTS = tuple(COMPONENT_MAX)
+
+# How much each answer engine weighs every score component
+ENGINE_PROFILES = {
+    'ChatGPT': {
+        'weights': {
+            'schema': 1.2,
+            'questions': 1.1,
+            'snippet': 1.0,
+            'structure': 1.3,
+            'eeat': 0.9,
+            'entities': 1.0
+        },
+        'focus': 'Prioritizes conversational structure and clear formatting'
+    },
+    'Claude': {
+        'weights': {
+            'schema': 1.0,
+            'questions': 1.2,
+            'snippet': 1.0,
+            'structure': 1.4,
+            'eeat': 1.3,
+            'entities': 1.1
+        },
+        'focus': 'Emphasizes content quality, trustworthiness, and natural language'
+    },
+    'Gemini': {
+        'weights': {
+            'schema': 1.3,
+            'questions': 1.0,
+            'snippet': 1.2,
+            'structure': 1.0,
+            'eeat': 1.0,
+            'entities': 1.2
+        },
+        'focus': 'Strong preference for structured data and entities'
+    },
+    'Perplexity': {
+        'weights': {
+            'schema': 1.1,
+            'questions': 1.3,
+            'snippet': 1.2,
+            'structure': 1.0,
+            'eeat': 1.2,
+            'entities': 1.0
+        },
+        'focus': 'Optimized for direct answers and source attribution'
+    }
+}
+ENGINE_NAMES = tuple(ENGINE_PROFILES)
+# (engines, components) weight matrix for batch scoring
+ENGINE_WEIGHT_MATRIX = np.array([[ENGINE_PROFILES[e]['weights'].get(c, 1.0) for c in SCORE_COMPONENTS] for e in ENGINE_NAMES])
+
+def _engine_total_weights():
+    """Per-engine sum of max x weight, accumulated in component order exactly like calculate_engine_scores"""
+    totals = []
+    for engine_name in ENGINE_NAMES:
+        total_weight = 0
+        for component in SCORE_COMPONENTS:
+            total_weight += COMPONENT_MAX[component] * ENGINE_PROFILES[engine_name]['weights'].get(component, 1.0)
+        totals.append(total_weight)
+    return np.array(totals)
+
+ENGINE_TOTAL_WEIGHTS = _engine_total_weights()
+
+def calculate_score_breakdown(data):
+    """Calculate detailed score breakdown by component"""
+    breakdown = {}
+    
+    schema_score = 0
+    if data['schema']['faq_present']:
+        schema_score += 10
+    if data['schema']['howto_present']:
+        schema_score += 10
+    if data['schema']['article_present']:
+        schema_score += 5
+    breakdown['schema'] = {'score': schema_score, 'max': COMPONENT_MAX['schema']}
+    
+    question_score = min(data['questions']['question_headings'] * 4, 20)
+    breakdown['questions'] = {'score': question_score, 'max': COMPONENT_MAX['questions']}
+    
+    snippet_score = data['snippet']['snippet_score'] * 0.2
+    breakdown['snippet'] = {'score': round(snippet_score, 1), 'max': COMPONENT_MAX['snippet']}
+    
+    structure_score = 0
+    if data['structure']['has_tldr']:
+        structure_score += 5
+    if data['structure']['has_toc']:
+        structure_score += 5
+    if data['structure']['flesch_reading_ease'] >= 60:
+        structure_score += 5
+    breakdown['structure'] = {'score': structure_score, 'max': COMPONENT_MAX['structure']}
+    
+    eeat_score = sum([
+        data['eeat']['has_author_meta'],
+        data['eeat']['has_date'],
+        data['eeat']['has_author_bio'],
+        data['eeat']['has_sources']
+    ]) * 2.5
+    breakdown['eeat'] = {'score': eeat_score, 'max': COMPONENT_MAX['eeat']}
+    
+    entity_score = 0
+    if data['entities']['entities_found'] > 10:
+        entity_score = 10
+    elif data['entities']['entities_found'] > 5:
+        entity_score = 5
+    breakdown['entities'] = {'score': entity_score, 'max': COMPONENT_MAX['entities']}
+    
+    total_score = sum(item['score'] for item in breakdown.values())
+    
+    return {
+        'breakdown': breakdown,
+        'total': min(round(total_score), 100)
+    }
+
+def calculate_engine_scores(data, score_breakdown=None):
+    """Calculate scores for different AI engines; pass score_breakdown when it's already been computed"""
+    base_breakdown = score_breakdown or calculate_score_breakdown(data)
+    
+    engine_scores = {}
+    
+    for engine_name, config in ENGINE_PROFILES.items():
+        weighted_score = 0
+        total_weight = 0
+        
+        for component, values in base_breakdown['breakdown'].items():
+            weight = config['weights'].get(component, 1.0)
+            weighted_score += (values['score'] / values['max']) * values['max'] * weight
+            total_weight += values['max'] * weight
+        
+        normalized_score = (weighted_score / total_weight) * 100
+        engine_scores[engine_name] = {
+            'score': min(round(normalized_score, 1), 100),
+            'focus': config['focus']
+        }
+    
+    return engine_scores
+
+def _round_one_decimal(values):
+    """round(x, 1) for a float array, matching Python's correctly rounded result bit for bit.
+    
+    rint(x * 10) / 10 agrees with round() except next to a .x5 tie, where x * 10 can land on the
+    wrong side; those few values go through Python's round().
+    """
+    scaled = values * 10
+    rounded = np.rint(scaled) / 10
+    near_tie = np.flatnonzero(np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6)
+    rounded.flat[near_tie] = [round(x, 1) for x in values.flat[near_tie].tolist()]
+    return rounded
+
+# The analyzer fields calculate_score_breakdown reads, in component_score_matrix's column order
+SCORE_INPUT_FIELDS = (
+    ('schema', 'faq_present'), ('schema', 'howto_present'), ('schema', 'article_present'),
+    ('questions', 'question_headings'),
+    ('snippet', 'snippet_score'),
+    ('structure', 'has_tldr'), ('structure', 'has_toc'), ('structure', 'flesch_reading_ease'),
+    ('eeat', 'has_author_meta'), ('eeat', 'has_date'), ('eeat', 'has_author_bio'), ('eeat', 'has_sources'),
+    ('entities', 'entities_found')
+)
+
+def component_score_matrix(results):
+    """(pages, components) array of the breakdown scores calculate_score_breakdown gives each analyzer result.
+    
+    results is a list of analyzer result dicts, or a (pages, len(SCORE_INPUT_FIELDS)) array of
+    those fields that a columnar batch has already gathered.
+    """
+    if isinstance(results, np.ndarray):
+        raw = results.astype(float, copy=False)
+    else:
+        raw = np.array([
+            (
+                r['schema']['faq_present'], r['schema']['howto_present'], r['schema']['article_present'],
+                r['questions']['question_headings'],
+                r['snippet']['snippet_score'],
+                r['structure']['has_tldr'], r['structure']['has_toc'], r['structure']['flesch_reading_ease'],
+                r['eeat']['has_author_meta'], r['eeat']['has_date'], r['eeat']['has_author_bio'], r['eeat']['has_sources'],
+                r['entities']['entities_found']
+            )
+            for r in results
+        ], dtype=float).reshape(len(results), len(SCORE_INPUT_FIELDS))
+    
+    scores = np.empty((len(results), len(SCORE_COMPONENTS)))
+    scores[:, 0] = 10 * (raw[:, 0] != 0) + 10 * (raw[:, 1] != 0) + 5 * (raw[:, 2] != 0)
+    scores[:, 1] = np.minimum(raw[:, 3] * 4, 20)
+    scores[:, 2] = _round_one_decimal(raw[:, 4] * 0.2)
+    scores[:, 3] = 5 * (raw[:, 5] != 0) + 5 * (raw[:, 6] != 0) + 5 * (raw[:, 7] >= 60)
+    scores[:, 4] = (raw[:, 8] + raw[:, 9] + raw[:, 10] + raw[:, 11]) * 2.5
+    scores[:, 5] = np.where(raw[:, 12] > 10, 10, np.where(raw[:, 12] > 5, 5, 0))
+    return scores
+
+def score_pages(results):
+    """Score many analyzer results (or a score input array, see component_score_matrix) at once.
+    
+    Returns (component_scores, totals, engine_scores) arrays with one row per result; columns follow
+    SCORE_COMPONENTS and ENGINE_NAMES. Values are bit-identical to calculate_score_breakdown and
+    calculate_engine_scores, because every sum is accumulated in the same component order.
+    """
+    scores = component_score_matrix(results)
+    max_scores = np.array([COMPONENT_MAX[c] for c in SCORE_COMPONENTS], dtype=float)
+    
+    totals = np.zeros(len(results))
+    for column in range(len(SCORE_COMPONENTS)):
+        totals += scores[:, column]
+    totals = np.minimum(np.rint(totals), 100).astype(int)
+    
+    # (pages, engines, components): the per-page formula, with one weight row per engine
+    terms = (scores / max_scores * max_scores)[:, None, :] * ENGINE_WEIGHT_MATRIX[None, :, :]
+    weighted = np.zeros((len(results), len(ENGINE_NAMES)))
+    for column in range(len(SCORE_COMPONENTS)):
+        weighted += terms[:, :, column]
+    normalized = weighted / ENGINE_TOTAL_WEIGHTS * 100
+    return scores, totals, np.minimum(_round_one_decimal(normalized), 100)
+
+def engine_scores_from_row(row):
+    """Turn one row of score_pages() engine scores into calculate_engine_scores' dict"""
+    return {
+        engine_name: {'score': float(score), 'focus': ENGINE_PROFILES[engine_name]['focus']}
+        for engine_name, score in zip(ENGINE_NAMES, row.tolist())
+    }
+
+# Recommendation rules live in recommendation_rules.json so they can be edited without touching Python.
+# Each rule lists conditions ("section.field op value", all must hold) and the recommendation it yields;
+# an action with {section[field]} placeholders is filled in from the audit data.
+RECOMMENDATION_RULES_PATH = os.environ.get('AEO_RECOMMENDATION_RULES', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'recommendation_rules.json'))
+RULE_OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge
+}
+
+class FrozenDict(dict):
+    """A dict that refuses changes; one recommendation object is shared by every audit that triggers it"""
+    
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(f"{type(self).__name__} is read-only")
+    
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = __ior__ = _read_only
+    
+    def __reduce__(self):
+        return (type(self), (dict(self),))
+
+def _parse_condition(condition):
+    """'structure.word_count > 500' -> (section, field, operator function, value)"""
+    path, op, value = condition.split(None, 2)
+    section, field = path.split('.')
+    if op not in RULE_OPERATORS:
+        raise ValueError(f"Unknown operator {op!r} in recommendation rule {condition!r}")
+    return section, field, RULE_OPERATORS[op], json.loads(value)
+
+class RecommendationCatalog:
+    """The rule file compiled once into a predicate table, already in priority order"""
+    
+    __slots__ = ('rules', 'scoring_version')
+    
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            raw = f.read()
+        catalog = json.loads(raw)
+        priority_order = {priority: rank for rank, priority in enumerate(catalog['priorities'])}
+        
+        rules = []
+        for rule in sorted(catalog['rules'], key=lambda r: priority_order[r['priority']]):
+            conditions = tuple(_parse_condition(condition) for condition in rule['when'])
+            recommendation = FrozenDict((k, tuple(v) if isinstance(v, list) else v) for k, v in rule.items() if k != 'when')
+            template = recommendation['action'] if '{' in recommendation['action'] else None
+            rules.append((conditions, recommendation, template))
+        self.rules = tuple(rules)
+        # Stored scores are reused only while both the scoring code and these rules are unchanged
+        self.scoring_version = int(hashlib.sha256(f"{SCORING_VERSION}:".encode() + raw).hexdigest()[:12], 16)
+    
+    def evaluate(self, data):
+        """One pass over the rules; untemplated recommendations are returned as the shared objects themselves"""
+        recommendations = []
+        for conditions, recommendation, template in self.rules:
+            for section, field, test, value in conditions:
+                if not test(data[section][field], value):
+                    break
+            else:
+                if template is not None:
+                    recommendation = FrozenDict(recommendation, action=template.format_map(data))
+                recommendations.append(recommendation)
+        return recommendations
+
+@functools.lru_cache(maxsize=None)
+def get_recommendation_catalog():
+    return RecommendationCatalog(RECOMMENDATION_RULES_PATH)
+
+def generate_prioritized_recommendations(data):
+    """Recommendations whose rule conditions hold for this audit, highest priority first"""
+    return get_recommendation_catalog().evaluate(data)
+
+# Finished audits shared by every session on this server
+AUDIT_CACHE_TTL = int(os.environ.get('AEO_AUDIT_CACHE_TTL', 3600))
+AUDIT_CACHE_MAX_ENTRIES = int(os.environ.get('AEO_AUDIT_CACHE_MAX_ENTRIES', 256))
+
+class AuditCache:
+    """Thread-safe LRU of finished audits keyed by (normalized URL, content hash, stored_features_version()), with a TTL"""
+    
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None or time.monotonic() - item[0] >= self.ttl:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return item[1]
+    
+    def put(self, key, audit):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), audit)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._entries)}
+
+@functools.lru_cache(maxsize=None)
+def get_audit_cache():
+    """Process-wide audit cache instance"""
+    return AuditCache(AUDIT_CACHE_MAX_ENTRIES, AUDIT_CACHE_TTL)
+
+# Per-URL audit history on disk: analyzer features are reused while a page's content is unchanged
+HISTORY_DB_PATH = os.environ.get('AEO_HISTORY_DB', os.path.join(os.path.expanduser('~'), '.cache', 'aeo_auditor', 'history.sqlite3'))
+# Bump FEATURES_VERSION when analyzer output changes and SCORING_VERSION when scoring code changes (edits to
+# recommendation_rules.json are picked up on their own); stored features are re-analyzed or merely rescored accordingly
+FEATURES_VERSION = 7
+SCORING_VERSION = 1
+SCORE_KEYS = ('score_breakdown', 'engine_scores', 'recommendations')
+
+def stored_features_version():
+    """FEATURES_VERSION, kept apart per content scope so switching AEO_CONTENT_SCOPE re-analyzes stored pages"""
+    return FEATURES_VERSION * len(CONTENT_SCOPES) + CONTENT_SCOPES.index(resolve_content_scope())
+
+class AuditHistory:
+    """SQLite store of every (URL, body hash) audited: analyzer features plus the scores derived from them"""
+    
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._conn:
+            # WAL lets batch worker processes read while another one writes
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS audits (
+                    url TEXT NOT NULL,
+                    body_hash TEXT NOT NULL,
+                    features_version INTEGER NOT NULL,
+                    features TEXT NOT NULL,
+                    scoring_version INTEGER NOT NULL,
+                    scores TEXT NOT NULL,
+                    score INTEGER NOT NULL,
+                    first_seen REAL NOT NULL,
+                    last_seen REAL NOT NULL,
+                    PRIMARY KEY (url, body_hash)
+                )
+            ''')
+    
+    def get(self, url, body_hash):
+        """Return (features, scores) stored for this exact content, or None.
+        
+        scores is None when they were computed under older scoring code or rules. A found entry is marked as seen now.
+        """
+        key = (normalize_url(url), body_hash)
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT features_version, features, scoring_version, scores FROM audits WHERE url = ? AND body_hash = ?', key
+            ).fetchone()
+            if row is None or row[0] != stored_features_version():
+                return None
+            with self._conn:
+                self._conn.execute('UPDATE audits SET last_seen = ? WHERE url = ? AND body_hash = ?', (time.time(), *key))
+        
+        features = json.loads(row[1])
+        scores = json.loads(row[3]) if row[2] == get_recommendation_catalog().scoring_version else None
+        return features, scores
+    
+    def put(self, url, body_hash, audit):
+        now = time.time()
+        values = (
+            normalize_url(url),
+            body_hash,
+            stored_features_version(),
+            json.dumps(audit['result'], ensure_ascii=False),
+            get_recommendation_catalog().scoring_version,
+            json.dumps({k: audit[k] for k in SCORE_KEYS}, ensure_ascii=False),
+            audit['score_breakdown']['total'],
+            now,
+            now
+        )
+        with self._lock, self._conn:
+            self._conn.execute('''
+                INSERT INTO audits VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (url, body_hash) DO UPDATE SET
+                    features_version = excluded.features_version,
+                    features = excluded.features,
+                    scoring_version = excluded.scoring_version,
+                    scores = excluded.scores,
+                    score = excluded.score,
+                    last_seen = excluded.last_seen
+            ''', values)
+    
+    def history(self, url):
+        """Every distinct version of a page audited so far, most recently seen first"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT body_hash, score, first_seen, last_seen FROM audits WHERE url = ? ORDER BY last_seen DESC', (normalize_url(url),)
+            ).fetchall()
+        return [{'body_hash': h, 'score': score, 'first_seen': first, 'last_seen': last} for h, score, first, last in rows]
+
+@functools.lru_cache(maxsize=None)
+def get_audit_history():
+    """Process-wide audit history store"""
+    return AuditHistory(HISTORY_DB_PATH)
+
+def score_features(result, timer=NULL_TIMER):
+    """Score analyzer output and build its recommendations; no parsing involved"""
+    with timer.stage('score_breakdown'):
+        score_breakdown = calculate_score_breakdown(result)
+    with timer.stage('engine_scores'):
+        engine_scores = calculate_engine_scores(result, score_breakdown)
+    with timer.stage('recommendations'):
+        recommendations = generate_prioritized_recommendations(result)
+    return {
+        'result': result,
+        'score_breakdown': score_breakdown,
+        'engine_scores': engine_scores,
+        'recommendations': recommendations
+    }
+
+def run_audit(html, url, truncated=None, timer=NULL_TIMER, encoding=None):
+    """Parse, analyze and score one page (text, or bytes in encoding) and build its recommendations"""
+    if STREAM_ANALYSIS_BYTES and len(html) >= STREAM_ANALYSIS_BYTES:
+        timer.note('analysis', 'streaming')
+        if isinstance(html, bytes):
+            open_chunks = functools.partial(decode_chunks, html, encoding or resolve_encoding(html)[0])
+        else:
+            open_chunks = functools.partial(text_chunks, html)
+        result = analyze_stream(open_chunks, url, timer)
+    else:
+        # Structured data is read from the raw page, so it is the same whichever backend builds the tree
+        with timer.stage('extract_jsonld'):
+            jsonld = extract_jsonld(html, encoding)
+        with timer.stage('parse'):
+            soup = parse_html(html, encoding=encoding, pruned=PRUNED_PARSE)
+        result = analyze_page(soup, url, timer, jsonld)
+    # Set when the download hit the size cap or deadline and only part of the page was analyzed
+    result['truncated'] = truncated
+    return score_features(result, timer)
+
+def _with_perf(audit, timer):
+    """Copy of a (possibly shared) audit whose result carries this run's timings"""
+    perf = timer.to_dict()
+    if perf is None:
+        return audit
+    return {**audit, 'result': {**audit['result'], 'perf': perf}}
+
+def audit_page(url, force_refresh=False):
+    """Fetch a page and audit it, reusing earlier work while its content is unchanged.
+    
+    Returns (audit, source) where source is 'memory' or 'history' when a stored audit was reused as is,
+    'rescored' when stored features were only rescored, and 'analyzed' when the page was parsed and analyzed.
+    Unless PERF_TIMING is off, audit['result']['perf'] holds this run's stage timings and counts.
+    Cached audits are shared between sessions, so callers must not mutate them.
+    """
+    timer = new_stage_timer()
+    fetched = fetch_document(url, ttl=0 if force_refresh else HTTP_CACHE_TTL, timer=timer)
+    # The hash is over the decoded text, so history keys stay the same however the page is encoded;
+    # decoding piece by piece never holds a second copy of a large page
+    with timer.stage('hash'):
+        digest = hashlib.sha256()
+        for text in decode_chunks(fetched['body'], fetched['encoding']):
+            digest.update(text.encode('utf-8'))
+        body_hash = digest.hexdigest()
+    # Like the history, audits made under another content scope (or analyzer version) aren't reused
+    key = (normalize_url(url), body_hash, stored_features_version())
+    cache = get_audit_cache()
+    history = get_audit_history()
+    
+    if not force_refresh:
+        with timer.stage('audit_cache_lookup'):
+            audit = cache.get(key)
+        if audit is not None:
+            return _with_perf(audit, timer), 'memory'
+        
+        with timer.stage('history_lookup'):
+            stored = history.get(url, body_hash)
+        if stored is not None:
+            features, scores = stored
+            if scores is not None:
+                audit = {'result': features, **scores}
+                source = 'history'
+            else:
+                audit = score_features(features, timer)
+                with timer.stage('history_store'):
+                    history.put(url, body_hash, audit)
+                source = 'rescored'
+            cache.put(key, audit)
+            return _with_perf(audit, timer), source
+    
+    audit = run_audit(fetched['body'], url, fetched['truncated'], timer, fetched['encoding'])
+    cache.put(key, audit)
+    with timer.stage('history_store'):
+        history.put(url, body_hash, audit)
+    return _with_perf(audit, timer), 'analyzed'
+
+def audit_url_record(url, force_refresh=False):
+    """Audit one URL and return a JSON-serializable record; errors become records too"""
+    start_time = time.perf_counter()
+    try:
+        audit, source = audit_page(url, force_refresh)
+    except Exception as e:
+        return {
+            'url': url,
+            'ok': False,
+            'error': str(e),
+            'elapsed': round(time.perf_counter() - start_time, 3)
+        }
+    
+    return {
+        'url': url,
+        'ok': True,
+        'score': audit['score_breakdown']['total'],
+        'breakdown': audit['score_breakdown']['breakdown'],
+        'engine_scores': audit['engine_scores'],
+        'result': audit['result'],
+        'recommendations': [
+            {'priority': rec['priority'], 'category': rec['category'], 'action': rec['action']}
+            for rec in audit['recommendations']
+        ],
+        'truncated': audit['result']['truncated'],
+        'from_cache': source != 'analyzed',
+        'source': source,
+        'elapsed': round(time.perf_counter() - start_time, 3)
+    }
+
+def audit_urls(urls, workers=None, max_pending=None, force_refresh=False):
+    """Audit URLs on a process pool, yielding one record per URL as each one finishes.
+    
+    urls may be any iterable (including a lazy one); at most max_pending audits are
+    queued at a time, so memory stays flat however many URLs come in.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        for url in urls:
+            yield audit_url_record(url, force_refresh)
+        return
+    
+    max_pending = max_pending or workers * 4
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        for url in urls:
+            pending.add(executor.submit(audit_url_record, url, force_refresh))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+def _reset_process_resources():
+    """Forked workers must not share the parent's sockets, cache handles or counters"""
+    get_http_session.cache_clear()
+    get_http_cache.cache_clear()
+    get_audit_cache.cache_clear()
+    get_audit_history.cache_clear()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_process_resources)
@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+"""
+Typed audit result records and a columnar container for batches of audits.
+
+Analyzer results travel as nested dicts (result['snippet']['lists']) because
+that is what the audit history, the JSONL output and the recommendation rules
+read. Code that holds many results at once can use AuditResult and
+ScoreBreakdown instead: the same data in slotted records, converted to and
+from the dict shape without loss by from_dict() / to_dict().
+
+ResultBatch stores a batch column by column, one list per scalar analyzer
+field, so scoring and aggregation run over whole columns and the batch
+exports straight to pandas, Arrow, CSV or Parquet.
+"""
+
+import importlib.util
+import os
+from dataclasses import dataclass, fields
+from typing import ClassVar, Optional
+
+import numpy as np
+
+from aeo_engine import ENGINE_NAMES, SCORE_COMPONENTS, SCORE_INPUT_FIELDS, score_pages
+
+class _Record:
+    """Dict conversion shared by the analyzer records: lists are stored as tuples, of records where NESTED says so"""
+    
+    __slots__ = ()
+    NESTED: ClassVar[dict] = {}
+    
+    @classmethod
+    def from_dict(cls, data):
+        values = dict(data)
+        for name, value in values.items():
+            if isinstance(value, list):
+                record_type = cls.NESTED.get(name)
+                values[name] = tuple(record_type.from_dict(v) for v in value) if record_type else tuple(value)
+        return cls(**values)
+    
+    def to_dict(self):
+        data = {}
+        for name in self.__slots__:
+            value = getattr(self, name)
+            if isinstance(value, tuple):
+                value = [v.to_dict() if isinstance(v, _Record) else v for v in value]
+            data[name] = value
+        return data
+
+@dataclass(slots=True)
+class SchemaTypeCount(_Record):
+    type: str
+    count: int
+
+@dataclass(slots=True)
+class SchemaResult(_Record):
+    NESTED: ClassVar[dict] = {'schema_types': SchemaTypeCount}
+    
+    faq_present: bool
+    faq_count: int
+    howto_present: bool
+    howto_count: int
+    article_present: bool
+    # Results stored before the type index was added have none
+    schema_types: tuple = ()
+
+@dataclass(slots=True)
+class QuestionResult(_Record):
+    total_headings: int
+    question_headings: int
+    question_heading_examples: tuple
+
+@dataclass(slots=True)
+class SnippetResult(_Record):
+    first_para_words: int
+    lists: int
+    tables: int
+    short_paragraphs: int
+    snippet_score: int
+
+@dataclass(slots=True)
+class ReadabilitySection(_Record):
+    heading: str
+    word_count: int
+    flesch_reading_ease: float
+
+@dataclass(slots=True)
+class StructureResult(_Record):
+    NESTED: ClassVar[dict] = {'readability_sections': ReadabilitySection}
+    
+    has_tldr: bool
+    has_toc: bool
+    avg_para_length: float
+    word_count: int
+    flesch_reading_ease: float
+    readability_sections: tuple
+
+@dataclass(slots=True)
+class EntityCount(_Record):
+    entity: str
+    count: int
+
+@dataclass(slots=True)
+class EntityResult(_Record):
+    NESTED: ClassVar[dict] = {'top_entities': EntityCount}
+    
+    entities_found: int
+    entity_examples: tuple
+    top_entities: tuple
+
+@dataclass(slots=True)
+class EeatResult(_Record):
+    has_author_meta: bool
+    has_date: bool
+    has_author_bio: bool
+    has_about_link: bool
+    has_contact_link: bool
+    has_sources: bool
+
+# analyze_page()'s sections, in its order
+SECTION_RECORDS = {
+    'schema': SchemaResult,
+    'questions': QuestionResult,
+    'snippet': SnippetResult,
+    'structure': StructureResult,
+    'entities': EntityResult,
+    'eeat': EeatResult
+}
+
+@dataclass(slots=True)
+class AuditResult:
+    """analyze_page()'s result as records; other top-level keys (truncated, content_scope, perf) ride along in extras"""
+    
+    schema: SchemaResult
+    questions: QuestionResult
+    snippet: SnippetResult
+    structure: StructureResult
+    entities: EntityResult
+    eeat: EeatResult
+    extras: Optional[dict] = None
+    
+    @classmethod
+    def from_dict(cls, data):
+        sections = {name: record_type.from_dict(data[name]) for name, record_type in SECTION_RECORDS.items()}
+        extras = {key: value for key, value in data.items() if key not in SECTION_RECORDS}
+        return cls(**sections, extras=extras or None)
+    
+    def to_dict(self):
+        data = {name: getattr(self, name).to_dict() for name in SECTION_RECORDS}
+        if self.extras:
+            data.update(self.extras)
+        return data
+    
+    @property
+    def truncated(self):
+        """Why run_audit() cut the page short, or None"""
+        return self.extras.get('truncated') if self.extras else None
+    
+    @property
+    def content_scope(self):
+        """Which text the structure and entity results describe: 'main' or 'full'"""
+        return self.extras.get('content_scope') if self.extras else None
+    
+    @property
+    def perf(self):
+        """Stage timings and counts, when the audit was timed"""
+        return self.extras.get('perf') if self.extras else None
+
+@dataclass(slots=True)
+class ComponentScore(_Record):
+    score: float
+    max: int
+
+@dataclass(slots=True)
+class ScoreBreakdown:
+    """calculate_score_breakdown()'s result; one field per entry of SCORE_COMPONENTS"""
+    
+    total: int
+    schema: ComponentScore
+    questions: ComponentScore
+    snippet: ComponentScore
+    structure: ComponentScore
+    eeat: ComponentScore
+    entities: ComponentScore
+    
+    @classmethod
+    def from_dict(cls, data):
+        components = {name: ComponentScore.from_dict(values) for name, values in data['breakdown'].items()}
+        return cls(total=data['total'], **components)
+    
+    def to_dict(self):
+        return {
+            'breakdown': {name: getattr(self, name).to_dict() for name in SCORE_COMPONENTS},
+            'total': self.total
+        }
+    
+    def component(self, name):
+        """The ComponentScore for a SCORE_COMPONENTS name"""
+        return getattr(self, name)
+
+def _scalar_fields(record_type):
+    return tuple(f.name for f in fields(record_type) if f.type is not tuple)
+
+# ResultBatch columns, named "section.field"; list fields (examples, per-section readability) stay in the records
+BATCH_FIELDS = tuple((section, name) for section, record_type in SECTION_RECORDS.items() for name in _scalar_fields(record_type))
+BATCH_COLUMNS = tuple(f"{section}.{name}" for section, name in BATCH_FIELDS)
+# File formats ResultBatch.write() picks by extension; all but CSV need pyarrow
+TABLE_FORMATS = ('.csv', '.parquet', '.feather')
+
+def check_table_format(path):
+    """Return the table format for a file name, or raise before any work is done on a batch that can't be written"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in TABLE_FORMATS:
+        raise ValueError(f"Unknown table format '{extension}'. Choose one of: {', '.join(TABLE_FORMATS)}")
+    if extension != '.csv' and importlib.util.find_spec('pyarrow') is None:
+        raise ImportError(f"Writing {extension} files needs pyarrow: pip install pyarrow")
+    return extension
+
+class ResultBatch:
+    """Analyzer results stored column by column: url plus one list per BATCH_COLUMNS field"""
+    
+    __slots__ = ('urls', 'columns', '_lists')
+    
+    def __init__(self, results=(), urls=None):
+        self.urls = []
+        self.columns = {name: [] for name in BATCH_COLUMNS}
+        self._lists = tuple(self.columns.values())
+        self.extend(results, urls)
+    
+    def __len__(self):
+        return len(self.urls)
+    
+    def append(self, result, url=None):
+        """Add one analyzer result, either a dict or an AuditResult"""
+        self.urls.append(url)
+        if isinstance(result, AuditResult):
+            for (section, name), column in zip(BATCH_FIELDS, self._lists):
+                column.append(getattr(getattr(result, section), name))
+        else:
+            for (section, name), column in zip(BATCH_FIELDS, self._lists):
+                column.append(result[section][name])
+    
+    def extend(self, results, urls=None):
+        urls = iter(urls) if urls is not None else None
+        for result in results:
+            self.append(result, next(urls) if urls is not None else None)
+    
+    def score_inputs(self):
+        """(pages, len(SCORE_INPUT_FIELDS)) array for score_pages(), gathered from the columns"""
+        return np.column_stack([
+            np.asarray(self.columns[f"{section}.{name}"], dtype=float) for section, name in SCORE_INPUT_FIELDS
+        ]).reshape(len(self), len(SCORE_INPUT_FIELDS))
+    
+    def scores(self):
+        """Total, component and engine score columns, identical to scoring each result on its own"""
+        component_scores, totals, engine_scores = score_pages(self.score_inputs())
+        columns = {'score.total': totals}
+        for index, component in enumerate(SCORE_COMPONENTS):
+            columns[f"score.{component}"] = component_scores[:, index]
+        for index, engine_name in enumerate(ENGINE_NAMES):
+            columns[f"engine.{engine_name}"] = engine_scores[:, index]
+        return columns
+    
+    def _table_columns(self, scores):
+        columns = {'url': self.urls, **self.columns}
+        if scores:
+            columns.update(self.scores())
+        return columns
+    
+    def to_pandas(self, scores=True):
+        """DataFrame with one row per result and the score columns appended"""
+        import pandas as pd
+        return pd.DataFrame(self._table_columns(scores))
+    
+    def to_arrow(self, scores=True):
+        """pyarrow Table with the same columns as to_pandas()"""
+        if importlib.util.find_spec('pyarrow') is None:
+            raise ImportError("Arrow tables need pyarrow: pip install pyarrow")
+        import pyarrow as pa
+        return pa.table(self._table_columns(scores))
+    
+    def write(self, path, scores=True):
+        """Write the batch as CSV, Parquet or Feather, chosen by the file extension"""
+        extension = check_table_format(path)
+        if extension == '.csv':
+            self.to_pandas(scores).to_csv(path, index=False)
+        elif extension == '.parquet':
+            import pyarrow.parquet as pq
+            pq.write_table(self.to_arrow(scores), path)
+        else:
+            import pyarrow.feather as feather
+            feather.write_feather(self.to_arrow(scores), path)
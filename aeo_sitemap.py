@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+Site-wide audits driven by sitemap.xml.
+
+Sitemaps and sitemap indexes (plain or gzip-compressed) are parsed as a
+stream, so even a 500k-URL sitemap never sits in memory; page URLs are fed
+lazily into aeo_engine.audit_urls() and the results folded into a
+site-level summary as they arrive. A nested sitemap that can't be fetched
+or parsed is recorded in the summary and skipped; only a failing top-level
+sitemap stops the audit.
+"""
+
+import gzip
+import heapq
+import io
+import re
+import xml.etree.ElementTree as ET
+from collections import Counter, deque
+
+from urllib3.exceptions import HTTPError as Urllib3Error
+
+from aeo_engine import CONNECT_TIMEOUT, READ_TIMEOUT, audit_urls, get_http_session, normalize_url
+
+# Guards against sitemap indexes that loop back on themselves or fan out without end
+MAX_SITEMAPS = 10000
+GZIP_MAGIC = b'\x1f\x8b'
+# What fetching and parsing one sitemap can raise: requests' errors (OSError subclasses), urllib3's
+# while the body streams, bad or truncated gzip (OSError, EOFError) and malformed XML
+SITEMAP_ERRORS = (OSError, EOFError, Urllib3Error, ET.ParseError)
+
+COMPONENTS = ('schema', 'questions', 'snippet', 'structure', 'eeat', 'entities')
+SCORE_BUCKETS = ((0, 19), (20, 39), (40, 59), (60, 79), (80, 100))
+
+def _local_name(tag):
+    """Strip the XML namespace from an ElementTree tag"""
+    return tag.rsplit('}', 1)[-1]
+
+def _open_sitemap(url, session):
+    """Open a sitemap as a byte stream, transparently un-gzipping .xml.gz files"""
+    response = session.get(url, stream=True, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+    response.raise_for_status()
+    # Content-Encoding: gzip is undone by urllib3; a gzip *file* still needs unwrapping
+    response.raw.decode_content = True
+    # Keep the raw stream "open" at EOF so io.BufferedReader can see the end of the body
+    response.raw.auto_close = False
+    stream = io.BufferedReader(response.raw)
+    if stream.peek(2)[:2] == GZIP_MAGIC:
+        stream = gzip.GzipFile(fileobj=stream)
+    return response, stream
+
+def iter_sitemap_entries(stream):
+    """Yield ('sitemap' | 'url', loc) pairs from one sitemap document, clearing parsed elements as it goes"""
+    root = None
+    kind = None
+    for event, element in ET.iterparse(stream, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = element
+                kind = 'sitemap' if _local_name(element.tag) == 'sitemapindex' else 'url'
+            continue
+        name = _local_name(element.tag)
+        if name == 'loc' and element.text and element.text.strip():
+            yield kind, element.text.strip()
+        elif name in ('url', 'sitemap'):
+            # Drop finished entries so memory stays flat however long the sitemap is
+            root.clear()
+
+def iter_sitemap_urls(sitemap_url, session=None, max_urls=None, on_error=None):
+    """Yield page URLs from a sitemap or sitemap index, following nested sitemaps breadth-first.
+    
+    A nested sitemap that fails to fetch or parse is passed to on_error(url, message) and skipped,
+    keeping any URLs it yielded before the failure; errors in sitemap_url itself are raised.
+    """
+    session = session or get_http_session()
+    queue = deque([sitemap_url])
+    seen_sitemaps = set()
+    yielded = 0
+    
+    while queue and len(seen_sitemaps) < MAX_SITEMAPS:
+        url = queue.popleft()
+        key = normalize_url(url)
+        if key in seen_sitemaps:
+            continue
+        seen_sitemaps.add(key)
+        
+        response = None
+        try:
+            response, stream = _open_sitemap(url, session)
+            for kind, loc in iter_sitemap_entries(stream):
+                if kind == 'sitemap':
+                    queue.append(loc)
+                    continue
+                yield loc
+                yielded += 1
+                if max_urls is not None and yielded >= max_urls:
+                    return
+        except SITEMAP_ERRORS as e:
+            if url == sitemap_url:
+                raise
+            if on_error is not None:
+                on_error(url, f"{type(e).__name__}: {e}")
+        finally:
+            if response is not None:
+                response.close()
+
+class SiteSummary:
+    """Folds per-page audit records into site-level statistics in constant memory"""
+    
+    def __init__(self, sitemap_url, worst_pages=10, top_recommendations=10):
+        self.sitemap_url = sitemap_url
+        self.worst_pages = worst_pages
+        self.top_recommendations = top_recommendations
+        self.pages = 0
+        self.failed = 0
+        self.score_total = 0
+        self.min_score = None
+        self.max_score = None
+        self.buckets = Counter()
+        self.component_totals = Counter()
+        self.engine_totals = Counter()
+        self.signals = Counter()
+        self.recommendations = Counter()
+        self.errors = Counter()
+        self.sources = Counter()
+        # (sitemap URL, error) for nested sitemaps that were skipped; at most MAX_SITEMAPS of them
+        self.sitemap_errors = []
+        # Max-heap of the lowest scores via negated keys
+        self._worst = []
+    
+    def add(self, record):
+        self.pages += 1
+        if not record['ok']:
+            self.failed += 1
+            self.errors[record['error'].split(':', 1)[0][:80]] += 1
+            return
+        
+        self.sources[record['source']] += 1
+        score = record['score']
+        self.score_total += score
+        self.min_score = score if self.min_score is None else min(self.min_score, score)
+        self.max_score = score if self.max_score is None else max(self.max_score, score)
+        for low, high in SCORE_BUCKETS:
+            if low <= score <= high:
+                self.buckets[f"{low}-{high}"] += 1
+                break
+        
+        for component in COMPONENTS:
+            self.component_totals[component] += record['breakdown'][component]['score']
+        for engine, values in record['engine_scores'].items():
+            self.engine_totals[engine] += values['score']
+        
+        result = record['result']
+        self.signals['faq_schema'] += result['schema']['faq_present']
+        self.signals['howto_schema'] += result['schema']['howto_present']
+        self.signals['article_schema'] += result['schema']['article_present']
+        self.signals['question_headings_3_plus'] += result['questions']['question_headings'] >= 3
+        self.signals['tldr'] += result['structure']['has_tldr']
+        self.signals['table_of_contents'] += result['structure']['has_toc']
+        self.signals['author_meta'] += result['eeat']['has_author_meta']
+        self.signals['publication_date'] += result['eeat']['has_date']
+        
+        # Actions embed page-specific numbers, e.g. "(Currently: 12 words, ...)"; count the action itself
+        for rec in record['recommendations']:
+            self.recommendations[(rec['priority'], re.sub(r'\s*\(.*\)$', '', rec['action']))] += 1
+        
+        entry = (-score, record['url'])
+        if len(self._worst) < self.worst_pages:
+            heapq.heappush(self._worst, entry)
+        elif entry > self._worst[0]:
+            heapq.heapreplace(self._worst, entry)
+    
+    def add_sitemap_error(self, url, error):
+        self.sitemap_errors.append((url, error))
+    
+    def to_dict(self):
+        audited = self.pages - self.failed
+        
+        def average(total):
+            return round(total / audited, 1) if audited else 0
+        
+        return {
+            'sitemap': self.sitemap_url,
+            'pages': self.pages,
+            'audited': audited,
+            'failed': self.failed,
+            'skipped_unchanged': self.sources['memory'] + self.sources['history'] + self.sources['rescored'],
+            'rescored': self.sources['rescored'],
+            'analyzed': self.sources['analyzed'],
+            'average_score': average(self.score_total),
+            'min_score': self.min_score,
+            'max_score': self.max_score,
+            'score_distribution': {f"{low}-{high}": self.buckets[f"{low}-{high}"] for low, high in SCORE_BUCKETS},
+            'component_averages': {c: average(self.component_totals[c]) for c in COMPONENTS},
+            'engine_averages': {e: average(total) for e, total in self.engine_totals.items()},
+            'signal_coverage': {s: round(count / audited, 3) if audited else 0 for s, count in self.signals.items()},
+            'top_recommendations': [
+                {'priority': priority, 'action': action, 'pages': count}
+                for (priority, action), count in self.recommendations.most_common(self.top_recommendations)
+            ],
+            'lowest_scoring_pages': [
+                {'url': url, 'score': -neg_score} for neg_score, url in sorted(self._worst, reverse=True)
+            ],
+            'errors': dict(self.errors.most_common()),
+            'sitemap_errors': [{'sitemap': url, 'error': error} for url, error in self.sitemap_errors]
+        }
+
+def audit_site(sitemap_url, workers=None, max_pending=None, max_pages=None, force_refresh=False, summary=None):
+    """Audit every page listed in a sitemap, yielding per-page records and updating the summary as they finish"""
+    summary = summary if summary is not None else SiteSummary(sitemap_url)
+    urls = iter_sitemap_urls(sitemap_url, max_urls=max_pages, on_error=summary.add_sitemap_error)
+    for record in audit_urls(urls, workers=workers, max_pending=max_pending, force_refresh=force_refresh):
+        summary.add(record)
+        yield record
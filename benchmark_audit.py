@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark every audit stage on the fixtures, scaled from 10 KB to 10 MB.
+
+Usage: python benchmark_audit.py [--sizes 10k,100k,1m,10m] [--fixtures blog,docs]
+                                 [--batch-pages 100000] [--output results.json]
+                                 [--baseline FILE] [--threshold 0.25] [--save-baseline]
+
+Each fixture in fixtures/ is grown to every size tier by repeating its <body>
+content, so the tiers keep the page's mix of headings, lists, tables and
+JSON-LD. Batch stages also rescore --batch-pages stored audits in one
+score_pages() call, and the same audits held column by column in a
+ResultBatch. Timings (best and median seconds per call) are written
+as JSON, keyed "fixture/size/stage". When a baseline file exists, any stage
+slower than the baseline by more than the threshold is re-measured once; if
+it is still slow it is reported and the exit status is 1.
+Baselines are machine-specific, so none is committed: the first run on a
+machine saves its timings as the baseline (benchmark_baseline.json, ignored
+by git) and later runs compare against it. Regenerate with --save-baseline
+after hardware or dependency changes.
+"""
+
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import timeit
+
+from aeo_engine import (
+    analyze_schema, analyze_questions, analyze_snippet_optimization, analyze_structure,
+    analyze_entities, analyze_eeat, analyze_page, analyze_stream, calculate_score_breakdown,
+    calculate_engine_scores, collect_page_elements, extract_jsonld, generate_prioritized_recommendations,
+    parse_html, resolve_parser_backend, run_audit, score_pages
+)
+from aeo_records import ResultBatch
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.path.join(ROOT_DIR, 'fixtures')
+DEFAULT_BASELINE = os.path.join(ROOT_DIR, 'benchmark_baseline.json')
+FIXTURE_URL = 'https://example.com/fixture'
+
+SIZE_UNITS = {'k': 1024, 'm': 1024 * 1024}
+DEFAULT_SIZES = '10k,100k,1m,10m'
+# Stored audits rescored in one score_pages() call by the batch stage
+DEFAULT_BATCH_PAGES = 100000
+# A stage regresses when it is this much slower than the baseline...
+DEFAULT_THRESHOLD = 0.25
+# ...and slower by at least this many seconds, so timer noise on tiny stages doesn't fail the run
+MIN_REGRESSION_SECONDS = 0.002
+
+def parse_size(label):
+    """Turn '10k' / '1m' / '2048' into a byte count"""
+    label = label.strip().lower()
+    if label[-1] in SIZE_UNITS:
+        return int(float(label[:-1]) * SIZE_UNITS[label[-1]])
+    return int(label)
+
+def scale_html(html, target_bytes):
+    """Repeat a page's <body> content until the document is at least target_bytes of UTF-8"""
+    lower = html.lower()
+    start = lower.find('>', lower.find('<body')) + 1
+    end = lower.rfind('</body>')
+    if start <= 0 or end < start:
+        start, end = 0, len(html)
+    head, body, tail = html[:start], html[start:end], html[end:]
+    
+    shell_size = len((head + tail).encode('utf-8'))
+    body_size = max(len(body.encode('utf-8')), 1)
+    copies = max(1, -(-(target_bytes - shell_size) // body_size))
+    return head + body * copies + tail
+
+def build_stages(html):
+    """Map stage name -> zero-argument callable; every stage after 'parse' reuses one parsed tree"""
+    soup = parse_html(html)
+    elements = collect_page_elements(soup)
+    text_model = elements['text_model']
+    result = analyze_page(soup, FIXTURE_URL)
+    body = html.encode('utf-8')
+    return {
+        'extract_jsonld': lambda: extract_jsonld(body, 'utf-8'),
+        'parse': lambda: parse_html(html),
+        'collect_page_elements': lambda: collect_page_elements(soup),
+        'main_content': lambda: text_model.layout.main_span(text_model.text),
+        'analyze_schema': lambda: analyze_schema(soup, elements),
+        'analyze_questions': lambda: analyze_questions(soup, elements),
+        'analyze_snippet_optimization': lambda: analyze_snippet_optimization(soup, elements),
+        'analyze_structure': lambda: analyze_structure(soup, elements),
+        'analyze_entities': lambda: analyze_entities(soup, elements),
+        'analyze_eeat': lambda: analyze_eeat(soup, FIXTURE_URL, elements),
+        'analyze_page': lambda: analyze_page(soup, FIXTURE_URL),
+        'analyze_stream': lambda: analyze_stream(lambda: (html,), FIXTURE_URL),
+        'calculate_score_breakdown': lambda: calculate_score_breakdown(result),
+        'calculate_engine_scores': lambda: calculate_engine_scores(result),
+        'generate_prioritized_recommendations': lambda: generate_prioritized_recommendations(result),
+        'run_audit': lambda: run_audit(html, FIXTURE_URL)
+    }
+
+def measure(func, repeat):
+    """Best and median seconds per call; fast stages are looped until one sample takes ~0.2s"""
+    timer = timeit.Timer(func)
+    number, total = timer.autorange()
+    samples = [total / number] + [t / number for t in timer.repeat(repeat=repeat - 1, number=number)]
+    return {'best': min(samples), 'median': statistics.median(samples), 'calls': number * repeat}
+
+def run_benchmarks(fixtures, sizes, repeat, batch_pages=0, only=None):
+    """Time every stage of every fixture at every size; only limits the run to a set of "fixture/size/stage" keys"""
+    timings = {}
+    for path in fixtures:
+        name = os.path.splitext(os.path.basename(path))[0]
+        with open(path, encoding='utf-8') as f:
+            base_html = f.read()
+        for label, target in sizes:
+            if only is not None and not any(key.startswith(f"{name}/{label}/") for key in only):
+                continue
+            html = scale_html(base_html, target)
+            size = len(html.encode('utf-8'))
+            for stage, func in build_stages(html).items():
+                key = f"{name}/{label}/{stage}"
+                if only is not None and key not in only:
+                    continue
+                timings[key] = {'bytes': size, **measure(func, repeat)}
+                print(f"{key:<60} {timings[key]['best'] * 1000:>10.2f} ms", file=sys.stderr)
+    
+    # Batch rescoring: the fixtures' analyzer results, cycled up to batch_pages stored audits
+    batch_keys = {f"batch/{batch_pages}/score_pages", f"batch/{batch_pages}/score_batch"}
+    if batch_pages and fixtures and (only is None or batch_keys & only):
+        results = []
+        for path in fixtures:
+            with open(path, encoding='utf-8') as f:
+                results.append(analyze_page(parse_html(f.read()), FIXTURE_URL))
+        pages = [results[i % len(results)] for i in range(batch_pages)]
+        batch = ResultBatch(pages)
+        for key, func in ((f"batch/{batch_pages}/score_pages", lambda: score_pages(pages)), (f"batch/{batch_pages}/score_batch", batch.scores)):
+            if only is not None and key not in only:
+                continue
+            timings[key] = {'pages': batch_pages, **measure(func, repeat)}
+            print(f"{key:<60} {timings[key]['best'] * 1000:>10.2f} ms", file=sys.stderr)
+    return timings
+
+def find_regressions(timings, baseline, threshold):
+    """Stages whose best time exceeds the baseline's by more than threshold (and MIN_REGRESSION_SECONDS)"""
+    regressions = []
+    for key, current in timings.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        limit = previous['best'] * (1 + threshold)
+        if current['best'] > limit and current['best'] - previous['best'] > MIN_REGRESSION_SECONDS:
+            regressions.append({
+                'stage': key,
+                'baseline': previous['best'],
+                'current': current['best'],
+                'ratio': round(current['best'] / previous['best'], 2)
+            })
+    return regressions
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark AEO audit stages against a stored baseline")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help=f"Comma-separated size tiers (default: {DEFAULT_SIZES})")
+    parser.add_argument('--fixtures', default=None, help="Comma-separated fixture names (default: every fixtures/*.html)")
+    parser.add_argument('--batch-pages', type=int, default=DEFAULT_BATCH_PAGES, help=f"Audits rescored by the batch stage, 0 to skip (default: {DEFAULT_BATCH_PAGES})")
+    parser.add_argument('--repeat', type=int, default=3, help="Timing samples per stage (default: 3)")
+    parser.add_argument('-o', '--output', default='-', help="JSON results file, or - for stdout (default)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline JSON to compare against, created by the first run if missing")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help=f"Allowed slowdown as a fraction (default: {DEFAULT_THRESHOLD})")
+    parser.add_argument('--save-baseline', action='store_true', help="Write these results to the baseline file instead of comparing")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    fixtures = sorted(glob.glob(os.path.join(FIXTURE_DIR, '*.html')))
+    if args.fixtures:
+        wanted = set(args.fixtures.split(','))
+        fixtures = [p for p in fixtures if os.path.splitext(os.path.basename(p))[0] in wanted]
+    sizes = [(label.strip().lower(), parse_size(label)) for label in args.sizes.split(',')]
+    
+    report = {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'parser_backend': resolve_parser_backend(),
+            'repeat': args.repeat
+        },
+        'timings': run_benchmarks(fixtures, sizes, args.repeat, args.batch_pages)
+    }
+    
+    status = 0
+    if args.save_baseline or not os.path.exists(args.baseline):
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline with {len(report['timings'])} stages to {args.baseline}", file=sys.stderr)
+    else:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline['meta']['parser_backend'] != report['meta']['parser_backend']:
+            print(f"WARN  baseline was recorded with the {baseline['meta']['parser_backend']} backend", file=sys.stderr)
+        regressions = find_regressions(report['timings'], baseline['timings'], args.threshold)
+        if regressions:
+            # One slow sample is usually scheduler noise; a real regression is still slow on a second pass
+            print(f"\nRe-measuring {len(regressions)} suspected regressions", file=sys.stderr)
+            retimed = run_benchmarks(fixtures, sizes, args.repeat, args.batch_pages, only={r['stage'] for r in regressions})
+            for key, timing in retimed.items():
+                if timing['best'] < report['timings'][key]['best']:
+                    report['timings'][key] = timing
+            regressions = find_regressions(report['timings'], baseline['timings'], args.threshold)
+        report['regressions'] = regressions
+        for regression in report['regressions']:
+            print(f"FAIL  {regression['stage']}: {regression['baseline'] * 1000:.2f} ms -> {regression['current'] * 1000:.2f} ms ({regression['ratio']}x)", file=sys.stderr)
+        print(f"\n{len(report['timings'])} stages, {len(report['regressions'])} regressions past {args.threshold:.0%}", file=sys.stderr)
+        status = 1 if report['regressions'] else 0
+    
+    output = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(output)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    return status
+
+if __name__ == '__main__':
+    sys.exit(main())
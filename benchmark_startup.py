@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark cold start: module import time and first-audit latency against a budget.
+
+Usage: python benchmark_startup.py [--runs 5] [--fixture blog] [--output results.json]
+                                   [--budget first_audit=0.5 ...]
+
+Every measurement runs in a fresh interpreter, so nothing is already imported
+or cached. Probes:
+  import_engine        import aeo_engine
+  first_audit          first run_audit() in a new process (loads the readability dictionaries)
+  warm_readability     warm_readability() on its own, as the app's startup warm-up runs it
+  first_audit_warmed   first run_audit() after the warm-up
+  app_first_run        first run of the Streamlit script (no URL entered), excluding Streamlit's own import
+The median of --runs samples is compared with each probe's budget in seconds;
+any probe over budget is reported and the exit status is 1. The report also
+lists which heavy optional modules the app loaded before anyone used a view
+that needs them.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(ROOT_DIR, 'AEO_Claude_New.py')
+FIXTURE_DIR = os.path.join(ROOT_DIR, 'fixtures')
+FIXTURE_URL = 'https://example.com/fixture'
+
+# Seconds; generous enough for a small cloud worker, tight enough to catch a heavy import creeping back in
+DEFAULT_BUDGETS = {
+    'import_engine': 0.5,
+    'first_audit': 0.6,
+    'warm_readability': 0.6,
+    'first_audit_warmed': 0.1,
+    'app_first_run': 1.5
+}
+# Only the views that draw tables and charts should pull these in
+HEAVY_MODULES = ('pandas', 'plotly.express')
+
+ENGINE_PROBE = '''
+import json, sys, time
+sys.path.insert(0, ROOT_DIR)
+start = time.perf_counter()
+import aeo_engine
+timings = {'import_engine': time.perf_counter() - start}
+with open(FIXTURE, encoding='utf-8') as f:
+    html = f.read()
+if WARM:
+    start = time.perf_counter()
+    aeo_engine.warm_readability()
+    timings['warm_readability'] = time.perf_counter() - start
+start = time.perf_counter()
+aeo_engine.run_audit(html, FIXTURE_URL)
+timings['first_audit_warmed' if WARM else 'first_audit'] = time.perf_counter() - start
+print(json.dumps(timings))
+'''
+
+APP_PROBE = '''
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file(APP_PATH, default_timeout=60)
+start = time.perf_counter()
+app.run()
+elapsed = time.perf_counter() - start
+if app.exception:
+    sys.exit(app.exception[0].value)
+print(json.dumps({'app_first_run': elapsed, 'loaded': [m for m in HEAVY_MODULES if m in sys.modules]}))
+'''
+
+def run_probe(code, **constants):
+    """Run a probe in a fresh interpreter and return the JSON it prints"""
+    header = ''.join(f"{name} = {value!r}\n" for name, value in constants.items())
+    completed = subprocess.run(
+        [sys.executable, '-c', header + code], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def run_startup_benchmarks(fixture, runs):
+    """Samples per probe, plus the heavy modules seen after the app's first run"""
+    samples = {}
+    loaded = set()
+    for _ in range(runs):
+        for warm in (False, True):
+            result = run_probe(ENGINE_PROBE, ROOT_DIR=ROOT_DIR, FIXTURE=fixture, FIXTURE_URL=FIXTURE_URL, WARM=warm)
+            for probe, seconds in result.items():
+                if warm and probe == 'import_engine':
+                    continue
+                samples.setdefault(probe, []).append(seconds)
+        result = run_probe(APP_PROBE, APP_PATH=APP_PATH, HEAVY_MODULES=HEAVY_MODULES)
+        samples.setdefault('app_first_run', []).append(result['app_first_run'])
+        loaded.update(result['loaded'])
+    
+    timings = {}
+    for probe in DEFAULT_BUDGETS:
+        timings[probe] = {'best': min(samples[probe]), 'median': statistics.median(samples[probe]), 'runs': len(samples[probe])}
+        print(f"{probe:<24} {timings[probe]['median'] * 1000:>10.1f} ms", file=sys.stderr)
+    return timings, sorted(loaded)
+
+def parse_budget(value):
+    """'first_audit=0.5' -> ('first_audit', 0.5)"""
+    probe, _, seconds = value.partition('=')
+    if probe not in DEFAULT_BUDGETS or not seconds:
+        raise argparse.ArgumentTypeError(f"expected PROBE=SECONDS with PROBE one of {', '.join(DEFAULT_BUDGETS)}")
+    return probe, float(seconds)
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Benchmark import time and first-audit latency against a budget")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh-process samples per probe (default: 5)")
+    parser.add_argument('--fixture', default='blog', help="Fixture audited by the first-audit probes (default: blog)")
+    parser.add_argument('--budget', type=parse_budget, action='append', default=[], help="Override a budget, e.g. first_audit=0.5 (repeatable)")
+    parser.add_argument('-o', '--output', default='-', help="JSON results file, or - for stdout (default)")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    budgets = {**DEFAULT_BUDGETS, **dict(args.budget)}
+    timings, loaded = run_startup_benchmarks(os.path.join(FIXTURE_DIR, f"{args.fixture}.html"), args.runs)
+    
+    over_budget = [
+        {'probe': probe, 'budget': budgets[probe], 'median': timing['median']}
+        for probe, timing in timings.items() if timing['median'] > budgets[probe]
+    ]
+    for entry in over_budget:
+        print(f"FAIL  {entry['probe']}: {entry['median'] * 1000:.1f} ms over the {entry['budget'] * 1000:.0f} ms budget", file=sys.stderr)
+    if loaded:
+        print(f"WARN  the app's first run imported {', '.join(loaded)}", file=sys.stderr)
+    print(f"\n{len(timings)} probes, {len(over_budget)} over budget", file=sys.stderr)
+    
+    report = {
+        'meta': {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'runs': args.runs
+        },
+        'budgets': budgets,
+        'timings': timings,
+        'heavy_modules_loaded': loaded,
+        'over_budget': over_budget
+    }
+    output = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(output)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    return 1 if over_budget else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+Check the HTTP client against a local stub server: that fetch_page() reuses one keep-alive
+connection across audits and retries, that it retries the statuses in HTTP_RETRY_STATUSES with
+backoff (honouring Retry-After) up to HTTP_MAX_RETRIES times, and that it doesn't retry other errors.
+Then that fetch_document() cuts endless, chunked and gzip bodies off at MAX_DOWNLOAD_BYTES and a
+slow trickle or a stalled body at DOWNLOAD_DEADLINE, flagging them as truncated, and leaves normal
+bodies whole.
+
+Usage: python check_http_client.py
+
+The stub server speaks HTTP/1.1 on 127.0.0.1 and counts the connections it accepts and the
+requests each path receives. Its responses carry Cache-Control: no-store, and the HTTP cache is
+pointed at a temporary directory, so every fetch goes over the network and nothing is stored.
+The download limits are lowered to CHECK_MAX_BYTES and CHECK_DEADLINE so the checks run quickly.
+"""
+
+import gzip
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHECK_MAX_BYTES = 256 * 1024
+CHECK_DEADLINE = 2
+os.environ['AEO_HTTP_CACHE_DIR'] = tempfile.mkdtemp(prefix='aeo_check_http_')
+os.environ['AEO_MAX_DOWNLOAD_BYTES'] = str(CHECK_MAX_BYTES)
+os.environ['AEO_DOWNLOAD_DEADLINE'] = str(CHECK_DEADLINE)
+
+from aeo_engine import DOWNLOAD_DEADLINE, HTTP_MAX_RETRIES, MAX_DOWNLOAD_BYTES, fetch_document, fetch_page
+
+PAGE_HTML = ('<html><head><title>Stub page</title></head><body>'
+             + '<p>Plain text served by the stub server for the HTTP client check.</p>' * 20
+             + '</body></html>')
+SEQUENTIAL_FETCHES = 10
+# How many times /flaky fails before it answers
+FLAKY_FAILURES = 2
+RETRY_AFTER_SECONDS = 1
+# Streamed bodies: the block the stub writes at a time, how much /endless sends before giving up
+# on a client that never stops reading, and the pace of /trickle
+STREAM_BLOCK = PAGE_HTML.encode('utf-8') * 8
+ENDLESS_LIMIT_BYTES = MAX_DOWNLOAD_BYTES * 64
+TRICKLE_INTERVAL = 0.25
+# /stall sends one block, then nothing for this long, well past the deadline but short of READ_TIMEOUT
+STALL_SECONDS = CHECK_DEADLINE * 3
+# How long past DOWNLOAD_DEADLINE a cut-off download may take to come back
+DEADLINE_SLACK = 0.5
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = Counter()
+    
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+    
+    def handle_error(self, request, client_address):
+        # Clients that stop reading at a download limit drop the connection; that's expected here
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+    
+    def reset(self):
+        with self.lock:
+            self.connections = 0
+            self.requests.clear()
+
+class StubHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so a reused connection shows up as several requests on one setup()
+    protocol_version = 'HTTP/1.1'
+    
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+    
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        with self.server.lock:
+            self.server.requests[path] += 1
+            attempt = self.server.requests[path]
+        if path == '/page':
+            self.respond(200)
+        elif path == '/flaky':
+            self.respond(503 if attempt <= FLAKY_FAILURES else 200)
+        elif path == '/down':
+            self.respond(503)
+        elif path == '/limited' and attempt == 1:
+            self.respond(429, {'Retry-After': str(RETRY_AFTER_SECONDS)})
+        elif path == '/limited':
+            self.respond(200)
+        elif path == '/endless':
+            self.stream(self.endless_blocks())
+        elif path == '/chunked':
+            size = int(self.path.split('size=')[1])
+            self.stream((STREAM_BLOCK * (size // len(STREAM_BLOCK) + 1))[:size], chunked=True)
+        elif path == '/trickle':
+            self.stream(self.trickle_blocks(), chunked=True)
+        elif path == '/stall':
+            self.stream(self.stalled_blocks(), chunked=True)
+        elif path == '/gzip':
+            self.respond(200, {'Content-Encoding': 'gzip'}, gzip.compress(b' ' * (MAX_DOWNLOAD_BYTES * 16)))
+        else:
+            self.respond(404)
+    
+    def respond(self, status, headers=None, body=None):
+        if body is None:
+            body = PAGE_HTML.encode('utf-8') if status == 200 else b'stub error'
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def stream(self, blocks, chunked=False):
+        """Send a 200 without Content-Length: chunked, or delimited by closing the connection"""
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Cache-Control', 'no-store')
+        if chunked:
+            self.send_header('Transfer-Encoding', 'chunked')
+        else:
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        self.end_headers()
+        if isinstance(blocks, bytes):
+            blocks = [blocks[start:start + len(STREAM_BLOCK)] for start in range(0, len(blocks), len(STREAM_BLOCK))]
+        try:
+            for block in blocks:
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(block), block) if chunked else block)
+                self.wfile.flush()
+            if chunked:
+                self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+    
+    def endless_blocks(self):
+        for _ in range(ENDLESS_LIMIT_BYTES // len(STREAM_BLOCK)):
+            yield STREAM_BLOCK
+    
+    def trickle_blocks(self):
+        for _ in range(int(DOWNLOAD_DEADLINE * 4 / TRICKLE_INTERVAL)):
+            yield STREAM_BLOCK[:200]
+            time.sleep(TRICKLE_INTERVAL)
+    
+    def stalled_blocks(self):
+        yield STREAM_BLOCK
+        time.sleep(STALL_SECONDS)
+        yield STREAM_BLOCK
+    
+    def log_message(self, format, *args):
+        pass
+
+def fetch_error(url):
+    """The message fetch_page() raises for a URL, or None if it succeeds"""
+    try:
+        fetch_page(url)
+    except Exception as e:
+        return str(e)
+    return None
+
+def fetch_timed(url):
+    """fetch_document() for a URL with the seconds it took"""
+    start = time.monotonic()
+    fetched = fetch_document(url)
+    return fetched, time.monotonic() - start
+
+def check(label, passed, detail):
+    print(f"{'ok  ' if passed else 'FAIL'}  {label}: {detail}")
+    return 0 if passed else 1
+
+def main():
+    server = StubServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    failures = 0
+    
+    pages = [fetch_page(server.url(f"/page?n={i}")) for i in range(SEQUENTIAL_FETCHES)]
+    failures += check("connection reuse", pages == [PAGE_HTML] * SEQUENTIAL_FETCHES and server.connections == 1,
+                      f"{SEQUENTIAL_FETCHES} fetches over {server.connections} connection(s)")
+    
+    server.reset()
+    error = fetch_error(server.url('/flaky'))
+    failures += check("retry until success", error is None and server.requests['/flaky'] == FLAKY_FAILURES + 1,
+                      f"{server.requests['/flaky']} requests for {FLAKY_FAILURES} failures, error {error!r}")
+    failures += check("retries reuse the connection", server.connections == 0,
+                      f"{server.connections} new connection(s) while retrying")
+    
+    server.reset()
+    error = fetch_error(server.url('/down'))
+    failures += check("retries are capped", error is not None and '503' in error and server.requests['/down'] == HTTP_MAX_RETRIES + 1,
+                      f"{server.requests['/down']} requests, HTTP_MAX_RETRIES is {HTTP_MAX_RETRIES}")
+    
+    server.reset()
+    start = time.monotonic()
+    error = fetch_error(server.url('/limited'))
+    elapsed = time.monotonic() - start
+    failures += check("Retry-After is honoured", error is None and server.requests['/limited'] == 2 and elapsed >= RETRY_AFTER_SECONDS,
+                      f"{server.requests['/limited']} requests, retried after {elapsed:.2f} s")
+    
+    server.reset()
+    error = fetch_error(server.url('/missing'))
+    failures += check("other errors aren't retried", error is not None and '404' in error and server.requests['/missing'] == 1,
+                      f"{server.requests['/missing']} request(s), error {error!r}")
+    
+    fetched = fetch_document(server.url('/page?n=whole'))
+    failures += check("normal body isn't truncated", fetched['truncated'] is None and fetched['body'] == PAGE_HTML.encode('utf-8'),
+                      f"{len(fetched['body'])} bytes, truncated {fetched['truncated']!r}")
+    
+    size = MAX_DOWNLOAD_BYTES // 2
+    fetched = fetch_document(server.url(f"/chunked?size={size}"))
+    failures += check("chunked body under the cap isn't truncated", fetched['truncated'] is None and len(fetched['body']) == size,
+                      f"{len(fetched['body'])} of {size} bytes, truncated {fetched['truncated']!r}")
+    
+    for label, url in [("endless body", '/endless'), ("chunked body", f"/chunked?size={MAX_DOWNLOAD_BYTES * 4}"), ("gzip body", '/gzip')]:
+        fetched, elapsed = fetch_timed(server.url(url))
+        failures += check(f"{label} stops at the byte cap", fetched['truncated'] == 'size' and len(fetched['body']) == MAX_DOWNLOAD_BYTES,
+                          f"{len(fetched['body'])} bytes of {MAX_DOWNLOAD_BYTES}, truncated {fetched['truncated']!r}, {elapsed:.2f} s")
+    
+    for label, url in [("slow trickle", '/trickle'), ("stalled body", '/stall')]:
+        fetched, elapsed = fetch_timed(server.url(url))
+        failures += check(f"{label} stops at the deadline", fetched['truncated'] == 'deadline' and DOWNLOAD_DEADLINE <= elapsed <= DOWNLOAD_DEADLINE + DEADLINE_SLACK,
+                          f"{len(fetched['body'])} bytes in {elapsed:.2f} s, deadline {DOWNLOAD_DEADLINE:g} s, truncated {fetched['truncated']!r}")
+    
+    server.shutdown()
+    print(f"\n{failures} failures")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
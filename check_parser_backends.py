@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Check that every analyzer returns the same output on each installed parser backend,
+that the pruned parse (PrunedSoup) gives the same output as the full tree, and that
+analyze_stream() gives the same page result as analyze_page() on html.parser in both content
+scopes, and that extract_jsonld() reads the same structured data from the raw bytes as
+analyze_schema() from the tree.
+
+Usage: python check_parser_backends.py [fixture.html ...]
+
+html.parser is the reference. Backends that aren't installed are reported and skipped.
+Pruned parses are compared against a full parse on the same BeautifulSoup backend. A fixture
+with anything to prune (PRUNABLE_PATTERN) must give a smaller tree, any other the same size;
+the element count and best-of parse time of both trees are reported. The streaming analysis is fed the
+fixture in STREAM_CHUNK_SIZE pieces so tags and words get split across chunks. Every check
+runs in the configured content scope (AEO_CONTENT_SCOPE); the stream is also checked in the other.
+Fixtures must be well-formed: on broken nesting (e.g. a <p> left open around another
+<p>) the HTML5 backends legitimately build a different tree than html.parser.
+"""
+
+import glob
+import os
+import re
+import sys
+import time
+
+from aeo_engine import (
+    CONTENT_SCOPES, PARSER_BACKENDS, analyze_schema, analyze_questions, analyze_snippet_optimization,
+    analyze_structure, analyze_entities, analyze_eeat, analyze_page, analyze_stream, extract_jsonld,
+    parse_html, resolve_content_scope, resolve_parser_backend
+)
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+FIXTURE_URL = 'https://example.com/fixture'
+PARSE_REPEATS = 5
+STREAM_CHUNK_SIZE = 1000
+# Elements PrunedSoup leaves out: style, svg and every script that isn't JSON-LD
+PRUNABLE_PATTERN = re.compile(r'<(?:style|svg)\b|<script\b(?![^>]*application/ld\+json)', re.I)
+
+ANALYZERS = {
+    'analyze_schema': analyze_schema,
+    'analyze_questions': analyze_questions,
+    'analyze_snippet_optimization': analyze_snippet_optimization,
+    'analyze_structure': analyze_structure,
+    'analyze_entities': analyze_entities,
+    'analyze_eeat': lambda soup: analyze_eeat(soup, FIXTURE_URL),
+    'analyze_page': lambda soup: analyze_page(soup, FIXTURE_URL)
+}
+
+def run_analyzers(html, backend, pruned=False):
+    """Run every analyzer standalone, each on a freshly parsed document"""
+    return {name: analyzer(parse_html(html, backend, pruned=pruned)) for name, analyzer in ANALYZERS.items()}
+
+def parse_stats(html, backend, pruned):
+    """Element count of the tree and the best parse time in ms"""
+    times = []
+    for _ in range(PARSE_REPEATS):
+        start = time.perf_counter()
+        soup = parse_html(html, backend, pruned=pruned)
+        times.append((time.perf_counter() - start) * 1000)
+    return len(soup.find_all(True)), min(times)
+
+def run_stream(html, scope=None):
+    """analyze_stream() on the fixture in small chunks; only analyze_page has a streaming counterpart"""
+    open_chunks = lambda: (html[i:i + STREAM_CHUNK_SIZE] for i in range(0, len(html), STREAM_CHUNK_SIZE))
+    return {'analyze_page': analyze_stream(open_chunks, FIXTURE_URL, scope=scope)}
+
+def run_page(html, scope):
+    """analyze_page() on html.parser in the given content scope"""
+    return {'analyze_page': analyze_page(parse_html(html, 'html.parser'), FIXTURE_URL, scope=scope)}
+
+def report_mismatches(path, label, expected, actual, reference):
+    failures = 0
+    for name in actual:
+        if actual[name] != expected[name]:
+            failures += 1
+            print(f"FAIL  {os.path.basename(path)} [{label}] {name}")
+            print(f"        {reference}: {expected[name]}")
+            print(f"        {label}: {actual[name]}")
+    return failures
+
+def main(paths):
+    paths = paths or sorted(glob.glob(os.path.join(FIXTURE_DIR, '*.html')))
+    backends = [b for b in PARSER_BACKENDS if b != 'html.parser']
+    installed = [b for b in backends if resolve_parser_backend(b) == b]
+    for backend in backends:
+        if backend not in installed:
+            print(f"SKIP  {backend}: not installed")
+    
+    failures = 0
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            html = f.read()
+        expected = run_analyzers(html, 'html.parser')
+        for backend in installed:
+            failures += report_mismatches(path, backend, expected, run_analyzers(html, backend), 'html.parser')
+        failures += report_mismatches(path, 'stream', expected, run_stream(html), 'html.parser')
+        other_scope = next(scope for scope in CONTENT_SCOPES if scope != resolve_content_scope())
+        failures += report_mismatches(path, f"stream {other_scope} scope", run_page(html, other_scope), run_stream(html, other_scope), f"html.parser {other_scope} scope")
+        raw_schema = extract_jsonld(html.encode('utf-8'), 'utf-8').schema_result()
+        failures += report_mismatches(path, 'raw JSON-LD', expected, {'analyze_schema': raw_schema}, 'html.parser')
+        print(f"ok    {os.path.basename(path)} ({', '.join(['html.parser'] + installed)}, stream, raw JSON-LD)")
+        
+        # lexbor builds its own tree, so only the BeautifulSoup backends have a pruned parse
+        for backend in [b for b in ['html.parser'] + installed if b != 'selectolax']:
+            full = expected if backend == 'html.parser' else run_analyzers(html, backend)
+            failures += report_mismatches(path, f"{backend} pruned", full, run_analyzers(html, backend, pruned=True), backend)
+            full_elements, full_ms = parse_stats(html, backend, pruned=False)
+            pruned_elements, pruned_ms = parse_stats(html, backend, pruned=True)
+            prunable = PRUNABLE_PATTERN.search(html) is not None
+            if (pruned_elements >= full_elements) if prunable else (pruned_elements != full_elements):
+                failures += 1
+                print(f"FAIL  {os.path.basename(path)} [{backend} pruned] {pruned_elements} elements, full parse {full_elements}")
+            print(f"      pruned [{backend}]: {pruned_elements}/{full_elements} elements, "
+                  f"parse {pruned_ms:.2f} ms vs {full_ms:.2f} ms")
+    
+    print(f"\n{len(paths)} fixtures, {len(installed) + 1} backends, {failures} mismatches")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
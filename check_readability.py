@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""
+Check that the readability scorer matches textstat: for each fixture, the page-wide Flesch
+Reading Ease from analyze_readability() must be within READABILITY_TOLERANCE (0.1 points, the
+scorer rounds to one decimal) of textstat.flesch_reading_ease() on the same full page text.
+
+Usage: python check_readability.py [fixture.html ...]
+
+textstat isn't a dependency; the check is skipped when it isn't installed, or when it can't load
+nltk's CMU pronouncing dictionary (it downloads it on first use). textstat is asked first, so a
+dictionary it downloads is also the one the scorer reads.
+"""
+
+import glob
+import os
+import sys
+
+from aeo_engine import analyze_readability, collect_page_elements, parse_html
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+READABILITY_TOLERANCE = 0.1
+
+def main(paths):
+    try:
+        import textstat
+        textstat.flesch_reading_ease('Load the syllable sources before the scorer does.')
+    except ImportError:
+        print("SKIP  textstat is not installed")
+        return 0
+    except LookupError:
+        print("SKIP  textstat can't load nltk's cmudict")
+        return 0
+    
+    paths = paths or sorted(glob.glob(os.path.join(FIXTURE_DIR, '*.html')))
+    failures = 0
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            text_model = collect_page_elements(parse_html(f.read(), 'html.parser'))['text_model']
+        ours = analyze_readability(text_model)['flesch_reading_ease']
+        theirs = textstat.flesch_reading_ease(text_model.text)
+        passed = abs(ours - theirs) <= READABILITY_TOLERANCE
+        failures += not passed
+        print(f"{'ok  ' if passed else 'FAIL'}  {os.path.basename(path)}: {ours} vs textstat {theirs:.2f}")
+    
+    print(f"\n{len(paths)} fixtures, {failures} outside {READABILITY_TOLERANCE} points")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
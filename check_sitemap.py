@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+Check sitemap crawling against a local stub server: that iter_sitemap_urls() follows a nested
+sitemap index and reads a gzip-compressed sitemap, that a nested sitemap answering 404 or
+serving malformed XML is reported through on_error and skipped while the rest of the queue is
+still read, that a failing top-level sitemap raises, and that audit_site() records the skipped
+sitemaps in the site summary.
+
+Usage: python check_sitemap.py
+
+The stub server speaks HTTP/1.1 on 127.0.0.1. The HTTP cache and audit history are pointed at a
+temporary directory, and the site audit runs inline (one worker).
+"""
+
+import gzip
+import os
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHECK_DIR = tempfile.mkdtemp(prefix='aeo_check_sitemap_')
+os.environ['AEO_HTTP_CACHE_DIR'] = os.path.join(CHECK_DIR, 'http')
+os.environ['AEO_HISTORY_DB'] = os.path.join(CHECK_DIR, 'history.sqlite3')
+
+from aeo_sitemap import SiteSummary, audit_site, iter_sitemap_urls
+
+SITEMAP_NS = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+PAGE_HTML = ('<html><head><title>Stub page</title></head><body><h1>Stub page</h1>'
+             + '<p>Plain text served by the stub server for the sitemap check.</p>' * 20
+             + '</body></html>').encode('utf-8')
+# Sitemaps by path: ('index' | 'urls', [child paths]); the page paths are listed in them
+SITEMAPS = {
+    '/sitemap_index.xml': ('index', ['/nested_index.xml', '/missing.xml', '/broken.xml', '/pages.xml.gz']),
+    '/nested_index.xml': ('index', ['/nested.xml']),
+    '/nested.xml': ('urls', ['/page/nested-1', '/page/nested-2']),
+    '/pages.xml.gz': ('urls', ['/page/gzip-1', '/page/gzip-2', '/page/gzip-3']),
+    '/broken.xml': ('urls', ['/page/broken-1'])
+}
+# /broken.xml ends in this, an entry left open, after its first page
+BROKEN_TAIL = b'<url><loc>'
+FAILING_SITEMAPS = ('/missing.xml', '/broken.xml')
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+    
+    def url(self, path):
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def do_GET(self):
+        if self.path in SITEMAPS:
+            body = self.sitemap(*SITEMAPS[self.path])
+            if self.path == '/broken.xml':
+                # Cut the document off inside an open entry
+                body = body[:body.rindex(b'</urlset>')] + BROKEN_TAIL
+            if self.path.endswith('.gz'):
+                body = gzip.compress(body)
+            self.respond(200, 'application/xml', body)
+        elif self.path.startswith('/page/'):
+            self.respond(200, 'text/html; charset=utf-8', PAGE_HTML)
+        else:
+            self.respond(404, 'text/plain', b'stub error')
+    
+    def sitemap(self, kind, paths):
+        root, entry = ('sitemapindex', 'sitemap') if kind == 'index' else ('urlset', 'url')
+        entries = ''.join(f"<{entry}><loc>{self.server.url(path)}</loc></{entry}>" for path in paths)
+        return f'<?xml version="1.0" encoding="UTF-8"?><{root} xmlns="{SITEMAP_NS}">{entries}</{root}>'.encode('utf-8')
+    
+    def respond(self, status, content_type, body):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+def check(label, passed, detail):
+    print(f"{'ok  ' if passed else 'FAIL'}  {label}: {detail}")
+    return 0 if passed else 1
+
+def top_level_error(url):
+    """The exception iter_sitemap_urls() raises for a top-level sitemap, or None"""
+    try:
+        list(iter_sitemap_urls(url))
+    except Exception as e:
+        return e
+    return None
+
+def main():
+    server = StubServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    failures = 0
+    
+    expected = {server.url(path) for kind, paths in SITEMAPS.values() if kind == 'urls' for path in paths}
+    errors = []
+    urls = list(iter_sitemap_urls(server.url('/sitemap_index.xml'), on_error=lambda url, error: errors.append((url, error))))
+    failures += check("nested index, gzip sitemap and partial broken sitemap are read", sorted(urls) == sorted(expected),
+                      f"{len(urls)} of {len(expected)} page URLs")
+    failed = [url for url, error in errors]
+    failures += check("failing nested sitemaps are reported and skipped", failed == [server.url(path) for path in FAILING_SITEMAPS],
+                      '; '.join(f"{url.rsplit('/', 1)[-1]}: {error}" for url, error in errors))
+    
+    for path in FAILING_SITEMAPS:
+        error = top_level_error(server.url(path))
+        failures += check(f"top-level {path} raises", error is not None, repr(error))
+    
+    summary = SiteSummary(server.url('/sitemap_index.xml'))
+    records = list(audit_site(server.url('/sitemap_index.xml'), workers=1, summary=summary))
+    site = summary.to_dict()
+    skipped = [entry['sitemap'] for entry in site['sitemap_errors']]
+    failures += check("site audit carries on and records skipped sitemaps",
+                      len(records) == len(expected) and site['audited'] == len(expected) and skipped == failed,
+                      f"{site['audited']} pages audited, {len(skipped)} sitemap error(s) in the summary")
+    
+    server.shutdown()
+    print(f"\n{failures} failures")
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""
+Compare the text analyzers' results on the whole page with their results on its main content block.
+
+Usage: python compare_content_scopes.py [fixture.html | https://url ...]
+
+With no arguments the fixtures are compared. For each page the main content block found by
+main-content extraction is shown (its share of the page's text and how it starts), followed by
+every structure and entity field that differs between the 'full' and 'main' content scopes.
+The configured scope (AEO_CONTENT_SCOPE) doesn't matter here: both are always run.
+"""
+
+import glob
+import os
+import sys
+
+from aeo_engine import analyze_entities, analyze_structure, collect_page_elements, fetch_document, parse_html
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+PREVIEW_LENGTH = 70
+
+def load_page(source):
+    """Parse a local HTML file or fetch and parse a URL"""
+    if source.startswith(('http://', 'https://')):
+        fetched = fetch_document(source)
+        return parse_html(fetched['body'], encoding=fetched['encoding'])
+    with open(source, encoding='utf-8') as f:
+        return parse_html(f.read())
+
+def text_results(soup, elements):
+    return {'structure': analyze_structure(soup, elements), 'entities': analyze_entities(soup, elements)}
+
+def compare_page(source):
+    """Print the main content block and the fields that change with the scope; returns how many changed"""
+    soup = load_page(source)
+    full = collect_page_elements(soup, 'full')
+    main = collect_page_elements(soup, 'main')
+    page = main['text_model']
+    block = page.main_content()
+    preview = ' '.join(block.text.split())[:PREVIEW_LENGTH]
+    if block is page:
+        print(f"{source}: no main content block found, both scopes read the whole page")
+    else:
+        print(f"{source}: main content is {len(block.text)} of {len(page.text)} characters, from offset {block.offset}")
+        print(f"      starts: {preview!r}")
+    
+    full_results = text_results(soup, full)
+    main_results = text_results(soup, main)
+    changed = 0
+    for section, values in full_results.items():
+        for name, value in values.items():
+            if main_results[section][name] != value:
+                changed += 1
+                print(f"      {section}.{name}")
+                print(f"        full: {value}")
+                print(f"        main: {main_results[section][name]}")
+    return changed
+
+def main(sources):
+    sources = sources or sorted(glob.glob(os.path.join(FIXTURE_DIR, '*.html')))
+    changed = sum(compare_page(source) for source in sources)
+    print(f"\n{len(sources)} pages, {changed} fields differ between the full-page and main-content scopes")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))